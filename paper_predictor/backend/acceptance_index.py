@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+历史条件接受率索引
+把历史论文按评分组合归类，预先统计每一类的 接受数/总数，
+预测时 O(1) 查表得到基于真实决策的接受概率，不需要任何模型推理
+
+索引分为由细到粗的多级键，样本不足时逐级回退：
+  1. multiset  - 排序后的评分组合，如 (3, 6, 8)
+  2. histogram - 评审数 + 评分分段直方图（每2分一段）
+  3. mean_count - 平均分分桶（0.25）+ 评审数
+  4. mean      - 平均分分桶（0.5）
+"""
+
+import math
+
+
+# 由细到粗的索引级别
+INDEX_LEVELS = ("multiset", "histogram", "mean_count", "mean")
+
+
+def _round_half(score):
+    """评分保留到0.5分，避免浮点误差产生不同的键"""
+    return round(float(score) * 2) / 2
+
+
+def index_keys(scores):
+    """
+    计算一组评分在各级索引中的键
+
+    Args:
+        scores: 评分列表
+
+    Returns:
+        tuple: 与 INDEX_LEVELS 一一对应的键
+    """
+
+    rounded = sorted(_round_half(s) for s in scores)
+    count = len(rounded)
+    mean = sum(rounded) / count
+
+    # 每2分一段：1-2, 3-4, 5-6, 7-8, 9-10
+    histogram = [0] * 5
+    for s in rounded:
+        histogram[min(4, max(0, int((s - 1) // 2)))] += 1
+
+    return (
+        tuple(rounded),
+        (count, tuple(histogram)),
+        (math.floor(mean * 4), count),
+        math.floor(mean * 2)
+    )
+
+
+class AcceptanceIndex:
+    """按评分组合统计的历史接受率索引（单个年份）"""
+
+    def __init__(self, min_support=30):
+        self.min_support = min_support
+        # 每级索引: 键 -> [接受数, 总数]
+        self.tables = {level: {} for level in INDEX_LEVELS}
+        self.accepted = 0
+        self.total = 0
+
+    def add(self, scores, accepted):
+        """加入一篇历史论文（加载数据时单遍调用）"""
+        if not scores:
+            return
+
+        accepted = 1 if accepted else 0
+        for level, key in zip(INDEX_LEVELS, index_keys(scores)):
+            counts = self.tables[level].get(key)
+            if counts is None:
+                self.tables[level][key] = [accepted, 1]
+            else:
+                counts[0] += accepted
+                counts[1] += 1
+
+        self.accepted += accepted
+        self.total += 1
+
+    def lookup(self, scores, min_support=None):
+        """
+        查询评分组合的经验接受率
+
+        从最细的级别开始查找，样本数不少于 min_support 即返回；
+        所有级别样本都不足时返回样本最多的最细级别结果
+
+        Args:
+            scores: 评分列表
+            min_support: 最小样本数（默认使用构建时的设置）
+
+        Returns:
+            dict: probability / accepted / total / level，没有任何匹配时返回 None
+        """
+
+        if not scores or not self.total:
+            return None
+
+        if min_support is None:
+            min_support = self.min_support
+
+        best = None
+        for level, key in zip(INDEX_LEVELS, index_keys(scores)):
+            counts = self.tables[level].get(key)
+            if counts is None:
+                continue
+
+            result = {
+                "probability": counts[0] / counts[1],
+                "accepted": counts[0],
+                "total": counts[1],
+                "level": level
+            }
+            if counts[1] >= min_support:
+                return result
+            if best is None or counts[1] > best["total"]:
+                best = result
+
+        return best
+
+    def memory_bytes(self):
+        """估算各级索引表的内存占用（字典、计数列表和键元组）"""
+        import sys
+
+        total = 0
+        for table in self.tables.values():
+            total += sys.getsizeof(table) + len(table) * (sys.getsizeof([0, 0]) + sys.getsizeof(()))
+        return total
+
+    def summary(self):
+        """各级索引的键数量，用于状态展示"""
+        return {level: len(table) for level, table in self.tables.items()}
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+准入控制与限流
+为 /predict、/check-payment 等接口提供：
+  - 按客户端IP / 订单号的令牌桶限流（超限返回 429 + Retry-After）
+  - 全局并发上限 + 有界等待队列（队列已满或排队延迟超过目标时返回 503 + Retry-After）
+  - 空闲令牌桶的定期清理，以及被拒绝请求的计数
+
+使用方法（在 main.py 中，需在 CORS 中间件之前添加，保证拒绝响应也带 CORS 头）：
+    admission = AdmissionController(rules=[...])
+    app.add_middleware(AdmissionControlMiddleware, controller=admission)
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+
+class TokenBucket:
+    """令牌桶：rate 个/秒补充，最多积攒 burst 个"""
+
+    __slots__ = ("tokens", "updated_at")
+
+    def __init__(self, burst, now):
+        self.tokens = float(burst)
+        self.updated_at = now
+
+    def try_acquire(self, rate, burst, now):
+        """
+        尝试取一个令牌
+
+        Returns:
+            float: 0 表示成功，否则为需要等待的秒数
+        """
+
+        self.tokens = min(burst, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / rate
+
+    def wait_time(self, rate, burst, now):
+        """不扣减令牌，只计算取一个令牌需要等待的秒数（0 表示可以立即取得）"""
+        tokens = min(burst, self.tokens + (now - self.updated_at) * rate)
+        return 0.0 if tokens >= 1 else (1 - tokens) / rate
+
+
+class RateLimitRule:
+    """一条限流规则：匹配路径前缀，并按 key 维度分桶"""
+
+    def __init__(self, name, path_prefix, rate, burst, key="ip", methods=None):
+        """
+        Args:
+            name: 规则名（用于计数）
+            path_prefix: 匹配的路径前缀
+            rate: 每秒补充的令牌数
+            burst: 桶容量
+            key: "ip" 按客户端IP分桶，"path" 按路径最后一段（如订单号）分桶
+            methods: 限定的 HTTP 方法，None 表示全部
+        """
+
+        self.name = name
+        self.path_prefix = path_prefix
+        self.rate = rate
+        self.burst = burst
+        self.key = key
+        self.methods = set(methods) if methods else None
+
+    def matches(self, method, path):
+        return path.startswith(self.path_prefix) and (self.methods is None or method in self.methods)
+
+    def bucket_key(self, client_ip, path):
+        if self.key == "path":
+            return path.rstrip("/").rsplit("/", 1)[-1]
+        return client_ip
+
+
+class LoadShed(Exception):
+    """请求被准入控制拒绝"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """全局并发上限 + 有界等待队列，排队延迟超过目标时主动丢弃新请求"""
+
+    def __init__(self, limit, max_queue, target_queue_delay):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.target_queue_delay = target_queue_delay
+
+        self.active = 0
+        self._waiters = deque()
+        # 排队延迟的指数移动平均
+        self.queue_delay_ewma = 0.0
+
+    @property
+    def queue_length(self):
+        return len(self._waiters)
+
+    def _observe_delay(self, delay):
+        self.queue_delay_ewma = self.queue_delay_ewma * 0.8 + delay * 0.2
+
+    async def acquire(self):
+        """获取一个并发槽位，必要时排队；无法在目标延迟内获得时抛出 LoadShed"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self._observe_delay(0.0)
+            return
+
+        retry_after = max(1, math.ceil(self.target_queue_delay * 2))
+        if len(self._waiters) >= self.max_queue:
+            raise LoadShed("queue_full", retry_after)
+        if self.queue_delay_ewma > self.target_queue_delay:
+            raise LoadShed("queue_latency", retry_after)
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        enqueued_at = time.monotonic()
+
+        try:
+            # 最多等待两倍目标延迟，超时视为过载
+            await asyncio.wait_for(asyncio.shield(future), self.target_queue_delay * 2)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # 槽位已经转交给本请求，放弃时要归还
+                self.release()
+            else:
+                future.cancel()
+                try:
+                    self._waiters.remove(future)
+                except ValueError:
+                    pass
+            self._observe_delay(time.monotonic() - enqueued_at)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            raise LoadShed("queue_timeout", retry_after)
+
+        self._observe_delay(time.monotonic() - enqueued_at)
+
+    def release(self):
+        """释放槽位：有排队请求时直接转交，否则减少并发计数"""
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+
+class AdmissionController:
+    """令牌桶限流 + 并发准入控制"""
+
+    def __init__(self, rules, max_concurrency=32, max_queue=64, target_queue_delay_ms=200,
+                 bucket_idle_seconds=600, sweep_interval_seconds=60, trust_forwarded=False):
+        self.rules = rules
+        self.limiter = ConcurrencyLimiter(max_concurrency, max_queue, target_queue_delay_ms / 1000)
+        self.bucket_idle_seconds = bucket_idle_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.trust_forwarded = trust_forwarded
+
+        # (规则名, 分桶键) -> TokenBucket
+        self._buckets = {}
+        self._last_sweep = time.monotonic()
+
+        self.counters = {
+            "admitted": 0,
+            "rate_limited": {rule.name: 0 for rule in rules},
+            "shed": {"queue_full": 0, "queue_latency": 0, "queue_timeout": 0},
+            "buckets_swept": 0
+        }
+
+    def match(self, method, path):
+        """返回匹配该请求的限流规则列表，空列表表示不受控"""
+        return [rule for rule in self.rules if rule.matches(method, path)]
+
+    def client_ip(self, scope):
+        """
+        客户端IP：默认取连接的对端地址；只有显式开启 trust_forwarded（部署在已知代理后面，
+        且代理会追加 X-Forwarded-For）时才取 X-Forwarded-For 最后一跳，否则客户端可以伪造该头绕过按IP限流
+        """
+        if self.trust_forwarded:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    forwarded = value.decode("latin-1").split(",")[-1].strip()
+                    if forwarded:
+                        return forwarded
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def check_rate(self, rules, client_ip, path):
+        """
+        检查所有规则，全部通过后才扣减令牌
+
+        先检查按IP分桶的规则，再检查按订单号等路径分桶的规则；被拒绝的请求不消耗任何规则的令牌，
+        也不会创建新的令牌桶（随意构造的订单号不会在被IP规则拒绝后留下桶）
+
+        Returns:
+            tuple: (被触发的规则名, 需等待秒数)，全部通过时返回 (None, 0)
+        """
+
+        now = time.monotonic()
+        self._maybe_sweep(now)
+
+        keyed = [(rule, (rule.name, rule.bucket_key(client_ip, path)))
+                 for rule in sorted(rules, key=lambda rule: rule.key != "ip")]
+
+        for rule, key in keyed:
+            bucket = self._buckets.get(key)
+            wait = bucket.wait_time(rule.rate, rule.burst, now) if bucket is not None else 0.0
+            if wait > 0:
+                self.counters["rate_limited"][rule.name] += 1
+                return rule.name, wait
+
+        for rule, key in keyed:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rule.burst, now)
+            bucket.try_acquire(rule.rate, rule.burst, now)
+
+        return None, 0.0
+
+    def _maybe_sweep(self, now):
+        """定期清理长时间未使用的令牌桶（空闲后桶已满，删除不影响限流结果）"""
+        if now - self._last_sweep < self.sweep_interval_seconds:
+            return
+
+        self._last_sweep = now
+        idle_before = now - self.bucket_idle_seconds
+        stale = [key for key, bucket in self._buckets.items() if bucket.updated_at < idle_before]
+        for key in stale:
+            del self._buckets[key]
+        self.counters["buckets_swept"] += len(stale)
+
+    def stats(self):
+        """准入控制计数，用于 /admission-stats"""
+        return {
+            "active": self.limiter.active,
+            "max_concurrency": self.limiter.limit,
+            "queue_length": self.limiter.queue_length,
+            "max_queue": self.limiter.max_queue,
+            "queue_delay_ewma_ms": round(self.limiter.queue_delay_ewma * 1000, 2),
+            "target_queue_delay_ms": round(self.limiter.target_queue_delay * 1000, 2),
+            "buckets": len(self._buckets),
+            "admitted": self.counters["admitted"],
+            "rate_limited": dict(self.counters["rate_limited"]),
+            "shed": dict(self.counters["shed"]),
+            "buckets_swept": self.counters["buckets_swept"]
+        }
+
+
+def _reject_response(status_code, detail, retry_after):
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode())
+    ]
+    return status_code, headers, body
+
+
+class AdmissionControlMiddleware:
+    """ASGI 中间件：对匹配规则的请求执行限流和并发准入"""
+
+    def __init__(self, app, controller):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        path = scope.get("path", "")
+        rules = controller.match(scope.get("method", "GET"), path)
+        if not rules:
+            await self.app(scope, receive, send)
+            return
+
+        rule_name, wait = controller.check_rate(rules, controller.client_ip(scope), path)
+        if rule_name is not None:
+            await self._send_reject(send, *_reject_response(429, "请求过于频繁，请稍后再试", wait))
+            return
+
+        try:
+            await controller.limiter.acquire()
+        except LoadShed as e:
+            controller.counters["shed"][e.reason] += 1
+            await self._send_reject(send, *_reject_response(503, "服务繁忙，请稍后再试", e.retry_after))
+            return
+
+        controller.counters["admitted"] += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.limiter.release()
+
+    @staticmethod
+    async def _send_reject(send, status_code, headers, body):
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+后端性能基准测试
+
+用法：
+  python benchmark.py decoder <数据文件路径> [最大行数]
+  python benchmark.py imports [模块名] [次数]
+  python benchmark.py serialize [重复次数]
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+
+# API 服务冷启动导入 main 的时间预算（毫秒），超出时 imports 基准以非零状态退出
+IMPORT_BUDGET_MS = float(os.environ.get("IMPORT_BUDGET_MS", 800))
+
+# 导入 main 时不应加载的重量级模块（只在对应功能第一次使用时导入）
+LAZY_MODULES = ("numpy", "pandas", "sklearn", "joblib", "requests", "uvicorn")
+
+
+def bench_decoder(file_path, limit=None):
+    """评审记录解码吞吐量：逐行 json.loads 对比共享解码器"""
+    from review_decoder import benchmark_file
+
+    print(f"🔬 解码基准: {file_path}")
+    results = benchmark_file(file_path, limit=limit)
+
+    for name in ("json.loads", "review_decoder"):
+        r = results[name]
+        print(f"  - {name:<15} {r['lines_per_sec']:>10.0f} 行/秒  {r['mb_per_sec']:>8.1f} MB/秒")
+
+    speedup = results["review_decoder"]["lines_per_sec"] / max(results["json.loads"]["lines_per_sec"], 1e-9)
+    print(f"  - JSON后端: {results['backend']}, 加速比: {speedup:.2f}x, 结果一致: {results['identical']}")
+    return results
+
+
+def parse_importtime(stderr, module):
+    """
+    解析 python -X importtime 的输出
+
+    Returns:
+        tuple: (module 及其依赖的 [(模块名, 深度, 自身微秒, 累计微秒)], module 的累计微秒)
+    """
+
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        # 模块名前有一个空格，每深一层多两个空格
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+
+    # importtime 先输出子模块，再输出父模块；module 之前、上一个顶层模块之后的都是它的依赖
+    for i, (name, depth, _, cumulative_us) in enumerate(entries):
+        if name == module and depth == 0:
+            start = i
+            while start > 0 and entries[start - 1][1] > 0:
+                start -= 1
+            return entries[start:i + 1], cumulative_us
+
+    raise ValueError(f"importtime 输出中没有找到 {module}")
+
+
+def bench_imports(module="main", runs=3, top=15):
+    """冷启动导入耗时：每个依赖模块的累计耗时，以及是否超出预算、是否提前导入了重量级模块"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+
+    print(f"🔬 导入基准: import {module}（{runs} 次取最快）")
+    best = None
+    totals = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=backend_dir, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"导入 {module} 失败:\n{completed.stderr[-2000:]}")
+
+        entries, total_us = parse_importtime(completed.stderr, module)
+        totals.append(total_us / 1000)
+        if best is None or total_us < best[1]:
+            best = (entries, total_us)
+
+    entries, total_us = best
+    direct = sorted((e for e in entries if e[1] == 1), key=lambda e: e[3], reverse=True)
+    heaviest = sorted(entries[:-1], key=lambda e: e[2], reverse=True)
+    loaded = {name.split(".")[0] for name, _, _, _ in entries}
+    eager = [name for name in LAZY_MODULES if name in loaded]
+
+    total_ms = total_us / 1000
+    print(f"  - 总耗时: {total_ms:.1f}ms（预算 {IMPORT_BUDGET_MS:.0f}ms），各次: "
+          + ", ".join(f"{t:.1f}ms" for t in totals))
+    print(f"  - 直接依赖（累计耗时）:")
+    for name, _, _, cumulative_us in direct[:top]:
+        print(f"      {name:<28} {cumulative_us / 1000:>8.1f}ms")
+    print(f"  - 自身耗时最多的模块:")
+    for name, _, self_us, _ in heaviest[:top]:
+        print(f"      {name:<28} {self_us / 1000:>8.1f}ms")
+
+    within_budget = total_ms <= IMPORT_BUDGET_MS and not eager
+    if eager:
+        print(f"  ❌ 导入 {module} 时提前加载了重量级模块: {', '.join(eager)}")
+    if total_ms > IMPORT_BUDGET_MS:
+        print(f"  ❌ 冷启动导入超出预算: {total_ms:.1f}ms > {IMPORT_BUDGET_MS:.0f}ms")
+
+    return {
+        "module": module,
+        "total_ms": round(total_ms, 1),
+        "runs_ms": [round(t, 1) for t in totals],
+        "budget_ms": IMPORT_BUDGET_MS,
+        "within_budget": within_budget,
+        "eager_heavy_modules": eager,
+        "modules_loaded": len(entries),
+        "direct_imports_ms": {name: round(cumulative_us / 1000, 2) for name, _, _, cumulative_us in direct[:top]},
+        "heaviest_self_ms": {name: round(self_us / 1000, 2) for name, _, self_us, _ in heaviest[:top]}
+    }
+
+
+def bench_serialize(iterations=2000):
+    """响应序列化耗时：FastAPI 默认编码路径对比 FastJSONResponse"""
+    import numpy as np
+    from fast_json import benchmark_serialization
+    from main import PredictionResponse
+
+    predict_payload = {
+        "probability": np.float64(0.6565656565656566),
+        "rank_in_all": np.int64(486),
+        "rank_in_accepted": np.int64(447),
+        "avg_score": np.float64(6.333333333333333),
+        "min_score": 5.0,
+        "total_papers": 3000,
+        "accepted_papers": 929,
+        "prediction_method": "empirical_index_with_historical_ranking",
+        "prediction_time_ms": 1
+    }
+    status_payload = {
+        "historical_data_loaded": ["2024", "2025"],
+        "dataset_memory": [
+            {"venue": "ICLR", "year": str(year), "avg_scores": 12000, "score_values": 12077, "total": 160466}
+            for year in range(2018, 2026)
+        ],
+        "stats": {"loads": 2, "hits": 1000, "misses": 2, "evictions": 0, "load_seconds": 0.35}
+    }
+    distribution_payload = {
+        "bins": np.linspace(1, 10, 37).tolist(),
+        "counts": np.arange(36, dtype=np.int64),
+        "acceptance_rate": np.random.default_rng(0).random(36)
+    }
+
+    print(f"🔬 序列化基准: 每种方式 {iterations} 次")
+    results = benchmark_serialization({
+        "predict": (predict_payload, PredictionResponse),
+        "predict_python_types": ({k: v.item() if hasattr(v, "item") else v for k, v in predict_payload.items()},
+                                 PredictionResponse),
+        "data_status": (status_payload, None),
+        "numpy_arrays": (distribution_payload, None)
+    }, iterations=iterations)
+
+    for name, row in results.items():
+        if name == "backend":
+            continue
+        cells = []
+        for label in ("fastapi_default", "fast_json"):
+            r = row[label]
+            cells.append(f"{label}: " + (f"{r['us_per_response']:.1f}μs" if "error" not in r else "不支持"))
+        print(f"  - {name:<22} " + "  ".join(cells))
+    print(f"  - JSON后端: {results['backend']}")
+    return results
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("📖 使用方法:")
+        print("  python benchmark.py decoder <数据文件路径> [最大行数]")
+        print("  python benchmark.py imports [模块名] [次数]")
+        print("  python benchmark.py serialize [重复次数]")
+        return
+
+    command = sys.argv[1]
+
+    if command == "decoder" and len(sys.argv) > 2:
+        limit = int(sys.argv[3]) if len(sys.argv) > 3 else None
+        results = bench_decoder(sys.argv[2], limit)
+    elif command == "serialize":
+        iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+        results = bench_serialize(iterations)
+    elif command == "imports":
+        module = sys.argv[2] if len(sys.argv) > 2 else "main"
+        runs = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+        results = bench_imports(module, runs)
+    else:
+        print(f"❌ 未知的基准项目或缺少参数: {' '.join(sys.argv[1:])}")
+        sys.exit(1)
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+    # 导入预算作为强制检查（可用于 CI）
+    if command == "imports" and not results["within_budget"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
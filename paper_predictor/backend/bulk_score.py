@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+离线批量打分工具
+对大量评分组合（如新一年的全部论文）批量计算接受概率，不经过 /predict：
+  - 流式读取格式化 JSONL（可压缩）/ 热数据 scores.jsonl / CSV，按 CHUNK_ROWS 行分块交给进程池
+  - 每块在工作进程中一次性计算：规则概率（rule_engine.rule_probability_batch）和
+    集成模型概率（PaperAcceptancePredictor.predict_matrix，向量化特征 + 每个模型一次 predict_proba）
+  - 结果按输入顺序写出：.csv（可压缩，如 .csv.gz）为 CSV，.npz 为列式 NumPy 文件（论文ID、平均分、评审数、各概率各一列）
+
+CSV 输入需要 scores 列（"5;6;8"、"5 6 8" 或 JSON 列表），可选 paper_id / confidences / decision 列
+
+使用方法：
+    python bulk_score.py nips_history_data/ICLR_2025_formatted.jsonl scores_2025.npz
+    python bulk_score.py profiles.csv results.csv --workers 4 --models models --no-ml
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from compressed_io import open_binary, open_output, open_text, split_compression_suffix
+from review_decoder import decode_review_line, parse_confidence, parse_rating
+from rule_engine import RULE_NAMES, rule_probability_batch
+
+
+CHUNK_ROWS = 4096
+
+# 最多同时在途的块数 = 工作进程数 x IN_FLIGHT_PER_WORKER（限制内存占用，同时保持进程池饱和）
+IN_FLIGHT_PER_WORKER = 2
+
+OUTPUT_COLUMNS = ("paper_id", "avg_score", "num_reviews", "rule_probability", "rule",
+                  "ml_probability", "probability", "decision")
+
+# 工作进程内常驻的预测器（每个进程加载一次，没有模型时为 None）
+_worker_predictor = None
+
+
+def _init_worker(models_dir):
+    """工作进程初始化：加载预训练模型（不可用时只计算规则概率）"""
+    global _worker_predictor
+
+    if not models_dir:
+        return
+
+    from ml_predictor import PaperAcceptancePredictor
+
+    predictor = PaperAcceptancePredictor(models_dir=models_dir)
+    _worker_predictor = predictor if predictor.load_models() else None
+
+
+def parse_score_list(value, parser):
+    """CSV 单元格中的评分列表：JSON 列表，或以分号/逗号/空格分隔"""
+    if value is None:
+        return []
+    value = value.strip()
+    if not value:
+        return []
+    if value.startswith('['):
+        items = json.loads(value)
+    else:
+        items = value.replace(';', ' ').replace(',', ' ').split()
+    return [parsed for parsed in (parser(item) for item in items) if parsed is not None]
+
+
+def _decode_jsonl(lines, first_line_num):
+    """JSONL 行 -> [(论文ID, 评分, 自信心, 决策)]，跳过空行和无法解析的行"""
+    rows = []
+    for offset, line in enumerate(lines):
+        if not line:
+            continue
+        try:
+            record = decode_review_line(line)
+        except ValueError:
+            continue
+        rows.append((record.paper_id or str(first_line_num + offset), list(record.scores),
+                     list(record.confidences), record.decision))
+    return rows
+
+
+def _decode_csv(items, first_line_num):
+    """CSV 行（字典）-> [(论文ID, 评分, 自信心, 决策)]"""
+    rows = []
+    for offset, item in enumerate(items):
+        try:
+            scores = parse_score_list(item.get("scores"), parse_rating)
+            confidences = parse_score_list(item.get("confidences"), parse_confidence)
+        except ValueError:
+            continue
+        rows.append((item.get("paper_id") or str(first_line_num + offset), scores, confidences,
+                     (item.get("decision") or "").lower()))
+    return rows
+
+
+def _padded(lists, width):
+    matrix = np.full((len(lists), width), np.nan)
+    for i, values in enumerate(lists):
+        matrix[i, :len(values)] = values
+    return matrix
+
+
+def score_chunk(kind, items, first_line_num, seed):
+    """
+    工作进程：解码并打分一个块
+
+    Args:
+        kind: "jsonl" / "csv"
+        items: 原始行（bytes）或 CSV 行字典
+        first_line_num: 块内第一行的行号（没有论文ID时用作ID）
+        seed: 规则概率的随机种子（按块固定，结果可复现）
+
+    Returns:
+        dict: 输出列 -> 数组，另含 skipped（没有评分的行数）
+    """
+
+    decoded = _decode_jsonl(items, first_line_num) if kind == "jsonl" else _decode_csv(items, first_line_num)
+    rows = [row for row in decoded if row[1]]
+    skipped = sum(1 for item in items if item) - len(rows)
+
+    if not rows:
+        return {"skipped": skipped, "rows": 0}
+
+    width = max(len(row[1]) for row in rows)
+    scores = _padded([row[1] for row in rows], width)
+    rule_probabilities, rule_ids = rule_probability_batch(scores, rng=np.random.default_rng(seed))
+
+    ml_probabilities = np.full(len(rows), np.nan)
+    if _worker_predictor is not None:
+        confidence_width = max(1, max(len(row[2]) for row in rows))
+        confidences = _padded([row[2] for row in rows], confidence_width)
+        ml_probabilities = _worker_predictor.predict_matrix(scores, confidences)[0]
+
+    return {
+        "skipped": skipped,
+        "rows": len(rows),
+        "paper_id": [row[0] for row in rows],
+        "avg_score": np.nanmean(scores, axis=1).astype(np.float32),
+        "num_reviews": (~np.isnan(scores)).sum(axis=1).astype(np.int16),
+        "rule_probability": rule_probabilities.astype(np.float32),
+        "rule": rule_ids.astype(np.uint8),
+        "ml_probability": ml_probabilities.astype(np.float32),
+        # 有模型结果时使用集成模型概率，否则使用规则概率
+        "probability": np.where(np.isnan(ml_probabilities), rule_probabilities, ml_probabilities).astype(np.float32),
+        "decision": [row[3] for row in rows]
+    }
+
+
+def iter_chunks(input_path, chunk_rows=CHUNK_ROWS):
+    """
+    流式读取输入文件并分块
+
+    Yields:
+        tuple: (kind, items, 第一行的行号)
+    """
+
+    if split_compression_suffix(input_path)[0].lower().endswith(".csv"):
+        with open_text(input_path) as f:
+            reader = csv.DictReader(f)
+            if "scores" not in (reader.fieldnames or []):
+                raise ValueError("CSV 输入需要 scores 列")
+            chunk, first = [], 2  # 第 1 行是表头
+            for line_num, item in enumerate(reader, 2):
+                chunk.append(item)
+                if len(chunk) >= chunk_rows:
+                    yield "csv", chunk, first
+                    chunk, first = [], line_num + 1
+            if chunk:
+                yield "csv", chunk, first
+        return
+
+    # 空行也留在块内（保持块内偏移与行号对应），由工作进程跳过
+    with open_binary(input_path) as f:
+        chunk, first = [], 1
+        for line_num, line in enumerate(f, 1):
+            chunk.append(line.strip())
+            if len(chunk) >= chunk_rows:
+                yield "jsonl", chunk, first
+                chunk, first = [], line_num + 1
+        if any(chunk):
+            yield "jsonl", chunk, first
+
+
+class CsvResultWriter:
+    """逐块写出 CSV"""
+
+    def __init__(self, output_path):
+        self._file = open_output(output_path)
+        self._writer = csv.writer(self._file, lineterminator='\n')
+        self._writer.writerow(OUTPUT_COLUMNS)
+
+    def write(self, result):
+        ml = result["ml_probability"]
+        for i in range(result["rows"]):
+            self._writer.writerow((
+                result["paper_id"][i],
+                f"{result['avg_score'][i]:.4f}",
+                int(result["num_reviews"][i]),
+                f"{result['rule_probability'][i]:.4f}",
+                RULE_NAMES[result["rule"][i]],
+                "" if np.isnan(ml[i]) else f"{ml[i]:.4f}",
+                f"{result['probability'][i]:.4f}",
+                result["decision"][i]
+            ))
+
+    def close(self):
+        self._file.close()
+
+
+class NpzResultWriter:
+    """按列累积，结束时写出压缩的 .npz（论文ID和决策为定长字符串列，规则为下标 + rule_names）"""
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self._columns = {name: [] for name in OUTPUT_COLUMNS}
+
+    def write(self, result):
+        if result["rows"]:
+            for name in OUTPUT_COLUMNS:
+                self._columns[name].append(result[name])
+
+    def close(self):
+        columns = {}
+        for name, parts in self._columns.items():
+            if name in ("paper_id", "decision"):
+                columns[name] = np.array([value for part in parts for value in part], dtype=str)
+            else:
+                columns[name] = np.concatenate(parts) if parts else np.empty(0)
+        columns["rule_names"] = np.array(RULE_NAMES)
+
+        # 先写临时文件再替换，避免中断后留下不完整的结果
+        tmp_path = self.output_path + ".tmp.npz"
+        np.savez_compressed(tmp_path, **columns)
+        os.replace(tmp_path, self.output_path)
+
+
+def output_format(output_path):
+    """
+    输出格式：.csv（可压缩，如 .csv.gz）或 .npz（本身已压缩，不能再加压缩扩展名）
+
+    Raises:
+        ValueError: 不支持的输出文件名
+    """
+
+    base, suffix = split_compression_suffix(output_path)
+    if base.endswith(".csv"):
+        return "csv"
+    if base.endswith(".npz"):
+        if suffix:
+            raise ValueError(".npz 输出已是压缩格式，不能再加压缩扩展名")
+        return "npz"
+    raise ValueError("输出文件需以 .csv（可压缩，如 .csv.gz）或 .npz 结尾")
+
+
+def bulk_score(input_path, output_path, workers=None, models_dir="models", chunk_rows=CHUNK_ROWS, seed=0):
+    """
+    批量打分
+
+    Args:
+        input_path: 输入文件（JSONL / CSV，可压缩）
+        output_path: 输出文件（.csv 或 .npz）
+        workers: 工作进程数（默认 CPU 核数）
+        models_dir: 模型目录（None 表示只计算规则概率）
+        chunk_rows: 每块行数
+        seed: 规则概率的随机种子
+
+    Returns:
+        dict: rows / skipped / chunks / seconds / rows_per_second / ml
+
+    Raises:
+        ValueError: 输出文件名不支持，或 CSV 输入缺少 scores 列
+    """
+
+    writer_class = NpzResultWriter if output_format(output_path) == "npz" else CsvResultWriter
+    workers = workers or os.cpu_count() or 1
+    if models_dir and not os.path.exists(os.path.join(models_dir, "model_info.json")):
+        print(f"⚠️  {models_dir} 中没有训练好的模型，只计算规则概率")
+        models_dir = None
+
+    writer = writer_class(output_path)
+    stats = {"rows": 0, "skipped": 0, "chunks": 0, "ml_rows": 0}
+    start_time = time.perf_counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(models_dir,)) as executor:
+        # 按提交顺序取回结果，保证输出与输入顺序一致
+        pending = deque()
+
+        def drain(limit):
+            while len(pending) > limit:
+                result = pending.popleft().result()
+                writer.write(result)
+                stats["rows"] += result["rows"]
+                stats["skipped"] += result["skipped"]
+                if result["rows"]:
+                    stats["ml_rows"] += int((~np.isnan(result["ml_probability"])).sum())
+
+        try:
+            for kind, items, first_line_num in iter_chunks(input_path, chunk_rows):
+                pending.append(executor.submit(score_chunk, kind, items, first_line_num, seed + stats["chunks"]))
+                stats["chunks"] += 1
+                drain(workers * IN_FLIGHT_PER_WORKER)
+            drain(0)
+        finally:
+            writer.close()
+
+    stats["seconds"] = time.perf_counter() - start_time
+    stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+    stats["ml"] = models_dir is not None
+    return stats
+
+
+def parse_args(argv):
+    """解析命令行参数：输入、输出、--workers、--models、--no-ml、--chunk-rows、--seed"""
+    options = {"input": None, "output": None, "workers": None, "models": "models",
+               "chunk_rows": CHUNK_ROWS, "seed": 0}
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == "--no-ml":
+            options["models"] = None
+        elif arg in ("--workers", "--models", "--chunk-rows", "--seed"):
+            if not args:
+                raise ValueError(f"{arg} 缺少参数")
+            value = args.pop(0)
+            key = arg[2:].replace("-", "_")
+            options[key] = value if arg == "--models" else int(value)
+        elif options["input"] is None:
+            options["input"] = arg
+        elif options["output"] is None:
+            options["output"] = arg
+        else:
+            raise ValueError(f"无法识别的参数: {arg}")
+    if options["input"] is None or options["output"] is None:
+        raise ValueError("需要输入文件和输出文件")
+    output_format(options["output"])
+    return options
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("📖 使用方法:")
+        print("  python bulk_score.py <输入 JSONL/CSV> <输出 .csv/.npz> [--workers N] [--models 目录] [--no-ml] "
+              "[--chunk-rows N] [--seed N]")
+        print("\n💡 示例:")
+        print("  python bulk_score.py nips_history_data/ICLR_2025_formatted.jsonl scores_2025.npz")
+        print("  python bulk_score.py profiles.csv results.csv --workers 4 --no-ml")
+        return
+
+    try:
+        options = parse_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    if not os.path.exists(options["input"]):
+        print(f"❌ 输入文件不存在: {options['input']}")
+        sys.exit(1)
+
+    print("🎯 批量打分工具")
+    print("=" * 50)
+
+    try:
+        stats = bulk_score(options["input"], options["output"], workers=options["workers"],
+                           models_dir=options["models"], chunk_rows=options["chunk_rows"], seed=options["seed"])
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    print(f"✅ 打分完成: {stats['rows']} 行（跳过 {stats['skipped']} 行没有评分的数据）, {stats['chunks']} 块")
+    print(f"   - 模型概率: {stats['ml_rows']} 行" if stats["ml"] else "   - 只计算了规则概率")
+    print(f"   - 用时 {stats['seconds']:.2f}s, {stats['rows_per_second']:,.0f} 行/秒")
+    print(f"   - 输出: {options['output']}")
+
+
+if __name__ == "__main__":
+    main()
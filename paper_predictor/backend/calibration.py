@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+跨年份百分位校准
+每个年份加载时预先计算平均分的经验累积分布表（只保存不同的平均分取值，几千篇论文也只有几百个点），
+查询时在表上二分查找 + 线性插值，每次 O(log n)：
+  - 百分位：平均分 x 在某年份中的 F(x) = 平均分 <= x 的论文比例
+  - 等价分数：把 x 在年份 A 中的百分位映射到年份 B 中相同百分位对应的平均分 F_B^-1(F_A(x))
+  - 排名：等价分数在目标年份中的排名（平均分更高的论文数 + 1）
+
+多个年份可以合并成一个参考分布（按论文数加权），参考年份缺失时 /predict 用它代替固定的默认排名
+
+使用方法：
+    table = CalibrationTable.from_columns(year_data["papers"])
+    pooled = CalibrationTable.pooled([table_2023, table_2024])
+    result = map_score(6.33, source=table_2024, target=pooled)
+"""
+
+import numpy as np
+
+
+def _stored(avg_score):
+    """按 ScoreColumns 的存储精度（float32）比较，与 rank_of 的结果一致"""
+    return float(np.float32(avg_score))
+
+
+class CalibrationTable:
+    """单个参考分布的平均分经验累积分布表"""
+
+    def __init__(self, values, le_counts, accepted_le_counts):
+        # values: 不同的平均分（升序）；le_counts / accepted_le_counts: 平均分 <= values[i] 的论文数 / 接受论文数
+        self.values = values
+        self.le_counts = le_counts
+        self.accepted_le_counts = accepted_le_counts
+        self.total = int(le_counts[-1]) if len(le_counts) else 0
+        self.accepted = int(accepted_le_counts[-1]) if len(accepted_le_counts) else 0
+        self.cdf = le_counts / self.total if self.total else le_counts.astype(np.float64)
+
+    @classmethod
+    def from_columns(cls, papers):
+        """
+        由 ScoreColumns 构建（平均分已排序，单遍计算）
+
+        Args:
+            papers: ScoreColumns
+
+        Returns:
+            CalibrationTable
+        """
+
+        avg_scores = papers.avg_scores.astype(np.float64)
+        if not len(avg_scores):
+            return cls(np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+        # 每个不同取值的最后一个位置
+        last = np.flatnonzero(np.append(np.diff(avg_scores) != 0, True))
+        return cls(
+            avg_scores[last],
+            (last + 1).astype(np.int64),
+            papers.accepted_cumsum[last + 1].astype(np.int64)
+        )
+
+    @classmethod
+    def pooled(cls, tables):
+        """
+        合并多个年份的分布（按论文数加权，相当于把所有论文放在一起）
+
+        Args:
+            tables: CalibrationTable 列表
+
+        Returns:
+            CalibrationTable
+        """
+
+        tables = [table for table in tables if table.total]
+        if not tables:
+            return cls(np.empty(0), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+
+        values = np.unique(np.concatenate([table.values for table in tables]))
+        le_counts = np.zeros(len(values), dtype=np.int64)
+        accepted_le_counts = np.zeros(len(values), dtype=np.int64)
+        for table in tables:
+            positions = np.searchsorted(table.values, values, side='right') - 1
+            present = positions >= 0
+            le_counts[present] += table.le_counts[positions[present]]
+            accepted_le_counts[present] += table.accepted_le_counts[positions[present]]
+
+        return cls(values, le_counts, accepted_le_counts)
+
+    def __len__(self):
+        return len(self.values)
+
+    def memory_bytes(self):
+        return self.values.nbytes + self.le_counts.nbytes + self.accepted_le_counts.nbytes + self.cdf.nbytes
+
+    def percentile(self, avg_score):
+        """平均分 <= avg_score 的论文比例（表中取值之间线性插值）"""
+        if not self.total:
+            return None
+        return float(np.interp(_stored(avg_score), self.values, self.cdf, left=0.0, right=1.0))
+
+    def score_at(self, percentile):
+        """百分位对应的平均分（percentile 的反函数）"""
+        if not self.total:
+            return None
+        return float(np.interp(percentile, self.cdf, self.values))
+
+    def rank_of(self, avg_score):
+        """
+        平均分对应的排名（与 ScoreColumns.rank_of 相同：平均分更高的论文数 + 1）
+
+        Returns:
+            tuple: (在所有论文中的排名, 在接受论文中的排名)
+        """
+
+        position = int(np.searchsorted(self.values, _stored(avg_score), side='right')) - 1
+        if position < 0:
+            return self.total + 1, self.accepted + 1
+        return (int(self.total - self.le_counts[position]) + 1,
+                int(self.accepted - self.accepted_le_counts[position]) + 1)
+
+
+def map_score(avg_score, source, target):
+    """
+    把平均分从 source 分布映射到 target 分布中的等价位置
+
+    Args:
+        avg_score: 平均分
+        source: 平均分所在的分布（CalibrationTable，不能为空）
+        target: 目标分布（CalibrationTable，不能为空）
+
+    Returns:
+        dict: source_percentile / equivalent_score / percentile / rank_in_all / rank_in_accepted / total / accepted
+
+    Raises:
+        ValueError: source 或 target 中没有论文（百分位无定义）
+    """
+
+    if not source.total or not target.total:
+        raise ValueError("校准分布中没有论文")
+
+    source_percentile = source.percentile(avg_score)
+    equivalent_score = target.score_at(source_percentile) if source is not target else float(avg_score)
+    rank_in_all, rank_in_accepted = target.rank_of(equivalent_score)
+    return {
+        "source_percentile": round(source_percentile, 4),
+        "equivalent_score": round(equivalent_score, 4),
+        "percentile": round(target.percentile(equivalent_score), 4),
+        "rank_in_all": rank_in_all,
+        "rank_in_accepted": rank_in_accepted,
+        "total": target.total,
+        "accepted": target.accepted
+    }
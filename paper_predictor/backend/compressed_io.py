@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+压缩文件透明读写
+历史数据、原始 OpenReview 数据都可以用 gzip / xz / zstd 压缩保存，
+所有读取方按扩展名或文件头魔数自动识别压缩格式，并以大缓冲区流式解压
+
+支持的格式：
+  - .gz  gzip（标准库）
+  - .xz  xz / lzma（标准库）
+  - .zst zstd（需要安装 zstandard，未安装时读写 .zst 会报错）
+
+使用方法：
+    with open_binary("nips_history_data/ICLR_2024_formatted.jsonl.gz") as f:
+        for line in f:
+            ...
+
+    with open_output("nips_history_data/ICLR_2024_formatted.jsonl.zst") as f:
+        f.write(json.dumps(paper) + '\\n')
+"""
+
+import gzip
+import io
+import lzma
+import os
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# 流式解压的读缓冲区大小
+READ_BUFFER_SIZE = 1024 * 1024
+
+COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".xz": "xz",
+    ".zst": "zstd"
+}
+
+# 文件头魔数
+COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"\xfd7zXZ\x00", "xz"),
+    (b"\x28\xb5\x2f\xfd", "zstd")
+)
+
+
+def split_compression_suffix(file_path):
+    """
+    拆分压缩扩展名
+
+    Returns:
+        tuple: (去掉压缩扩展名的路径, 压缩扩展名或 '')
+    """
+
+    for suffix in COMPRESSION_SUFFIXES:
+        if file_path.endswith(suffix):
+            return file_path[:-len(suffix)], suffix
+    return file_path, ""
+
+
+def detect_compression(file_path):
+    """
+    识别文件的压缩格式：优先看扩展名，否则读取文件头魔数
+
+    Returns:
+        str: "gzip" / "xz" / "zstd"，未压缩时返回 None
+    """
+
+    suffix = split_compression_suffix(file_path)[1]
+    if suffix:
+        return COMPRESSION_SUFFIXES[suffix]
+
+    with open(file_path, 'rb') as f:
+        head = f.read(6)
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+def _require_zstandard():
+    if zstandard is None:
+        raise RuntimeError("读写 .zst 文件需要安装 zstandard: pip install zstandard")
+
+
+def open_binary(file_path, buffer_size=READ_BUFFER_SIZE):
+    """
+    以二进制方式流式读取（自动解压），可逐行迭代
+
+    Args:
+        file_path: 文件路径
+        buffer_size: 读缓冲区大小
+
+    Returns:
+        io.BufferedReader: 解压后的字节流
+    """
+
+    compression = detect_compression(file_path)
+    if compression is None:
+        return open(file_path, 'rb', buffering=buffer_size)
+
+    if compression == "gzip":
+        raw = gzip.open(file_path, 'rb')
+    elif compression == "xz":
+        raw = lzma.open(file_path, 'rb')
+    else:
+        _require_zstandard()
+        raw = zstandard.ZstdDecompressor().stream_reader(open(file_path, 'rb'), read_size=buffer_size,
+                                                         closefd=True)
+    return io.BufferedReader(raw, buffer_size=buffer_size)
+
+
+def open_text(file_path, encoding='utf-8', buffer_size=READ_BUFFER_SIZE):
+    """以文本方式流式读取（自动解压）"""
+    return io.TextIOWrapper(open_binary(file_path, buffer_size), encoding=encoding)
+
+
+def open_output(file_path, encoding='utf-8'):
+    """
+    以文本方式写入，按扩展名决定是否压缩（.gz / .xz / .zst）
+
+    Returns:
+        文本文件对象
+    """
+
+    compression = COMPRESSION_SUFFIXES.get(split_compression_suffix(file_path)[1])
+    if compression is None:
+        return open(file_path, 'w', encoding=encoding)
+
+    if compression == "gzip":
+        return gzip.open(file_path, 'wt', encoding=encoding, compresslevel=6)
+    if compression == "xz":
+        return lzma.open(file_path, 'wt', encoding=encoding)
+
+    _require_zstandard()
+    writer = zstandard.ZstdCompressor(level=10).stream_writer(open(file_path, 'wb'), closefd=True)
+    return io.TextIOWrapper(writer, encoding=encoding)
+
+
+def find_existing_variant(file_path):
+    """返回 file_path 本身或其任一压缩版本（如 .jsonl.gz）中已存在的路径，都不存在时返回 None"""
+    base = split_compression_suffix(file_path)[0]
+    for candidate in [base] + [base + suffix for suffix in COMPRESSION_SUFFIXES]:
+        if os.path.exists(candidate):
+            return candidate
+    return None
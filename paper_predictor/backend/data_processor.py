@@ -7,21 +7,36 @@
 1. 将你的 example.json (或其他原始数据文件) 放在项目目录
 2. 运行: python data_processor.py example.json nips_history_data/ICLR_2024_formatted.jsonl
 3. 重启后端服务即可使用真实数据
+
+除格式化文件外，还会同时写出冷热分层数据（见 paper_store.py）：
+  - ICLR_2024_scores.jsonl: 只含评分和决策的热数据，服务端和训练优先读取
+  - ICLR_2024_text.blob / ICLR_2024_text.idx: 标题、摘要和评审对话，按 paper_id 随机读取
+已有的格式化文件可以用 --split 单独拆分
+数据目录中各年份的数据都处理好后，可以用 --dedup 检测跨年份重投的论文（见 dedup.py），
+生成的 resubmission_links.jsonl 由后端加载，用于区分重投论文的统计
+
+输入文件可以是 gzip / xz / zstd 压缩文件（如 example.jsonl.gz），自动识别并流式解压；
+输出文件名以 .gz / .xz / .zst 结尾时写出压缩的格式化文件
 """
 
 import json
 import os
 import sys
+from contextlib import nullcontext
 from pathlib import Path
+from review_decoder import extract_review_scores, load_skeleton
+from paper_store import TieredWriter, dataset_base, resolve_paper_id
+from compressed_io import COMPRESSION_SUFFIXES, open_binary, open_output, open_text, split_compression_suffix
 
 
-def process_review_data(raw_data_file, output_file):
+def process_review_data(raw_data_file, output_file, split_tiers=True):
     """
     处理真实评审数据
 
     Args:
-        raw_data_file: 原始数据文件路径 (如 example.json)
-        output_file: 输出文件路径 (如 ICLR_2024_formatted.jsonl)
+        raw_data_file: 原始数据文件路径 (如 example.json / example.jsonl.gz)
+        output_file: 输出文件路径 (如 ICLR_2024_formatted.jsonl，以 .gz/.xz/.zst 结尾时压缩输出)
+        split_tiers: 是否同时写出冷热分层数据
     """
 
     print(f"🔄 处理数据文件: {raw_data_file}")
@@ -35,9 +50,9 @@ def process_review_data(raw_data_file, output_file):
 
     try:
         # 判断输入文件格式
-        if raw_data_file.endswith('.jsonl'):
+        if split_compression_suffix(raw_data_file)[0].endswith('.jsonl'):
             # JSONL格式 - 每行一个JSON对象
-            with open(raw_data_file, 'r', encoding='utf-8') as infile:
+            with open_text(raw_data_file) as infile:
                 papers = []
                 for line in infile:
                     line = line.strip()
@@ -45,7 +60,7 @@ def process_review_data(raw_data_file, output_file):
                         papers.append(json.loads(line))
         else:
             # 单个JSON文件
-            with open(raw_data_file, 'r', encoding='utf-8') as infile:
+            with open_text(raw_data_file) as infile:
                 data = json.load(infile)
                 # 如果是单个论文对象，包装成列表
                 if isinstance(data, dict):
@@ -56,18 +71,27 @@ def process_review_data(raw_data_file, output_file):
         print(f"📊 发现 {len(papers)} 篇论文")
 
         # 处理每篇论文
-        with open(output_file, 'w', encoding='utf-8') as outfile:
+        tiers_context = TieredWriter(dataset_base(output_file)) if split_tiers else nullcontext()
+        # 分层数据在格式化文件关闭之后才替换，热数据的修改时间不早于格式化文件
+        with tiers_context as tiers, open_output(output_file) as outfile:
             for paper in papers:
                 processed_paper = process_single_paper(paper)
                 if processed_paper:
-                    outfile.write(json.dumps(processed_paper, ensure_ascii=False) + '\n')
                     valid_papers += 1
+                    # paper_id 与格式化文件中的行号一致（原始数据自带ID时使用原ID）
+                    processed_paper["paper_id"] = resolve_paper_id(processed_paper, valid_papers)
+                    outfile.write(json.dumps(processed_paper, ensure_ascii=False) + '\n')
+                    if tiers:
+                        tiers.write(processed_paper, processed_paper["paper_id"])
                 processed_count += 1
 
                 # 显示进度
                 if processed_count % 100 == 0:
                     print(f"⏳ 已处理 {processed_count}/{len(papers)} 篇论文...")
 
+        if tiers:
+            print(f"🗂️  冷热分层数据: {tiers.hot_path}, {tiers.blob_path}")
+
     except Exception as e:
         print(f"❌ 处理文件时出错: {e}")
         return False
@@ -137,6 +161,7 @@ def process_single_paper(paper_data):
 
         # 构建最终数据结构
         formatted_paper = {
+            "paper_id": str(paper_data.get('paper_id') or paper_data.get('id') or ''),
             "paper_title": paper_title,
             "paper_authors": paper_authors if isinstance(paper_authors, list) else [str(paper_authors)],
             "paper_abstract": paper_abstract,
@@ -155,6 +180,80 @@ def process_single_paper(paper_data):
         return None
 
 
+def split_formatted_file(formatted_file):
+    """
+    把已有的格式化文件拆分为冷热分层数据（如从 Google Drive 下载的文件）
+
+    Args:
+        formatted_file: <VENUE>_<YEAR>_formatted.jsonl 路径
+
+    Returns:
+        bool: 是否成功
+    """
+
+    print(f"🗂️  拆分冷热数据: {formatted_file}")
+
+    written = 0
+    try:
+        with TieredWriter(dataset_base(formatted_file)) as tiers, \
+                open_text(formatted_file) as infile:
+            for line_num, line in enumerate(infile, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    paper = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"⚠️  跳过第{line_num}行，JSON解析错误: {e}")
+                    continue
+
+                tiers.write(paper, resolve_paper_id(paper, line_num))
+                written += 1
+
+        hot_size = os.path.getsize(tiers.hot_path)
+        print(f"✅ 拆分完成: {written} 篇论文")
+        print(f"   - 热数据: {tiers.hot_path} ({hot_size / 1024 / 1024:.1f}MB)")
+        print(f"   - 冷数据: {tiers.blob_path} ({os.path.getsize(tiers.blob_path) / 1024 / 1024:.1f}MB)")
+        return True
+
+    except Exception as e:
+        print(f"❌ 拆分文件时出错: {e}")
+        return False
+
+
+def deduplicate_resubmissions(data_dir):
+    """
+    检测数据目录中跨年份重投的论文，写出重投链接表
+
+    Args:
+        data_dir: 历史数据目录
+
+    Returns:
+        bool: 是否成功
+    """
+
+    # 延迟导入：只有去重阶段需要 numpy
+    from dedup import find_resubmissions, write_resubmission_links
+
+    print(f"🔁 检测重投论文: {data_dir}")
+
+    try:
+        links, stats = find_resubmissions(data_dir)
+        path = write_resubmission_links(data_dir, links)
+
+        print(f"✅ 去重完成: {stats['papers']} 篇论文, {stats['candidates']} 个候选对, {stats['links']} 条重投链接")
+        print(f"   - 链接表: {path}")
+        for link in links[:5]:
+            print(f"   - {link['previous_venue']} {link['previous_year']} ({link['previous_decision']}) -> "
+                  f"{link['venue']} {link['year']} ({link['decision']}), 相似度 {link['similarity']:.2f}: "
+                  f"{link['title'][:60]}")
+        return True
+
+    except Exception as e:
+        print(f"❌ 检测重投论文时出错: {e}")
+        return False
+
+
 def analyze_processed_data(data_file):
     """
     分析处理后的数据质量
@@ -165,9 +264,10 @@ def analyze_processed_data(data_file):
 
     try:
         papers = []
-        with open(data_file, 'r', encoding='utf-8') as f:
+        with open_binary(data_file) as f:
             for line in f:
-                papers.append(json.loads(line.strip()))
+                if line.strip():
+                    papers.append(load_skeleton(line.strip()))
 
         if not papers:
             print("❌ 没有找到有效数据")
@@ -175,8 +275,9 @@ def analyze_processed_data(data_file):
 
         # 基本统计
         total_papers = len(papers)
-        accepted_papers = sum(1 for p in papers if 'accept' in p.get('paper_decision', '').lower())
-        rejected_papers = sum(1 for p in papers if 'reject' in p.get('paper_decision', '').lower())
+        records = [extract_review_scores(p) for p in papers]
+        accepted_papers = sum(1 for r in records if 'accept' in r.decision)
+        rejected_papers = sum(1 for r in records if 'reject' in r.decision)
         acceptance_rate = accepted_papers / total_papers if total_papers > 0 else 0
 
         print(f"📊 论文总数: {total_papers}")
@@ -188,29 +289,10 @@ def analyze_processed_data(data_file):
         all_confidences = []
         review_counts = []
 
-        for paper in papers:
-            reviews = paper.get('reviews', [])
-            review_counts.append(len(reviews))
-
-            for review in reviews:
-                rating = review.get('rating', '-1')
-                confidence = review.get('confidence', '-1')
-
-                if rating != '-1':
-                    try:
-                        score = float(rating)
-                        if 1 <= score <= 10:
-                            all_scores.append(score)
-                    except:
-                        pass
-
-                if confidence != '-1':
-                    try:
-                        conf = float(confidence)
-                        if 1 <= conf <= 5:
-                            all_confidences.append(conf)
-                    except:
-                        pass
+        for paper, record in zip(papers, records):
+            review_counts.append(len(paper.get('reviews', [])))
+            all_scores.extend(record.scores)
+            all_confidences.extend(record.confidences)
 
         print(f"\n📝 评审统计:")
         print(f"   - 平均评审数/论文: {sum(review_counts) / len(review_counts):.1f}")
@@ -253,8 +335,12 @@ def batch_process_files(input_dir, output_dir):
     # 创建输出目录
     output_path.mkdir(parents=True, exist_ok=True)
 
-    # 查找所有JSON/JSONL文件
-    json_files = list(input_path.glob("*.json")) + list(input_path.glob("*.jsonl"))
+    # 查找所有JSON/JSONL文件（包括压缩文件）
+    json_files = [
+        path for pattern in ("*.json", "*.jsonl")
+        for suffix in [""] + list(COMPRESSION_SUFFIXES)
+        for path in input_path.glob(pattern + suffix)
+    ]
 
     if not json_files:
         print(f"❌ 在 {input_dir} 中没有找到JSON文件")
@@ -264,7 +350,8 @@ def batch_process_files(input_dir, output_dir):
 
     for json_file in json_files:
         # 生成输出文件名
-        output_file = output_path / f"{json_file.stem}_formatted.jsonl"
+        stem = Path(split_compression_suffix(json_file.name)[0]).stem
+        output_file = output_path / f"{stem}_formatted.jsonl"
 
         print(f"\n{'=' * 60}")
         success = process_review_data(str(json_file), str(output_file))
@@ -284,10 +371,15 @@ def main():
         print("📖 使用方法:")
         print("   单文件: python data_processor.py <input_file> [output_file]")
         print("   批量处理: python data_processor.py --batch <input_dir> [output_dir]")
+        print("   冷热拆分: python data_processor.py --split <formatted_file> [...]")
+        print("   重投检测: python data_processor.py --dedup [data_dir]")
         print("")
         print("💡 示例:")
         print("   python data_processor.py example.json ICLR_2024_formatted.jsonl")
+        print("   python data_processor.py raw_iclr_2025.jsonl.gz ICLR_2025_formatted.jsonl.gz")
         print("   python data_processor.py --batch raw_data/ nips_history_data/")
+        print("   python data_processor.py --split nips_history_data/ICLR_2024_formatted.jsonl")
+        print("   python data_processor.py --dedup nips_history_data/")
         return
 
     if sys.argv[1] == "--batch":
@@ -301,6 +393,22 @@ def main():
 
         batch_process_files(input_dir, output_dir)
 
+    elif sys.argv[1] == "--split":
+        # 拆分已有格式化文件
+        if len(sys.argv) < 3:
+            print("❌ 冷热拆分需要指定格式化文件")
+            return
+
+        for formatted_file in sys.argv[2:]:
+            if not split_formatted_file(formatted_file):
+                print(f"❌ 拆分失败: {formatted_file}")
+
+    elif sys.argv[1] == "--dedup":
+        # 跨年份重投检测
+        data_dir = sys.argv[2] if len(sys.argv) > 2 else "nips_history_data"
+        if not deduplicate_resubmissions(data_dir):
+            print(f"❌ 重投检测失败: {data_dir}")
+
     else:
         # 单文件处理模式
         input_file = sys.argv[1]
@@ -314,7 +422,7 @@ def main():
             output_file = sys.argv[2]
         else:
             # 自动生成输出文件名
-            base_name = Path(input_file).stem
+            base_name = Path(split_compression_suffix(input_file)[0]).stem
             output_file = f"nips_history_data/{base_name}_formatted.jsonl"
 
         process_review_data(input_file, output_file)
@@ -3,128 +3,375 @@
 数据验证脚本
 检查ICLR数据文件是否格式正确，能被系统正确读取
 
-用法：python validate_data.py [数据文件路径]
+  - 流式统计：评分只保留计数、总和、最小 / 最大值和直方图，内存占用与文件大小无关
+  - 并行验证：未压缩的大文件按换行对齐切分为字节区间，在多个进程中并行验证后合并（压缩文件串行）
+  - 目录模式：一次验证目录下所有数据文件（含 .gz / .xz / .zst）
+  - JSON 报告：每种问题的数量和抽样行号，供数据接入流程自动判断
+
+用法：python data_validator.py <数据文件或目录> [--report 报告.json] [--workers N] [--samples N]
 """
 
-import json
 import sys
 import os
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from review_decoder import extract_review_scores, load_skeleton
+from compressed_io import detect_compression, open_binary
+from dataset_registry import DATASET_FILE_PATTERN
+from parallel_loader import PARALLEL_LOAD_MIN_BYTES, split_byte_ranges
+
+# 问题类型 -> 说明
+ISSUE_MESSAGES = {
+    "json_error": "JSON解析错误",
+    "missing_paper_title": "缺少必需字段: paper_title",
+    "missing_paper_decision": "缺少必需字段: paper_decision",
+    "missing_reviews": "缺少必需字段: reviews",
+    "invalid_reviews": "reviews字段格式错误或缺失",
+    "no_valid_scores": "没有有效的评审评分"
+}
+
+REQUIRED_FIELDS = ['paper_title', 'paper_decision', 'reviews']
+
+# 每种问题保留的抽样行号数
+DEFAULT_SAMPLES = 10
+
+# 并行验证时单个字节区间的最大大小（区间更小，工作进程的内存占用和负载都更均衡）
+MAX_CHUNK_BYTES = 64 * 1024 * 1024
+
+# 评分直方图：按整数分桶 0-10
+SCORE_BINS = 11
+
+
+class ValidationStats:
+    """可合并的流式验证统计"""
+
+    def __init__(self, samples=DEFAULT_SAMPLES):
+        self.samples = samples
+        self.total_lines = 0
+        self.valid_papers = 0
+        self.issue_papers = 0
+        self.accepted_papers = 0
+        # 问题类型 -> 数量 / 抽样行号（行号最小的若干个）
+        self.issue_counts = {}
+        self.issue_samples = {}
+
+        self.score_count = 0
+        self.score_sum = 0.0
+        self.score_min = None
+        self.score_max = None
+        self.score_histogram = [0] * SCORE_BINS
+
+    def add_issue(self, issue_type, line_num):
+        self.issue_counts[issue_type] = self.issue_counts.get(issue_type, 0) + 1
+        samples = self.issue_samples.setdefault(issue_type, [])
+        if len(samples) < self.samples:
+            samples.append(line_num)
+
+    def add_scores(self, scores):
+        for score in scores:
+            self.score_count += 1
+            self.score_sum += score
+            if self.score_min is None or score < self.score_min:
+                self.score_min = score
+            if self.score_max is None or score > self.score_max:
+                self.score_max = score
+            self.score_histogram[min(int(score), SCORE_BINS - 1)] += 1
+
+    def merge(self, other, line_offset=0):
+        """
+        合并另一个区间的统计（other 的行号加上 line_offset）
+
+        区间按文件顺序合并时，抽样行号仍是全文件中最靠前的若干个
+        """
+
+        self.total_lines += other.total_lines
+        self.valid_papers += other.valid_papers
+        self.issue_papers += other.issue_papers
+        self.accepted_papers += other.accepted_papers
+
+        for issue_type, count in other.issue_counts.items():
+            self.issue_counts[issue_type] = self.issue_counts.get(issue_type, 0) + count
+            samples = self.issue_samples.setdefault(issue_type, [])
+            remaining = self.samples - len(samples)
+            if remaining > 0:
+                samples.extend(line_num + line_offset for line_num in other.issue_samples[issue_type][:remaining])
+
+        self.score_count += other.score_count
+        self.score_sum += other.score_sum
+        if other.score_min is not None:
+            self.score_min = other.score_min if self.score_min is None else min(self.score_min, other.score_min)
+            self.score_max = other.score_max if self.score_max is None else max(self.score_max, other.score_max)
+        self.score_histogram = [a + b for a, b in zip(self.score_histogram, other.score_histogram)]
+        return self
+
+    @property
+    def is_valid(self):
+        return self.valid_papers > 0
+
+    def to_dict(self):
+        return {
+            "valid": self.is_valid,
+            "total_lines": self.total_lines,
+            "valid_papers": self.valid_papers,
+            "issue_papers": self.issue_papers,
+            "accepted_papers": self.accepted_papers,
+            "acceptance_rate": self.accepted_papers / self.valid_papers if self.valid_papers else None,
+            "issues": {
+                issue_type: {
+                    "message": ISSUE_MESSAGES.get(issue_type, issue_type),
+                    "count": count,
+                    "sample_lines": self.issue_samples[issue_type]
+                }
+                for issue_type, count in sorted(self.issue_counts.items())
+            },
+            "scores": {
+                "count": self.score_count,
+                "min": self.score_min,
+                "max": self.score_max,
+                "mean": self.score_sum / self.score_count if self.score_count else None,
+                "histogram": {str(i): count for i, count in enumerate(self.score_histogram) if count}
+            }
+        }
+
 
 def validate_paper(paper, line_num):
-    """验证单篇论文数据格式"""
+    """
+    验证单篇论文数据格式
+
+    Returns:
+        list: 问题类型（见 ISSUE_MESSAGES），没有问题时为空列表
+    """
     issues = []
-    
+
     # 检查必需字段
-    required_fields = ['paper_title', 'paper_decision', 'reviews']
-    for field in required_fields:
+    for field in REQUIRED_FIELDS:
         if field not in paper:
-            issues.append(f"缺少必需字段: {field}")
-    
+            issues.append(f"missing_{field}")
+
     # 检查评审数据
     if 'reviews' in paper and isinstance(paper['reviews'], list):
-        valid_reviews = 0
-        for i, review in enumerate(paper['reviews']):
-            if isinstance(review, dict):
-                rating = review.get('rating', '')
-                if rating and rating != '-1':
-                    try:
-                        score = float(rating)
-                        if 1 <= score <= 10:
-                            valid_reviews += 1
-                    except:
-                        pass
-        
+        valid_reviews = len(extract_review_scores(paper).scores)
+
         if valid_reviews == 0:
-            issues.append("没有有效的评审评分")
+            issues.append("no_valid_scores")
     else:
-        issues.append("reviews字段格式错误或缺失")
-    
+        issues.append("invalid_reviews")
+
     return issues
 
-def validate_jsonl_file(file_path):
-    """验证JSONL文件"""
+
+def validate_lines(lines, samples=DEFAULT_SAMPLES):
+    """
+    流式验证若干行（行号从 1 开始计）
+
+    Args:
+        lines: 可迭代的字节行
+        samples: 每种问题保留的抽样行号数
+
+    Returns:
+        ValidationStats
+    """
+
+    stats = ValidationStats(samples)
+    for line_num, line in enumerate(lines, 1):
+        stats.total_lines += 1
+        line = line.strip()
+
+        if not line:
+            continue
+
+        try:
+            paper = load_skeleton(line)
+        except ValueError:
+            stats.issue_papers += 1
+            stats.add_issue("json_error", line_num)
+            continue
+
+        if not isinstance(paper, dict):
+            stats.issue_papers += 1
+            stats.add_issue("json_error", line_num)
+            continue
+
+        issues = validate_paper(paper, line_num)
+        if issues:
+            stats.issue_papers += 1
+            for issue_type in issues:
+                stats.add_issue(issue_type, line_num)
+            continue
+
+        stats.valid_papers += 1
+        record = extract_review_scores(paper)
+        if 'accept' in record.decision:
+            stats.accepted_papers += 1
+        stats.add_scores(record.scores)
+
+    return stats
+
+
+def _iter_range_lines(f, end):
+    while f.tell() < end:
+        line = f.readline()
+        if not line:
+            break
+        yield line
+
+
+def _validate_range(file_path, start, end, samples):
+    """工作进程：流式验证 [start, end) 字节区间"""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        return validate_lines(_iter_range_lines(f, end), samples)
+
+
+def validate_file(file_path, workers=None, samples=DEFAULT_SAMPLES, executor=None):
+    """
+    验证单个数据文件
+
+    Args:
+        file_path: 数据文件路径
+        workers: 并行进程数（默认 CPU 核数，1 表示串行）
+        samples: 每种问题保留的抽样行号数
+        executor: 复用的进程池（目录模式下多个文件共用）
+
+    Returns:
+        ValidationStats
+    """
+
+    workers = workers or os.cpu_count() or 1
+    file_size = os.path.getsize(file_path)
+    use_parallel = (
+        workers > 1
+        and file_size >= PARALLEL_LOAD_MIN_BYTES
+        and detect_compression(file_path) is None
+    )
+
+    if not use_parallel:
+        with open_binary(file_path) as f:
+            return validate_lines(f, samples)
+
+    num_chunks = max(workers * 4, -(-file_size // MAX_CHUNK_BYTES))
+    ranges = split_byte_ranges(file_path, num_chunks)
+
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [executor.submit(_validate_range, file_path, start, end, samples) for start, end in ranges]
+
+        # 按区间顺序合并，区间内的行号加上之前所有区间的行数
+        stats = ValidationStats(samples)
+        for future in futures:
+            chunk = future.result()
+            stats.merge(chunk, line_offset=stats.total_lines)
+        return stats
+    finally:
+        if own_executor:
+            executor.shutdown()
+
+
+def find_data_files(directory):
+    """
+    目录下的格式化数据文件 <VENUE>_<YEAR>_formatted.jsonl（含压缩文件），按文件名排序
+
+    拆分出的热数据 *_scores.jsonl、重投链接表等其他 JSONL 文件格式不同，不参与验证
+    """
+    files = []
+    for file_name in os.listdir(directory):
+        match = DATASET_FILE_PATTERN.match(file_name)
+        if match and match.group("tier") == "formatted":
+            files.append(os.path.join(directory, file_name))
+    return sorted(files)
+
+
+def print_summary(stats):
+    """打印验证结果"""
+    print(f"\n📊 验证结果:")
+    print(f"  - 总行数: {stats.total_lines}")
+    print(f"  - 有效论文: {stats.valid_papers}")
+    print(f"  - 问题论文: {stats.issue_papers}")
+    print(f"  - 接受论文: {stats.accepted_papers}")
+    print(f"  - 接受率: {stats.accepted_papers/stats.valid_papers*100:.1f}%" if stats.valid_papers > 0 else "  - 接受率: 无法计算")
+
+    for issue_type, count in sorted(stats.issue_counts.items(), key=lambda item: item[1], reverse=True):
+        sample_lines = ", ".join(str(line_num) for line_num in stats.issue_samples[issue_type])
+        print(f"  ⚠️  {ISSUE_MESSAGES.get(issue_type, issue_type)}: {count} 行（例如第 {sample_lines} 行）")
+
+    if stats.score_count:
+        print(f"  - 有效评分数: {stats.score_count}")
+        print(f"  - 评分范围: {stats.score_min:.1f} - {stats.score_max:.1f}")
+        print(f"  - 平均评分: {stats.score_sum/stats.score_count:.2f}")
+        print(f"  - 评分分布: " + ", ".join(f"{i}分 {count}" for i, count in enumerate(stats.score_histogram) if count))
+
+
+def validate_jsonl_file(file_path, workers=None, samples=DEFAULT_SAMPLES, executor=None):
+    """
+    验证JSONL文件并打印结果
+
+    Returns:
+        ValidationStats: 文件不存在或验证出错时返回 None
+    """
     print(f"🔍 验证数据文件: {file_path}")
     print("=" * 50)
-    
+
     if not os.path.exists(file_path):
         print(f"❌ 文件不存在: {file_path}")
-        return False
-    
+        return None
+
     try:
-        valid_papers = 0
-        total_lines = 0
-        issues_count = 0
-        accepted_papers = 0
-        all_scores = []
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            for line_num, line in enumerate(f, 1):
-                total_lines += 1
-                line = line.strip()
-                
-                if not line:
-                    continue
-                
-                try:
-                    paper = json.loads(line)
-                    
-                    # 验证论文格式
-                    issues = validate_paper(paper, line_num)
-                    
-                    if not issues:
-                        valid_papers += 1
-                        
-                        # 统计接受情况
-                        decision = paper.get('paper_decision', '').lower()
-                        if 'accept' in decision:
-                            accepted_papers += 1
-                        
-                        # 收集评分
-                        for review in paper.get('reviews', []):
-                            rating = review.get('rating', '')
-                            if rating and rating != '-1':
-                                try:
-                                    score = float(rating)
-                                    if 1 <= score <= 10:
-                                        all_scores.append(score)
-                                except:
-                                    pass
-                    else:
-                        issues_count += 1
-                        if issues_count <= 5:  # 只显示前5个问题
-                            print(f"⚠️  第{line_num}行问题: {'; '.join(issues)}")
-                
-                except json.JSONDecodeError as e:
-                    issues_count += 1
-                    if issues_count <= 5:
-                        print(f"❌ 第{line_num}行JSON解析错误: {e}")
-        
-        print(f"\n📊 验证结果:")
-        print(f"  - 总行数: {total_lines}")
-        print(f"  - 有效论文: {valid_papers}")
-        print(f"  - 问题论文: {issues_count}")
-        print(f"  - 接受论文: {accepted_papers}")
-        print(f"  - 接受率: {accepted_papers/valid_papers*100:.1f}%" if valid_papers > 0 else "  - 接受率: 无法计算")
-        
-        if all_scores:
-            print(f"  - 有效评分数: {len(all_scores)}")
-            print(f"  - 评分范围: {min(all_scores):.1f} - {max(all_scores):.1f}")
-            print(f"  - 平均评分: {sum(all_scores)/len(all_scores):.2f}")
-        
-        if valid_papers > 0:
-            print(f"\n✅ 数据文件格式正确，可以被系统使用！")
-            
-            if valid_papers < 100:
-                print(f"⚠️  建议: 论文数量较少({valid_papers}篇)，ML模型效果可能有限")
-            
-            return True
-        else:
-            print(f"\n❌ 数据文件没有有效论文，无法使用")
-            return False
-            
+        start_time = time.time()
+        stats = validate_file(file_path, workers=workers, samples=samples, executor=executor)
+        elapsed = time.time() - start_time
     except Exception as e:
         print(f"❌ 验证过程出错: {e}")
-        return False
+        return None
+
+    print_summary(stats)
+    size_mb = os.path.getsize(file_path) / 1024 / 1024
+    print(f"  - 用时: {elapsed:.2f}s ({size_mb / elapsed if elapsed else 0:.1f} MB/s)")
+
+    if stats.is_valid:
+        print(f"\n✅ 数据文件格式正确，可以被系统使用！")
+
+        if stats.valid_papers < 100:
+            print(f"⚠️  建议: 论文数量较少({stats.valid_papers}篇)，ML模型效果可能有限")
+    else:
+        print(f"\n❌ 数据文件没有有效论文，无法使用")
+
+    return stats
+
+
+def build_report(results, elapsed):
+    """
+    生成 JSON 报告
+
+    Args:
+        results: {文件路径: ValidationStats 或 None}
+        elapsed: 总用时（秒）
+    """
+
+    totals = ValidationStats()
+    files = {}
+    for file_path, stats in results.items():
+        if stats is None:
+            files[file_path] = {"valid": False, "error": "文件不存在或验证出错"}
+            continue
+        # 合并后的抽样行号属于不同文件，只保留数量
+        totals.merge(stats)
+        files[file_path] = stats.to_dict()
+
+    total = totals.to_dict()
+    for issue in total["issues"].values():
+        issue.pop("sample_lines")
+    total["valid"] = bool(results) and all(stats is not None and stats.is_valid for stats in results.values())
+
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "elapsed_seconds": round(elapsed, 3),
+        "files": files,
+        "total": total
+    }
+
 
 def quick_fix_suggestions():
     """提供快速修复建议"""
@@ -137,22 +384,70 @@ def quick_fix_suggestions():
     print(f"  - confidence: 自信心(1-5的数字，可选)")
     print(f"\n💡 如果数据格式不正确，可以使用data_processor.py进行转换")
 
+
+def parse_args(argv):
+    """解析命令行参数：路径、--report、--workers、--samples"""
+    options = {"path": None, "report": None, "workers": None, "samples": DEFAULT_SAMPLES}
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg in ("--report", "--workers", "--samples"):
+            if not args:
+                raise ValueError(f"{arg} 缺少参数")
+            value = args.pop(0)
+            options[arg[2:]] = value if arg == "--report" else int(value)
+        elif options["path"] is None:
+            options["path"] = arg
+        else:
+            raise ValueError(f"无法识别的参数: {arg}")
+    if options["path"] is None:
+        raise ValueError("缺少数据文件或目录")
+    return options
+
+
 def main():
     if len(sys.argv) < 2:
         print("📖 使用方法:")
-        print("  python validate_data.py <数据文件路径>")
+        print("  python data_validator.py <数据文件或目录> [--report 报告.json] [--workers N] [--samples N]")
         print("\n💡 示例:")
-        print("  python validate_data.py nips_history_data/ICLR_2024_formatted.jsonl")
-        print("  python validate_data.py example.json")
+        print("  python data_validator.py nips_history_data/ICLR_2024_formatted.jsonl")
+        print("  python data_validator.py nips_history_data/ --report validation_report.json")
         return
-    
-    file_path = sys.argv[1]
-    
+
+    try:
+        options = parse_args(sys.argv[1:])
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(2)
+
+    path = options["path"]
+    workers = options["workers"] or os.cpu_count() or 1
+
     print("🎯 ICLR数据验证工具")
     print("=" * 50)
-    
-    is_valid = validate_jsonl_file(file_path)
-    
+
+    start_time = time.time()
+    if os.path.isdir(path):
+        file_paths = find_data_files(path)
+        print(f"📁 目录 {path} 中找到 {len(file_paths)} 个数据文件")
+    else:
+        file_paths = [path]
+
+    # 目录模式下所有文件共用一个进程池
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for file_path in file_paths:
+            results[file_path] = validate_jsonl_file(file_path, workers=workers,
+                                                     samples=options["samples"], executor=executor)
+            print()
+
+    report = build_report(results, time.time() - start_time)
+    if options["report"]:
+        with open(options["report"], 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 验证报告已保存: {options['report']}")
+
+    is_valid = report["total"]["valid"]
     if not is_valid:
         quick_fix_suggestions()
         sys.exit(1)
@@ -163,4 +458,4 @@ def main():
         print(f"3. 检查管理界面的历史数据状态")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
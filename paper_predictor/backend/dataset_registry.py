@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+多会议、多年份历史数据注册表
+自动发现 <VENUE>_<YEAR>_formatted.jsonl 文件（可压缩为 .gz/.xz/.zst；拆分出的热数据 <VENUE>_<YEAR>_scores.jsonl 存在时优先使用），
+按 (会议, 年份) 懒加载排名与统计索引，并在超出内存预算时按最近最少使用(LRU)顺序淘汰未固定的数据集
+
+使用方法（在 main.py 中）：
+    registry = DatasetRegistry("nips_history_data", loader=load_year_data, sizer=estimate_year_data_bytes)
+    registry.discover()
+    year_data = registry.get("ICLR", "2024")
+"""
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+# 历史数据文件命名规则，例如 ICLR_2024_formatted.jsonl / NeurIPS_2023_scores.jsonl / ICLR_2025_formatted.jsonl.gz
+DATASET_FILE_PATTERN = re.compile(
+    r"^(?P<venue>[A-Za-z][A-Za-z0-9-]*)_(?P<year>\d{4})_(?P<tier>formatted|scores)\.jsonl(?:\.gz|\.xz|\.zst)?$")
+
+
+def normalize_venue(venue):
+    """会议名统一为大写作为键（NeurIPS / neurips / NEURIPS 视为同一会议）"""
+    return str(venue or "").strip().upper()
+
+
+def _file_signature(file_path):
+    """数据文件的 (路径, 修改时间)，文件不存在时返回 None"""
+    try:
+        return file_path, os.path.getmtime(file_path)
+    except OSError:
+        return None
+
+
+class DatasetRegistry:
+    """按 (会议, 年份) 管理历史数据集"""
+
+    def __init__(self, data_dir, loader, sizer=None, memory_budget_bytes=None, on_change=None):
+        """
+        Args:
+            data_dir: 历史数据目录
+            loader: 加载函数 loader(file_path, year) -> 数据集字典或 None
+            sizer: 估算数据集内存占用的函数 sizer(entry) -> 字节数
+            memory_budget_bytes: 内存预算，None 表示不限制
+            on_change: 数据集加载、淘汰或重新发现后的回调（如让响应缓存失效）
+        """
+
+        self.data_dir = data_dir
+        self.loader = loader
+        self.sizer = sizer or (lambda entry: 0)
+        self.memory_budget_bytes = memory_budget_bytes
+        self.on_change = on_change
+
+        # 会议键 -> {"name": 展示名, "years": {年份: 文件路径}}
+        self.catalog = {}
+        # (会议键, 年份) -> 数据集，按最近使用顺序排列
+        self._loaded = OrderedDict()
+        self._sizes = {}
+        # (会议键, 年份) -> 加载时数据文件的 (路径, 修改时间)，重新发现时据此判断数据集是否过期
+        self._sources = {}
+        self._pinned = set()
+        self._failed = {}
+
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+        self.stats = {"loads": 0, "hits": 0, "misses": 0, "evictions": 0, "load_seconds": 0.0}
+
+    def discover(self):
+        """扫描数据目录，登记所有符合命名规则的数据文件"""
+        catalog = {}
+        # (会议键, 年份) -> {"formatted": 路径, "scores": 路径}
+        tiers = {}
+        if os.path.isdir(self.data_dir):
+            for file_name in sorted(os.listdir(self.data_dir)):
+                match = DATASET_FILE_PATTERN.match(file_name)
+                if not match:
+                    continue
+
+                venue_key = normalize_venue(match.group("venue"))
+                catalog.setdefault(venue_key, {"name": match.group("venue"), "years": {}})
+                files = tiers.setdefault((venue_key, match.group("year")), {})
+                files.setdefault(match.group("tier"), os.path.join(self.data_dir, file_name))
+
+        # 同一年份同时有格式化文件和热数据时，热数据不比格式化文件旧才读取更小的热数据
+        # （格式化文件重新下载后，旧的热数据不再代表它）
+        for (venue_key, year), files in tiers.items():
+            formatted, scores = files.get("formatted"), files.get("scores")
+            if scores is not None and (formatted is None or
+                                       os.path.getmtime(scores) >= os.path.getmtime(formatted)):
+                catalog[venue_key]["years"][year] = scores
+            else:
+                catalog[venue_key]["years"][year] = formatted
+
+        with self._lock:
+            self.catalog = catalog
+            self._failed.clear()
+
+            # 数据文件已删除、被替换为另一层级或内容更新的数据集不再使用，下次访问时重新加载
+            for key in list(self._loaded.keys()):
+                venue_info = catalog.get(key[0])
+                file_path = venue_info["years"].get(key[1]) if venue_info else None
+                if file_path is None or self._sources.get(key) != _file_signature(file_path):
+                    self._drop(key)
+
+        self._notify_change()
+        return self.available()
+
+    def available(self):
+        """已发现的数据集: {会议名: [年份...]}"""
+        return {
+            venue["name"]: sorted(venue["years"].keys())
+            for venue in self.catalog.values()
+        }
+
+    def has(self, venue, year):
+        venue_info = self.catalog.get(normalize_venue(venue))
+        return venue_info is not None and str(year) in venue_info["years"]
+
+    def path(self, venue, year):
+        """(会议, 年份) 对应的数据文件路径，未发现时返回 None"""
+        venue_info = self.catalog.get(normalize_venue(venue))
+        return venue_info["years"].get(str(year)) if venue_info else None
+
+    def years(self, venue):
+        """某会议已发现的年份"""
+        venue_info = self.catalog.get(normalize_venue(venue))
+        return sorted(venue_info["years"].keys()) if venue_info else []
+
+    def get(self, venue, year, pin=False):
+        """
+        获取 (会议, 年份) 的数据集，首次访问时加载
+
+        Args:
+            venue: 会议名
+            year: 年份
+            pin: 是否固定在内存中（不参与淘汰）
+
+        Returns:
+            dict: 数据集，文件不存在或加载失败时返回 None
+        """
+
+        key = (normalize_venue(venue), str(year))
+
+        with self._lock:
+            entry = self._loaded.get(key)
+            if entry is not None:
+                self._loaded.move_to_end(key)
+                self.stats["hits"] += 1
+                if pin:
+                    self._pinned.add(key)
+                return entry
+
+            venue_info = self.catalog.get(key[0])
+            file_path = venue_info["years"].get(key[1]) if venue_info else None
+            if file_path is None or key in self._failed:
+                return None
+
+            self.stats["misses"] += 1
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同一数据集只加载一次，其他请求等待加载完成
+        with key_lock:
+            with self._lock:
+                entry = self._loaded.get(key)
+                if entry is not None:
+                    if pin:
+                        self._pinned.add(key)
+                    return entry
+
+            start_time = time.time()
+            source = _file_signature(file_path)
+            entry = self.loader(file_path, key[1])
+            load_seconds = time.time() - start_time
+
+            with self._lock:
+                self.stats["loads"] += 1
+                self.stats["load_seconds"] += load_seconds
+
+                if entry is None:
+                    self._failed[key] = file_path
+                    return None
+
+                self._loaded[key] = entry
+                self._sizes[key] = self.sizer(entry)
+                self._sources[key] = source
+                if pin:
+                    self._pinned.add(key)
+                self._evict_over_budget(keep=key)
+
+        print(f"📦 已加载数据集 {venue_info['name']} {key[1]} "
+              f"({self._sizes.get(key, 0) / 1024 / 1024:.1f}MB, 用时 {load_seconds:.2f}s)")
+        self._notify_change()
+        return entry
+
+    def _notify_change(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def _evict_over_budget(self, keep):
+        """超出内存预算时淘汰最久未使用的未固定数据集（调用方持有锁）"""
+        if self.memory_budget_bytes is None:
+            return
+
+        for key in list(self._loaded.keys()):
+            if self.memory_bytes() <= self.memory_budget_bytes:
+                break
+            if key == keep or key in self._pinned:
+                continue
+
+            self._drop(key)
+            self.stats["evictions"] += 1
+            print(f"♻️  内存预算不足，淘汰数据集 {key[0]} {key[1]}")
+
+    def _drop(self, key):
+        """移除一个已加载的数据集（调用方持有锁）"""
+        del self._loaded[key]
+        self._sizes.pop(key, None)
+        self._sources.pop(key, None)
+        self._pinned.discard(key)
+
+    def memory_bytes(self):
+        """已加载数据集的估算内存占用"""
+        return sum(self._sizes.values())
+
+    def loaded(self):
+        """已加载的数据集 [(会议名, 年份, 数据集)]，按最近使用顺序"""
+        with self._lock:
+            items = list(self._loaded.items())
+        return [(self.catalog[venue]["name"], year, entry) for (venue, year), entry in items]
+
+    def status(self):
+        """注册表状态，用于 /data-status 展示"""
+        with self._lock:
+            loaded = [
+                {
+                    "venue": self.catalog[venue]["name"],
+                    "year": year,
+                    "memory_mb": round(self._sizes.get((venue, year), 0) / 1024 / 1024, 2),
+                    "pinned": (venue, year) in self._pinned
+                }
+                for venue, year in self._loaded.keys()
+            ]
+            failed = [f"{venue} {year}" for venue, year in self._failed.keys()]
+
+        return {
+            "available": self.available(),
+            "loaded": loaded,
+            "failed": failed,
+            "memory_mb": round(self.memory_bytes() / 1024 / 1024, 2),
+            "memory_budget_mb": round(self.memory_budget_bytes / 1024 / 1024, 2) if self.memory_budget_bytes else None,
+            "stats": dict(self.stats)
+        }
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+跨年份重投论文检测（MinHash + LSH）
+被拒的论文经常换个年份（或换个会议）再投，标题和摘要基本不变，历史统计中会被算成两篇互不相关的论文。
+本模块找出这些重投，输出重投链接表 resubmission_links.jsonl（数据目录下）：
+  1. 标题 + 摘要分词后取连续 SHINGLE_SIZE 个词作为 shingle，哈希成 32 位整数
+  2. MinHash：NUM_PERM 个随机线性哈希下 shingle 哈希的最小值组成签名，
+     两篇论文签名相同位置相等的比例是两者 shingle 集合 Jaccard 相似度的无偏估计
+  3. LSH：签名分成 BANDS 段，每段 ROWS 个值，任意一段完全相同的论文进入同一个桶成为候选对，
+     每篇论文只和同桶的论文比较（近似线性），相似度约 (1/BANDS)^(1/ROWS) 以上的论文对大概率成为候选
+  4. 候选对按签名估计的 Jaccard 相似度 >= THRESHOLD 确认，只保留较晚年份 -> 较早年份的链接，
+     每篇较晚的论文只链接到最相似的一篇较早论文
+
+使用方法：
+    python data_processor.py --dedup nips_history_data
+    links = load_resubmission_links("nips_history_data")
+"""
+
+import json
+import os
+import zlib
+
+import numpy as np
+
+from dataset_registry import DATASET_FILE_PATTERN, DatasetRegistry, normalize_venue
+from search_index import iter_documents, tokenize
+
+
+LINKS_FILE = "resubmission_links.jsonl"
+
+SHINGLE_SIZE = 3
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+THRESHOLD = 0.5
+
+# 2^61 - 1（梅森素数），线性哈希 (a * x + b) mod P 取低 32 位
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_EMPTY_SIGNATURE = np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+
+
+def links_path(data_dir):
+    return os.path.join(data_dir, LINKS_FILE)
+
+
+def dataset_of(file_path):
+    """数据文件对应的 (会议名, 年份)，不符合命名规则时返回 None"""
+    match = DATASET_FILE_PATTERN.match(os.path.basename(file_path))
+    return (match.group("venue"), match.group("year")) if match else None
+
+
+def shingle_hashes(paper):
+    """标题 + 摘要的 shingle 哈希（去重后的 uint64 数组）"""
+    tokens = tokenize(paper.get("paper_title")) + tokenize(paper.get("paper_abstract"))
+    if len(tokens) < SHINGLE_SIZE:
+        shingles = [" ".join(tokens)] if tokens else []
+    else:
+        shingles = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)]
+    return np.unique(np.fromiter((zlib.crc32(shingle.encode('utf-8')) for shingle in shingles),
+                                 dtype=np.uint64, count=len(shingles)))
+
+
+class MinHasher:
+    """固定随机种子的 MinHash（不同进程、不同次运行得到相同签名）"""
+
+    def __init__(self, num_perm=NUM_PERM, seed=1):
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, int(_MERSENNE_PRIME), size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes):
+        """shingle 哈希数组 -> 长度 NUM_PERM 的签名（一次矩阵运算）"""
+        if not len(hashes):
+            return _EMPTY_SIGNATURE.copy()
+        with np.errstate(over='ignore'):
+            permuted = (np.outer(hashes, self.a) + self.b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def candidate_pairs(signatures, bands=BANDS, rows=ROWS):
+    """
+    LSH 分桶，返回至少有一段签名相同的论文对
+
+    Args:
+        signatures: 形状 (论文数, bands * rows) 的签名矩阵
+
+    Returns:
+        set: {(i, j)}，i < j
+    """
+
+    pairs = set()
+    for band in range(bands):
+        buckets = {}
+        band_values = np.ascontiguousarray(signatures[:, band * rows:(band + 1) * rows])
+        for i, row in enumerate(band_values):
+            buckets.setdefault(row.tobytes(), []).append(i)
+
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+    return pairs
+
+
+def find_resubmissions(data_dir, threshold=THRESHOLD):
+    """
+    检测数据目录中所有数据集之间的重投论文
+
+    Args:
+        data_dir: 历史数据目录
+        threshold: 估计 Jaccard 相似度的下限
+
+    Returns:
+        tuple: (链接列表, 统计信息)
+    """
+
+    registry = DatasetRegistry(data_dir, loader=None)
+    available = registry.discover()
+
+    hasher = MinHasher()
+    papers = []
+    signatures = []
+    for venue, years in available.items():
+        for year in years:
+            count = 0
+            for paper in iter_documents(registry.path(venue, year)):
+                hashes = shingle_hashes(paper)
+                if not len(hashes):
+                    continue
+                papers.append({
+                    "venue": venue,
+                    "year": year,
+                    "paper_id": str(paper.get("paper_id")),
+                    "decision": paper.get("paper_decision") or "",
+                    "title": paper.get("paper_title") or ""
+                })
+                signatures.append(hasher.signature(hashes))
+                count += 1
+            print(f"  🔏 {venue} {year}: {count} 篇论文已计算签名")
+
+    if not papers:
+        return [], {"papers": 0, "candidates": 0, "links": 0}
+
+    signatures = np.vstack(signatures)
+    pairs = candidate_pairs(signatures)
+
+    # 候选对确认：只保留不同年份之间的论文对，较晚的论文链接到最相似的较早论文
+    best = {}
+    for i, j in pairs:
+        if papers[i]["year"] == papers[j]["year"]:
+            continue
+        similarity = float(np.mean(signatures[i] == signatures[j]))
+        if similarity < threshold:
+            continue
+        earlier, later = (i, j) if papers[i]["year"] < papers[j]["year"] else (j, i)
+        if later not in best or similarity > best[later][1]:
+            best[later] = (earlier, similarity)
+
+    links = []
+    for later, (earlier, similarity) in sorted(best.items()):
+        links.append({
+            "venue": papers[later]["venue"],
+            "year": papers[later]["year"],
+            "paper_id": papers[later]["paper_id"],
+            "decision": papers[later]["decision"],
+            "previous_venue": papers[earlier]["venue"],
+            "previous_year": papers[earlier]["year"],
+            "previous_paper_id": papers[earlier]["paper_id"],
+            "previous_decision": papers[earlier]["decision"],
+            "similarity": round(similarity, 4),
+            "title": papers[later]["title"]
+        })
+
+    return links, {"papers": len(papers), "candidates": len(pairs), "links": len(links)}
+
+
+def write_resubmission_links(data_dir, links):
+    """写出链接表（先写临时文件再替换）"""
+    path = links_path(data_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for link in links:
+            f.write(json.dumps(link, ensure_ascii=False) + '\n')
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_resubmission_links(data_dir):
+    """读取链接表，不存在时返回空列表"""
+    path = links_path(data_dir)
+    if not os.path.exists(path):
+        return []
+
+    links = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    links.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return links
+
+
+def summarize_resubmissions(links, venue, year, papers):
+    """
+    单个数据集的重投统计（区分重投论文和首次投稿，历史接受率不再把同一工作算成两篇独立论文）
+
+    Args:
+        links: 链接表
+        venue: 会议名
+        year: 年份
+        papers: 该数据集的 ScoreColumns
+
+    Returns:
+        dict: resubmissions / first_submissions / resubmitted_later，没有相关链接时返回 None
+    """
+
+    venue, year = normalize_venue(venue), str(year)
+    resubmitted = set()
+    resubmitted_later = set()
+    for link in links:
+        if normalize_venue(link["venue"]) == venue and str(link["year"]) == year:
+            resubmitted.add(str(link["paper_id"]))
+        if normalize_venue(link["previous_venue"]) == venue and str(link["previous_year"]) == year:
+            resubmitted_later.add(str(link["previous_paper_id"]))
+
+    if not resubmitted and not resubmitted_later:
+        return None
+
+    paper_ids = papers.paper_id_list()
+    accepted = papers.accepted_mask
+    resubmission_mask = np.fromiter((paper_id in resubmitted for paper_id in paper_ids), dtype=bool,
+                                    count=len(paper_ids))
+    later_mask = np.fromiter((paper_id in resubmitted_later for paper_id in paper_ids), dtype=bool,
+                             count=len(paper_ids))
+
+    def group(mask):
+        count = int(mask.sum())
+        accepted_count = int((accepted & mask).sum())
+        return {
+            "count": count,
+            "accepted": accepted_count,
+            "acceptance_rate": round(accepted_count / count, 4) if count else None
+        }
+
+    return {
+        "resubmissions": group(resubmission_mask),
+        "first_submissions": group(~resubmission_mask),
+        "resubmitted_later": group(later_mask)
+    }
+
+
+def pooled_unique_stats(links, year_datas):
+    """
+    多个数据集合并后的去重统计：同一工作的多次投稿只算一次（以最后一次投稿的决策为准）
+
+    Args:
+        links: 链接表
+        year_datas: {(会议名, 年份): 数据集}
+
+    Returns:
+        dict: submissions / unique_works / accepted_works / acceptance_rate / linked_submissions
+    """
+
+    loaded = {(normalize_venue(venue), str(year)) for venue, year in year_datas}
+    submissions = sum(data["total_count"] for data in year_datas.values())
+    accepted = sum(data["accepted_count"] for data in year_datas.values())
+
+    # 两端都已加载的链接：较早的那次投稿并入较晚的投稿。
+    # 同一篇较早的论文可能被多篇较晚的论文链接（如被拆成两篇重投），只能并入一次
+    merged = {}
+    for link in links:
+        if (normalize_venue(link["venue"]), str(link["year"])) not in loaded:
+            continue
+        previous = (normalize_venue(link["previous_venue"]), str(link["previous_year"]), str(link["previous_paper_id"]))
+        if previous[:2] in loaded:
+            merged.setdefault(previous, link)
+    merged_accepted = sum(1 for link in merged.values() if 'accept' in str(link["previous_decision"]).lower())
+
+    unique_works = submissions - len(merged)
+    accepted_works = accepted - merged_accepted
+    return {
+        "submissions": submissions,
+        "unique_works": unique_works,
+        "accepted_works": accepted_works,
+        "acceptance_rate": round(accepted_works / unique_works, 4) if unique_works else None,
+        "linked_submissions": len(merged)
+    }
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+高性能 JSON 响应
+安装了 orjson 时直接序列化为 bytes，NumPy 标量和数组（OPT_SERIALIZE_NUMPY）原生转换，
+不经过 jsonable_encoder 的逐字段转换；未安装时回退到标准库 json，并把 NumPy 类型转换为 Python 类型
+
+使用方法（在 main.py 中）：
+    app = FastAPI(default_response_class=FastJSONResponse)
+
+    # 热点接口直接返回响应对象，跳过 response_model 的二次校验和编码
+    return FastJSONResponse({"status": "success"})
+"""
+
+import json
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    JSON_BACKEND = "orjson"
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+except ImportError:
+    orjson = None
+    JSON_BACKEND = "json"
+
+
+def _default(value):
+    """标准库 json 的回退转换：NumPy 标量用 item()，数组用 tolist()（不导入 numpy）"""
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content):
+    """
+    序列化为紧凑的 UTF-8 JSON 字节（与 FastAPI 默认 JSONResponse 的格式一致）
+
+    Returns:
+        bytes
+    """
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # orjson 不支持的类型（如非连续的 NumPy 数组）走标准库回退
+            pass
+
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+        default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 dumps() 渲染的 JSONResponse"""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def benchmark_serialization(payloads, iterations=2000):
+    """
+    对比 FastAPI 默认路径（response_model 校验 + jsonable_encoder + json.dumps）与 FastJSONResponse
+
+    Args:
+        payloads: {名称: (内容, 响应模型类或 None)}
+        iterations: 每种方式的重复次数
+
+    Returns:
+        dict: 每个负载两种方式的 微秒/响应 和响应字节数
+    """
+
+    import time
+    from fastapi.encoders import jsonable_encoder
+
+    results = {}
+    for name, (content, model) in payloads.items():
+        def default_path():
+            body = model(**content) if model is not None else content
+            return JSONResponse(jsonable_encoder(body)).body
+
+        def fast_path():
+            return FastJSONResponse(content).body
+
+        row = {}
+        for label, render in (("fastapi_default", default_path), ("fast_json", fast_path)):
+            try:
+                body = render()
+            except (TypeError, ValueError) as e:
+                row[label] = {"error": str(e)}
+                continue
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                render()
+            elapsed = time.perf_counter() - start
+            row[label] = {"us_per_response": round(elapsed / iterations * 1e6, 2), "bytes": len(body)}
+
+        results[name] = row
+
+    results["backend"] = JSON_BACKEND
+    return results
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+ML推理服务
+在一个小型进程池中常驻加载好的集成模型（PaperAcceptancePredictor），
+并把并发到达的 /predict 请求合并为微批次，避免在事件循环上逐个调用 predict_proba
+
+使用方法（在 main.py 中）：
+    service = InferenceService(models_dir="models")
+    await service.start()
+    result = await service.predict(scores, confidences)
+    await service.stop()
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+
+# 工作进程内常驻的预测器（每个进程加载一次）
+_worker_predictor = None
+
+
+def _init_worker(models_dir):
+    """工作进程初始化：加载预训练模型"""
+    global _worker_predictor
+
+    # 延迟导入，主进程不需要加载 sklearn / pandas
+    from ml_predictor import PaperAcceptancePredictor
+
+    predictor = PaperAcceptancePredictor(models_dir=models_dir)
+    if not predictor.load_models():
+        raise RuntimeError(f"无法从 {models_dir} 加载模型")
+    _worker_predictor = predictor
+
+
+def _worker_ping():
+    """预热用：确认工作进程已完成模型加载"""
+    return os.getpid()
+
+
+def _worker_predict_batch(profiles):
+    """在工作进程中执行一个微批次的推理（无效的论文对应 None，不影响同批次的其他论文）"""
+    results = _worker_predictor.predict_batch(profiles)
+
+    # 只返回可廉价序列化的字段，特征字典留在工作进程中
+    return [
+        {
+            'ensemble_probability': float(r['ensemble_probability']),
+            'individual_predictions': r['individual_predictions'],
+            'confidence_level': r['confidence_level']
+        } if r is not None else None
+        for r in results
+    ]
+
+
+class InferenceService:
+    """基于进程池和动态微批次的推理服务"""
+
+    def __init__(self, models_dir="models", num_workers=2, max_batch_size=32,
+                 max_wait_us=2000, max_queue_size=1024):
+        self.models_dir = models_dir
+        self.num_workers = num_workers
+        self.max_batch_size = max_batch_size
+        self.max_wait_us = max_wait_us
+        self.max_queue_size = max_queue_size
+
+        self._executor = None
+        self._queue = None
+        self._batcher_task = None
+        self._inflight = None
+        self._pending_batches = set()
+
+        # 运行指标
+        self._stats = {
+            "requests": 0,
+            "rejected": 0,
+            "failed": 0,
+            "batches": 0,
+            "batch_size_sum": 0,
+            "max_batch_size_seen": 0,
+            "wait_us_sum": 0.0,
+            "max_wait_us_seen": 0.0,
+            "inference_ms_sum": 0.0,
+            "max_inference_ms_seen": 0.0,
+            "batch_size_histogram": {}
+        }
+
+    @staticmethod
+    def models_available(models_dir="models"):
+        """检查是否存在 ml_predictor 保存的集成模型"""
+        return os.path.exists(os.path.join(models_dir, "model_info.json"))
+
+    @classmethod
+    def from_env(cls, models_dir="models"):
+        """根据环境变量创建推理服务"""
+        return cls(
+            models_dir=models_dir,
+            num_workers=int(os.environ.get("INFERENCE_WORKERS", 2)),
+            max_batch_size=int(os.environ.get("INFERENCE_MAX_BATCH", 32)),
+            max_wait_us=int(os.environ.get("INFERENCE_MAX_WAIT_US", 2000)),
+            max_queue_size=int(os.environ.get("INFERENCE_MAX_QUEUE", 1024))
+        )
+
+    @property
+    def running(self):
+        return self._batcher_task is not None and not self._batcher_task.done()
+
+    async def start(self):
+        """启动工作进程并预热模型"""
+        if self.running:
+            return
+
+        # 在运行中的事件循环里启动（已有线程池），不 fork 当前进程
+        from parallel_loader import pool_context
+
+        loop = asyncio.get_running_loop()
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=pool_context(),
+            initializer=_init_worker,
+            initargs=(self.models_dir,)
+        )
+
+        # 预热：确保所有工作进程都已加载模型，首个请求不承担加载开销
+        await asyncio.gather(*[
+            loop.run_in_executor(self._executor, _worker_ping)
+            for _ in range(self.num_workers)
+        ])
+
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._inflight = asyncio.Semaphore(self.num_workers)
+        self._batcher_task = asyncio.create_task(self._batch_loop())
+
+        print(f"✅ 推理服务已启动: {self.num_workers} 个工作进程, "
+              f"最大批次 {self.max_batch_size}, 最长等待 {self.max_wait_us}μs")
+
+    async def stop(self):
+        """停止推理服务，未完成的请求返回错误"""
+        if self._batcher_task is not None:
+            self._batcher_task.cancel()
+            try:
+                await self._batcher_task
+            except asyncio.CancelledError:
+                pass
+            self._batcher_task = None
+
+        if self._pending_batches:
+            await asyncio.gather(*self._pending_batches, return_exceptions=True)
+
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, _, future = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError("推理服务已停止"))
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+        print("🛑 推理服务已停止")
+
+    async def predict(self, scores, confidences=None):
+        """
+        提交一次预测请求，等待所在微批次完成后返回结果
+
+        Args:
+            scores: 评分列表
+            confidences: 自信心列表（可选）
+
+        Returns:
+            dict: ensemble_probability / individual_predictions / confidence_level
+        """
+
+        if not self.running:
+            raise RuntimeError("推理服务未启动")
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait(((list(scores), list(confidences or [])), time.perf_counter(), future))
+        except asyncio.QueueFull:
+            self._stats["rejected"] += 1
+            raise RuntimeError("推理队列已满")
+
+        self._stats["requests"] += 1
+        return await future
+
+    async def _batch_loop(self):
+        """从队列收集请求组成微批次：达到最大批次或等待超时即发出"""
+        loop = asyncio.get_running_loop()
+        max_wait = self.max_wait_us / 1_000_000
+
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + max_wait
+
+            try:
+                while len(batch) < self.max_batch_size:
+                    # 队列里已有的请求直接取走，不额外等待
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+
+                # 最多 num_workers 个批次同时在途，其余请求继续在队列中合并
+                await self._inflight.acquire()
+
+            except asyncio.CancelledError:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("推理服务已停止"))
+                raise
+
+            task = asyncio.create_task(self._run_batch(batch))
+            self._pending_batches.add(task)
+            task.add_done_callback(self._pending_batches.discard)
+
+    async def _run_batch(self, batch):
+        """把一个微批次交给工作进程，并把结果分发回各个请求"""
+        loop = asyncio.get_running_loop()
+        dispatched_at = time.perf_counter()
+
+        try:
+            profiles = [profile for profile, _, _ in batch]
+            results = await loop.run_in_executor(self._executor, _worker_predict_batch, profiles)
+
+            for (profile, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if result is None:
+                    # 只有特征无效的请求失败，同批次的其他请求照常返回
+                    self._stats["failed"] += 1
+                    future.set_exception(ValueError(f"无法为评分 {profile[0]} 构造有效特征"))
+                else:
+                    future.set_result(result)
+
+        except Exception as e:
+            self._stats["failed"] += len(batch)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+        finally:
+            self._inflight.release()
+            self._record_batch(batch, dispatched_at)
+
+    def _record_batch(self, batch, dispatched_at):
+        """记录批次大小、排队等待时间和推理耗时"""
+        stats = self._stats
+        size = len(batch)
+        inference_ms = (time.perf_counter() - dispatched_at) * 1000
+        waits_us = [(dispatched_at - enqueued_at) * 1_000_000 for _, enqueued_at, _ in batch]
+
+        stats["batches"] += 1
+        stats["batch_size_sum"] += size
+        stats["max_batch_size_seen"] = max(stats["max_batch_size_seen"], size)
+        stats["wait_us_sum"] += sum(waits_us)
+        stats["max_wait_us_seen"] = max(stats["max_wait_us_seen"], max(waits_us))
+        stats["inference_ms_sum"] += inference_ms
+        stats["max_inference_ms_seen"] = max(stats["max_inference_ms_seen"], inference_ms)
+        stats["batch_size_histogram"][size] = stats["batch_size_histogram"].get(size, 0) + 1
+
+    def metrics(self):
+        """返回队列深度、批次大小和等待时间等指标"""
+        stats = self._stats
+        batches = stats["batches"]
+        served = stats["batch_size_sum"]
+
+        return {
+            "running": self.running,
+            "workers": self.num_workers,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_us": self.max_wait_us,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "inflight_batches": len(self._pending_batches),
+            "requests": stats["requests"],
+            "rejected": stats["rejected"],
+            "failed": stats["failed"],
+            "batches": batches,
+            "avg_batch_size": served / batches if batches else 0,
+            "max_batch_size_seen": stats["max_batch_size_seen"],
+            "avg_wait_us": stats["wait_us_sum"] / served if served else 0,
+            "max_wait_us_seen": stats["max_wait_us_seen"],
+            "avg_inference_ms": stats["inference_ms_sum"] / batches if batches else 0,
+            "max_inference_ms_seen": stats["max_inference_ms_seen"],
+            "batch_size_histogram": {str(k): v for k, v in sorted(stats["batch_size_histogram"].items())}
+        }
@@ -1,23 +1,41 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request, BackgroundTasks, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
-import uvicorn
 import os
-import shutil
 import json
 import uuid
 import time
-import numpy as np
 from datetime import datetime
-import random
-import requests
+import threading
+import hmac
+try:
+    import fcntl
+except ImportError:
+    # Windows 上没有 fcntl，单进程运行时不需要文件锁
+    fcntl = None
+from inference_service import InferenceService
+from acceptance_index import AcceptanceIndex
+from dataset_registry import DatasetRegistry, normalize_venue
+from paper_store import PaperTextStore, hot_tier_is_current
+from data_processor import split_formatted_file
+from compressed_io import find_existing_variant
+from parallel_loader import read_review_records, shutdown_pool
+from concurrent.futures import ThreadPoolExecutor
+from response_cache import ResponseCache
+from fast_json import FastJSONResponse, dumps as dumps_json
+from static_assets import BodySizeLimitMiddleware, ImmutableStaticFiles, UploadTooLarge, generate_variants, store_upload
+from order_index import OrderIndex, DEFAULT_PAGE_SIZE
+from rule_engine import rule_probability
+from prediction_log import PredictionLog, ERROR_METHOD
+from admission_control import AdmissionController, AdmissionControlMiddleware, RateLimitRule
 
 app = FastAPI(
     title="论文接受率预测API",
     description="基于规则算法的论文接受率预测系统",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse
 )
 
 # 创建目录
@@ -25,6 +43,37 @@ os.makedirs("uploads/qr_codes", exist_ok=True)
 os.makedirs("data", exist_ok=True)
 os.makedirs("nips_history_data", exist_ok=True)  # 历史数据目录
 
+# 准入控制：按IP/订单号限流，并限制 /predict、/check-payment 的全局并发
+# （在CORS之前添加，CORS位于外层，被拒绝的响应同样带CORS头）
+admission_controller = AdmissionController(
+    rules=[
+        RateLimitRule("predict", "/predict", key="ip", methods=["POST"],
+                      rate=float(os.environ.get("PREDICT_RATE_PER_SEC", 2)),
+                      burst=int(os.environ.get("PREDICT_BURST", 10))),
+        RateLimitRule("check_payment_order", "/check-payment/", key="path",
+                      rate=float(os.environ.get("CHECK_PAYMENT_RATE_PER_SEC", 1)),
+                      burst=int(os.environ.get("CHECK_PAYMENT_BURST", 5))),
+        RateLimitRule("check_payment_ip", "/check-payment/", key="ip",
+                      rate=float(os.environ.get("CHECK_PAYMENT_IP_RATE_PER_SEC", 5)),
+                      burst=int(os.environ.get("CHECK_PAYMENT_IP_BURST", 20)))
+    ],
+    max_concurrency=int(os.environ.get("ADMISSION_MAX_CONCURRENCY", 32)),
+    max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", 64)),
+    target_queue_delay_ms=float(os.environ.get("ADMISSION_TARGET_QUEUE_MS", 200)),
+    # 只有部署在会追加 X-Forwarded-For 的已知代理后面时才设置 ADMISSION_TRUST_FORWARDED=1
+    trust_forwarded=os.environ.get("ADMISSION_TRUST_FORWARDED", "0") == "1"
+)
+app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+
+# 二维码上传目录和大小上限
+QR_CODES_DIR = "uploads/qr_codes"
+MAX_QR_UPLOAD_BYTES = int(float(os.environ.get("MAX_QR_UPLOAD_MB", 2)) * 1024 * 1024)
+# multipart 表单边界和字段头的余量
+MULTIPART_OVERHEAD_BYTES = 16 * 1024
+
+# 上传的请求体在读取时即限制字节数（分块传输的请求没有 Content-Length，也不能绕过上限）
+app.add_middleware(BodySizeLimitMiddleware, limits={"/upload-qr": MAX_QR_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES})
+
 # 修复1：更灵活的CORS配置 - 支持部署环境
 app.add_middleware(
     CORSMiddleware,
@@ -40,12 +89,17 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 静态文件服务
-app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
+# 静态文件服务（内容寻址的二维码长期缓存，支持时返回 WebP / 预压缩变体）
+app.mount("/uploads", ImmutableStaticFiles(directory="uploads"), name="uploads")
 
 # 全局设置存储
 SETTINGS_FILE = "data/settings.json"
 PAYMENTS_FILE = "data/payments.json"
+# 多个工作进程读-合并-写 payments.json 时互斥
+PAYMENTS_LOCK_FILE = "data/.payments.lock"
+
+# 订单的终态：进入终态后不再改变
+TERMINAL_PAYMENT_STATUSES = ("success", "failed", "expired")
 
 # 默认设置
 DEFAULT_SETTINGS = {
@@ -59,15 +113,36 @@ DEFAULT_SETTINGS = {
     "payment_wait_time": 60  # 新增：支付等待时间
 }
 
+# 最近一次读取或写入 settings.json 时的修改时间，其他工作进程修改设置后据此重新加载
+settings_mtime = 0
+
 # 支付订单存储
 payments = {}
 
+# 订单的二级索引（按创建时间、状态、订单号），每次订单变化时增量更新
+order_index = OrderIndex()
+# 最近一次读取或写入 payments.json 时的修改时间，管理接口据此发现其他工作进程写入的订单
+payments_mtime = 0
+
+# 管理接口的令牌（请求须带 X-Admin-Token 头；未设置时管理接口一律拒绝访问）
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+
 # 预测统计
 prediction_stats = {
     "total_predictions": 0,
     "avg_prediction_time": 0
 }
 
+# 预测事件日志（环形缓冲区 + 后台写入列式分段和小时 / 天聚合）
+prediction_log = PredictionLog.from_env()
+
+# 只读接口的预编码响应缓存（设置保存、数据加载时失效）
+response_cache = ResponseCache(encoder=dumps_json)
+
+# ML推理服务（存在预训练集成模型时在启动时创建）
+ML_MODELS_DIR = "models"
+inference_service = None
+
 # Google Drive下载链接
 ICLR_2024_URL = "https://drive.google.com/uc?export=download&id=1CVsi7YU6rNcrhNqPMrGOWsxqHpsmysH4&confirm=t"
 ICLR_2025_URL = "https://drive.google.com/uc?export=download&id=1NXYIG-UIQUnur24fe36fqaobl722pCr_&confirm=t"
@@ -88,9 +163,14 @@ def download_data_from_google_drive():
     print("🌐 检查历史数据文件...")
 
     for file_path, download_url in files_to_download.items():
-        if not os.path.exists(file_path):
+        # 已放置压缩版本（如 ICLR_2024_formatted.jsonl.gz）时同样跳过下载
+        existing_path = find_existing_variant(file_path)
+        if existing_path is None:
             print(f"📥 下载 {file_path}...")
             try:
+                # 只有需要下载时才导入 requests
+                import requests
+
                 headers = {
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
                 }
@@ -109,88 +189,183 @@ def download_data_from_google_drive():
             except Exception as e:
                 print(f"❌ {file_path} 下载失败: {e}")
         else:
-            print(f"✅ {file_path} 已存在，跳过下载")
+            print(f"✅ {existing_path} 已存在，跳过下载")
+            file_path = existing_path
 
+        # 拆分出热数据后，加载时不再解析标题、摘要和评审对话（格式化文件比热数据新时重新拆分）
+        if os.path.exists(file_path) and not hot_tier_is_current(file_path):
+            split_formatted_file(file_path)
 
-# 全局历史数据缓存
+
+# 全局历史数据缓存（默认会议的各年份数据，常驻内存）
 historical_data = {}
 
+# 经验接受率索引的最小样本数，低于该值时回退到更粗的键或规则算法
+EMPIRICAL_MIN_SUPPORT = int(os.environ.get("EMPIRICAL_MIN_SUPPORT", 30))
+
+# 历史数据目录与默认会议（启动时下载并预加载的数据）
+HISTORY_DATA_DIR = "nips_history_data"
+DEFAULT_VENUE = "ICLR"
+
+# 懒加载数据集的内存预算（MB），超出后淘汰最久未使用的非默认会议数据
+DATASET_MEMORY_BUDGET_MB = float(os.environ.get("DATASET_MEMORY_BUDGET_MB", 1024))
+
+
+def load_year_data(file_path, year):
+    """
+    读取单个历史数据文件，构建排名列表和统计索引
+
+    Args:
+        file_path: <VENUE>_<YEAR>_scores.jsonl（热数据）或 <VENUE>_<YEAR>_formatted.jsonl(.gz/.xz/.zst) 文件路径
+        year: 年份
+
+    Returns:
+        dict: 该年份的数据集，没有有效数据或加载失败时返回 None
+    """
+
+    try:
+        print(f"📖 读取文件: {file_path}")
+
+        # 只解码评分、自信心和决策，不保留 dialogue 等大段文本；
+        # 启动时的批量加载中大文件在进程池中分块并行解析，请求期间的懒加载串行解析（不在运行中的服务里创建进程池）
+        records, bad_lines = read_review_records(file_path, parallel=not _initialized)
+        for line_num, error in bad_lines:
+            print(f"⚠️  跳过第{line_num}行，JSON解析错误: {error}")
+
+        if not records:
+            print(f"❌ {file_path} 没有有效数据")
+            return None
+
+        # 列式存储：平均分、评分、决策各一列连续数组（只包含有评分的论文）
+        from score_columns import ScoreColumns
+        papers = ScoreColumns.from_records(records)
+
+        # 相似论文检索索引（按评分组合分桶）
+        from similarity_index import SimilarityIndex
+        similarity_index = SimilarityIndex.from_columns(papers)
+
+        # /predict 的 bootstrap 置信区间（按评分组合缓存，数据集重新加载时随之丢弃）
+        from uncertainty import IntervalEstimator
+        interval_estimator = IntervalEstimator(papers, similarity_index)
+
+        # 平均分经验累积分布表（跨年份百分位校准）
+        from calibration import CalibrationTable
+        calibration = CalibrationTable.from_columns(papers)
+
+        # 经验接受率索引
+        acceptance_index = AcceptanceIndex(min_support=EMPIRICAL_MIN_SUPPORT)
+        for record in records:
+            if record.scores:
+                acceptance_index.add(record.scores, 'accept' in record.decision)
+
+        year_data = {
+            "papers": papers,
+            "total_count": len(papers),
+            "accepted_count": papers.accepted_count,
+            "acceptance_rate": papers.accepted_count / len(papers) if len(papers) else 0,
+            "acceptance_index": acceptance_index,
+            "similarity_index": similarity_index,
+            "interval_estimator": interval_estimator,
+            "calibration": calibration,
+            # 平均分分布、分桶接受率和累积百分位曲线（/distribution 直接使用）
+            "distribution": papers.distribution()
+        }
+
+        # 重投统计：重投论文与首次投稿分开统计接受率
+        if resubmission_links:
+            from dedup import dataset_of, summarize_resubmissions
+            dataset = dataset_of(file_path)
+            if dataset is not None:
+                year_data["resubmissions"] = summarize_resubmissions(resubmission_links, *dataset, papers)
+
+        print(
+            f"✅ {year} 年数据: {len(papers)} 篇有效论文, 接受 {papers.accepted_count} 篇, 接受率 {year_data['acceptance_rate']:.2%}")
+        return year_data
+
+    except Exception as e:
+        print(f"❌ 加载 {year} 年数据失败: {e}")
+        return None
+
+
+def year_data_memory(year_data):
+    """单个数据集各部分的内存占用（字节）"""
+    memory = year_data["papers"].memory_breakdown()
+    memory["acceptance_index"] = year_data["acceptance_index"].memory_bytes()
+    memory["similarity_index"] = year_data["similarity_index"].memory_bytes()
+    memory["calibration"] = year_data["calibration"].memory_bytes()
+    memory["total"] += memory["acceptance_index"] + memory["similarity_index"] + memory["calibration"]
+    return memory
+
+
+def estimate_year_data_bytes(year_data):
+    """估算单个数据集的内存占用（列式评分数据及索引）"""
+    return year_data_memory(year_data)["total"]
+
+
+# 数据集注册表：发现所有会议/年份，默认会议固定在内存，其他会议按需加载
+dataset_registry = DatasetRegistry(
+    HISTORY_DATA_DIR,
+    loader=load_year_data,
+    sizer=estimate_year_data_bytes,
+    memory_budget_bytes=int(DATASET_MEMORY_BUDGET_MB * 1024 * 1024),
+    on_change=lambda: invalidate_dataset_responses()
+)
+
+
+# 冷数据（标题、摘要、评审对话）按 (会议, 年份) 懒打开，只读取偏移索引
+paper_text_stores = {}
+
+# 关键词检索的倒排索引按 (会议, 年份) 首次检索时加载（不存在时构建并保存在数据文件旁）
+search_indexes = {}
+_search_index_lock = threading.Lock()
+
+# 跨年份重投链接表（python data_processor.py --dedup 生成），加载数据时读取
+resubmission_links = []
+
+# 多年份合并的平均分分布表：会议 -> (参与合并的各年份表, 合并后的表)，数据集变化时清空
+calibration_pools = {}
+
 
 def load_historical_data():
-    """加载历史评审数据"""
+    """发现历史数据文件，并预加载默认会议的各年份数据"""
     global historical_data
     print("📊 开始加载历史数据...")
     print("🔍 当前工作目录:", os.getcwd())
-    print("🔍 检查文件存在:")
-    for year, file_path in [("2024", ICLR_2024_FILE), ("2025", ICLR_2025_FILE)]:
-        exists = os.path.exists(file_path)
-        if exists:
-            size = os.path.getsize(file_path)
-            print(f"  ✅ {file_path}: {size/1024/1024:.1f}MB")
-        else:
-            print(f"  ❌ {file_path}: 不存在")
-
-    for year, file_path in [("2024", ICLR_2024_FILE), ("2025", ICLR_2025_FILE)]:
-        if os.path.exists(file_path):
-            try:
-                papers = []
-                print(f"📖 读取文件: {file_path}")
-
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    for line_num, line in enumerate(f, 1):
-                        line = line.strip()
-                        if line:
-                            try:
-                                paper = json.loads(line)
-                                papers.append(paper)
-                            except json.JSONDecodeError as e:
-                                print(f"⚠️  跳过第{line_num}行，JSON解析错误: {e}")
-                                continue
-
-                if not papers:
-                    print(f"❌ {file_path} 没有有效数据")
-                    continue
-
-                # 计算每篇论文的平均分并分类
-                all_papers_with_avg = []
-                accepted_papers_with_avg = []
-
-                for paper in papers:
-                    scores = extract_paper_scores(paper)
-                    if scores:  # 只处理有评分的论文
-                        avg_score = np.mean(scores)
-                        paper_with_avg = {
-                            'avg_score': avg_score,
-                            'scores': scores,
-                            'decision': paper.get('paper_decision', '').lower()
-                        }
-                        all_papers_with_avg.append(paper_with_avg)
-
-                        # 判断是否被接受
-                        decision = paper.get('paper_decision', '').lower()
-                        if 'accept' in decision:
-                            accepted_papers_with_avg.append(paper_with_avg)
-
-                # 按平均分降序排序
-                all_papers_with_avg.sort(key=lambda x: x['avg_score'], reverse=True)
-                accepted_papers_with_avg.sort(key=lambda x: x['avg_score'], reverse=True)
-
-                historical_data[year] = {
-                    "all_papers": all_papers_with_avg,
-                    "accepted_papers": accepted_papers_with_avg,
-                    "total_count": len(all_papers_with_avg),
-                    "accepted_count": len(accepted_papers_with_avg),
-                    "acceptance_rate": len(accepted_papers_with_avg) / len(
-                        all_papers_with_avg) if all_papers_with_avg else 0
-                }
 
-                print(
-                    f"✅ {year} 年数据: {len(all_papers_with_avg)} 篇有效论文, 接受 {len(accepted_papers_with_avg)} 篇, 接受率 {historical_data[year]['acceptance_rate']:.2%}")
-
-            except Exception as e:
-                print(f"❌ 加载 {year} 年数据失败: {e}")
-        else:
-            print(f"⚠️  未找到 {year} 年数据文件: {file_path}")
+    available = dataset_registry.discover()
+    print("🔍 发现数据集:")
+    if not available:
+        print(f"  ❌ {HISTORY_DATA_DIR} 中没有 <VENUE>_<YEAR>_formatted.jsonl 文件")
+    for venue, years in available.items():
+        for year in years:
+            file_path = dataset_registry.catalog[normalize_venue(venue)]["years"][year]
+            print(f"  ✅ {venue} {year}: {file_path} ({os.path.getsize(file_path)/1024/1024:.1f}MB)")
+
+    # 重投链接表需要在加载各年份数据之前读取（加载时据此统计重投论文）
+    from dedup import load_resubmission_links
+    resubmission_links[:] = load_resubmission_links(HISTORY_DATA_DIR)
+    if resubmission_links:
+        print(f"🔁 已读取 {len(resubmission_links)} 条重投链接")
+
+    # 重新发现后数据文件可能变化，冷数据存储重新打开
+    for store in paper_text_stores.values():
+        if store is not None:
+            store.close()
+    paper_text_stores.clear()
+    search_indexes.clear()
+
+    # 各年份并发加载，共用同一个解析进程池
+    historical_data.clear()
+    years = dataset_registry.years(DEFAULT_VENUE)
+    with ThreadPoolExecutor(max_workers=max(1, len(years))) as executor:
+        loaded = list(executor.map(lambda year: dataset_registry.get(DEFAULT_VENUE, year, pin=True), years))
+    shutdown_pool()
+
+    for year, year_data in zip(years, loaded):
+        if year_data is not None:
+            historical_data[year] = year_data
+
+    invalidate_dataset_responses()
 
     if not historical_data:
         print("❌ 没有加载到任何历史数据，将使用默认算法")
@@ -198,27 +373,110 @@ def load_historical_data():
         print(f"🎉 成功加载 {len(historical_data)} 年的历史数据")
 
 
-def extract_paper_scores(paper):
-    """从论文数据中提取评分信息"""
-    scores = []
-    if 'reviews' in paper and paper['reviews']:
-        for review in paper['reviews']:
-            rating = review.get('rating', '')
-            rating = rating.split(':')[0]
-            # 解析评分
-            if rating and rating != '-1':
-                try:
-                    score = float(rating)
-                    if 1 <= score <= 10:
-                        scores.append(score)
-                except:
-                    pass
-    return scores
-
-
-def calculate_paper_ranking_basic(target_scores, target_confidences, year="2025"):
+def invalidate_dataset_responses():
+    """数据集加载或淘汰后，使依赖历史数据的缓存响应失效"""
+    response_cache.invalidate("data-status")
+    response_cache.invalidate_prefix("distribution:")
+    calibration_pools.clear()
+
+
+def get_paper_text_store(conference, year):
+    """获取某会议某年份的冷数据存储，没有拆分出冷数据时返回 None"""
+    file_path = dataset_registry.path(conference, year)
+    if file_path is None:
+        # 只缓存数据目录中存在的数据集，任意的 (会议, 年份) 不会占用缓存
+        return None
+
+    key = (normalize_venue(conference), str(year))
+    if key not in paper_text_stores:
+        paper_text_stores[key] = PaperTextStore.open_for(file_path)
+    return paper_text_stores[key]
+
+
+def get_search_index(conference, year):
+    """获取某会议某年份的检索索引，没有论文文本数据时返回 None"""
+    file_path = dataset_registry.path(conference, year)
+    if file_path is None:
+        return None
+
+    key = (normalize_venue(conference), str(year))
+    if key not in search_indexes:
+        with _search_index_lock:
+            if key not in search_indexes:
+                from search_index import SearchIndex
+
+                search_indexes[key] = SearchIndex.open_for(file_path)
+    return search_indexes[key]
+
+
+def resolve_reference_year(conference, year=None):
+    """
+    查询接口使用的历史数据年份：指定年份时直接使用；
+    否则与预测相同取设置年份的前一年，该年份没有数据时使用最近一年
+    """
+    if year:
+        return str(year)
+    year = str(int(current_settings.get("year", "2025")) - 1)
+    years = dataset_registry.years(conference)
+    if year not in years and years:
+        year = max(years)
+    return year
+
+
+def get_year_data(conference, year):
+    """
+    获取某会议某年份的数据集（其他会议首次访问时懒加载）
+
+    请求的会议没有该年份数据时返回 None（不会用默认会议的数据代替）
+    """
+
+    year = str(year)
+    if conference and normalize_venue(conference) != normalize_venue(DEFAULT_VENUE):
+        return dataset_registry.get(conference, year)
+    return historical_data.get(year)
+
+
+def is_known_venue(conference):
+    """会议是默认会议或数据目录中有该会议的数据"""
+    venue = normalize_venue(conference)
+    return venue == normalize_venue(DEFAULT_VENUE) or venue in dataset_registry.catalog
+
+
+def loaded_year_data(conference):
+    """某会议已加载的各年份数据 {年份: 数据集}（不触发加载）"""
+    venue = normalize_venue(conference or DEFAULT_VENUE)
+    loaded = {year: data for name, year, data in dataset_registry.loaded() if normalize_venue(name) == venue}
+    return dict(sorted(loaded.items()))
+
+
+def get_pooled_calibration(conference, year_datas):
+    """
+    多个年份合并后的平均分分布表（相同年份组合只合并一次）
+
+    Args:
+        conference: 会议名
+        year_datas: {年份: 数据集}
+
+    Returns:
+        CalibrationTable
+    """
+
+    from calibration import CalibrationTable
+
+    tables = tuple(data["calibration"] for data in year_datas.values())
+    key = normalize_venue(conference or DEFAULT_VENUE)
+    cached = calibration_pools.get(key)
+    if cached is not None and len(cached[0]) == len(tables) and all(a is b for a, b in zip(cached[0], tables)):
+        return cached[1]
+
+    pooled = CalibrationTable.pooled(tables)
+    calibration_pools[key] = (tables, pooled)
+    return pooled
+
+
+def calculate_paper_ranking_basic(target_scores, target_confidences, year="2025", conference=DEFAULT_VENUE):
     """基于规则的论文接受率预测"""
-    print(f"🔍 收到预测请求 - 评分: {target_scores}, 自信心: {target_confidences}, 年份: {year}")
+    print(f"🔍 收到预测请求 - 评分: {target_scores}, 自信心: {target_confidences}, 会议: {conference}, 年份: {year}")
 
     if not target_scores:
         print("❌ 没有评分数据")
@@ -232,104 +490,64 @@ def calculate_paper_ranking_basic(target_scores, target_confidences, year="2025"
         }
 
     # 计算用户论文的基本统计
-    user_avg_score = np.mean(target_scores)
+    user_avg_score = sum(target_scores) / len(target_scores)
     positive_scores = sum(1 for score in target_scores if score > 4)
     negative_scores = sum(1 for score in target_scores if score < 3)
 
     print(f"📊 用户论文统计 - 平均分: {user_avg_score:.2f}, 正分数: {positive_scores}, 负分数: {negative_scores}")
 
-    # 规则判断概率
-    final_probability = 0.5  # 默认概率
-
-    # 规则1: 全是正分（>=4）
-    if positive_scores == len(target_scores):
-        final_probability = random.uniform(0.97, 0.99)
-        print(f"✅ 规则3命中: 全是正分, 概率: {final_probability:.3f}")
-
-     # 规则2: 全是负分（<3）
-    elif negative_scores == len(target_scores):
-        final_probability = random.uniform(0.0, 0.01)
-        print(f"❌ 规则4命中: 全是负分, 概率: {final_probability:.3f}")
-
-    # 规则3: 三个或更多负分
-    elif negative_scores >= 3:
-        final_probability = random.uniform(0.00, 0.01)
-        print(f"❌ 规则6命中: {negative_scores}个负分, 概率: {final_probability:.3f}")
-
-    # 规则4: 有两个负分
-    elif negative_scores == 2:
-        final_probability = random.uniform(0.02, 0.04)
-        print(f"⚠️  规则8命中: 2个负分, 概率: {final_probability:.3f}")
-
-    # 规则5: 负分个数 > 正分个数
-    elif negative_scores > positive_scores:
-        final_probability = random.uniform(0.02, 0.05)
-        print(f"❌ 规则5命中: 负分({negative_scores}) > 正分({positive_scores}), 概率: {final_probability:.3f}")
-
-    #规则5：正分个数 > 负分个数
-    elif positive_scores > negative_scores:
-        final_probability = random.uniform(0.80, 0.90)
-        print(f"❌ 规则5命中: 正分({positive_scores}) > 负分({negative_scores}),概率: {final_probability:.3f}")
-
-    # 规则6: 均值 <= 3
-    elif user_avg_score <= 3:
-        final_probability = random.uniform(0.00, 0.02)
-        print(f"❌ 规则2命中: 均值{user_avg_score:.2f} <= 4, 概率: {final_probability:.3f}")
-
-    # 规则7: 均值 > 3.75
-    elif user_avg_score >= 3.75:
-        final_probability = random.uniform(0.85, 0.88)
-        print(f"✅ 规则1命中: 均值{user_avg_score:.2f} > 6, 概率: {final_probability:.3f}")
-
-    # 规则8: 分数只有3和4
-    elif all(score in [3, 4] for score in target_scores):
-        final_probability = random.uniform(0.35, 0.40)
-        print(f"✅ 规则9命中: 全是5,6分, 概率: {final_probability:.3f}")
-
-
-    # 默认情况：基于均值线性插值
-    else:
-        if user_avg_score >= 3:
-            final_probability = (user_avg_score - 3) / (5- 3) * (0.75 - 0.25) + 0.25
-        else:
-            final_probability = 0.25
-        print(f"📐 默认线性插值: 均值{user_avg_score:.2f}, 概率: {final_probability:.3f}")
+    # 规则判断概率（规则见 rule_engine.py）
+    final_probability, _ = rule_probability(target_scores, verbose=True)
 
     # 修复2：确保从正确的历史数据计算排名
     prev_year = str(int(year) - 1)  # 预测年份的前一年作为参考数据
+    prev_year_data = get_year_data(conference, prev_year)
+    prediction_method = "rule_threshold_with_historical_ranking"
+
+    # 有足够历史样本时，用经验接受率替换规则概率
+    if prev_year_data is not None and prev_year_data.get("acceptance_index"):
+        empirical = prev_year_data["acceptance_index"].lookup(target_scores)
+        if empirical and empirical["total"] >= EMPIRICAL_MIN_SUPPORT:
+            final_probability = empirical["probability"]
+            prediction_method = "empirical_index_with_historical_ranking"
+            print(f"📚 经验接受率命中 ({empirical['level']}): "
+                  f"{empirical['accepted']}/{empirical['total']}, 概率: {final_probability:.3f}")
+        else:
+            print("ℹ️  经验接受率样本不足，保留规则概率")
 
-    if prev_year in historical_data and historical_data[prev_year]["all_papers"]:
-        print(f"📈 使用 {prev_year} 年历史数据计算排名")
-
-        all_papers = historical_data[prev_year]["all_papers"]
-        accepted_papers = historical_data[prev_year]["accepted_papers"]
+    # 参考年份缺失（或没有论文）时改用已加载年份的合并分布；所有年份都没有论文时合并分布为空
+    pooled = None
+    if (prev_year_data is None or not prev_year_data["total_count"]) and loaded_year_data(conference):
+        pooled = get_pooled_calibration(conference, loaded_year_data(conference))
 
-        # 计算在所有论文中的排名：比用户均分高的论文数量 + 1
-        rank_in_all = 1
-        for paper in all_papers:
-            if paper['avg_score'] > user_avg_score:
-                rank_in_all += 1
-            else:
-                break  # 因为已经按降序排序，可以提前退出
+    if prev_year_data is not None and prev_year_data["total_count"]:
+        print(f"📈 使用 {prev_year} 年历史数据计算排名")
 
-        # 计算在接受论文中的排名
-        rank_in_accepted = 1
-        for paper in accepted_papers:
-            if paper['avg_score'] > user_avg_score:
-                rank_in_accepted += 1
-            else:
-                break
+        # 排名：比用户均分高的论文数量 + 1（平均分升序数组上二分查找）
+        papers = prev_year_data["papers"]
+        rank_in_all, rank_in_accepted = papers.rank_of(user_avg_score)
 
-        total_papers = len(all_papers)
-        accepted_papers_count = len(accepted_papers)
+        total_papers = len(papers)
+        accepted_papers_count = papers.accepted_count
 
         print(f"🏆 排名计算完成:")
         print(f"  - 在所有论文中: 第 {rank_in_all} 名 / 共 {total_papers} 篇")
         print(f"  - 在接受论文中: 第 {rank_in_accepted} 名 / 共 {accepted_papers_count} 篇")
         print(f"  - 用户平均分 {user_avg_score:.2f} 在历史数据中的位置")
 
+    elif pooled is not None and pooled.total:
+        # 参考年份缺失：在已加载的所有年份合并后的分布中排名
+        year_datas = loaded_year_data(conference)
+        rank_in_all, rank_in_accepted = pooled.rank_of(user_avg_score)
+        total_papers = pooled.total
+        accepted_papers_count = pooled.accepted
+        prediction_method = prediction_method.replace("historical_ranking", "pooled_ranking")
+
+        print(f"⚠️  未找到 {prev_year} 年历史数据，使用 {', '.join(year_datas)} 年合并分布计算排名")
+        print(f"  - 在所有论文中: 第 {rank_in_all} 名 / 共 {total_papers} 篇（百分位 {pooled.percentile(user_avg_score):.2%}）")
+
     else:
-        print(f"⚠️  未找到 {prev_year} 年历史数据，使用默认排名")
+        print(f"⚠️  没有任何历史数据，使用默认排名")
         # 使用默认值
         total_papers = 12000
         accepted_papers_count = 3000
@@ -343,7 +561,7 @@ def calculate_paper_ranking_basic(target_scores, target_confidences, year="2025"
         "rank_in_accepted": rank_in_accepted,
         "total_papers": total_papers,
         "accepted_papers": accepted_papers_count,
-        "prediction_method": "rule_threshold_with_historical_ranking"
+        "prediction_method": prediction_method
     }
 
     print(f"🎯 最终结果: {result}")
@@ -352,20 +570,40 @@ def calculate_paper_ranking_basic(target_scores, target_confidences, year="2025"
 
 def load_settings():
     """加载设置"""
+    global settings_mtime
     try:
         if os.path.exists(SETTINGS_FILE):
+            mtime = os.path.getmtime(SETTINGS_FILE)
             with open(SETTINGS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                settings = json.load(f)
+            settings_mtime = mtime
+            return settings
     except Exception as e:
         print(f"加载设置失败: {e}")
     return DEFAULT_SETTINGS.copy()
 
 
+def refresh_settings_if_changed():
+    """settings.json 被其他工作进程修改过时重新加载，并让设置的缓存响应失效"""
+    global current_settings
+    try:
+        if os.path.getmtime(SETTINGS_FILE) != settings_mtime:
+            current_settings = load_settings()
+            response_cache.invalidate("settings")
+    except OSError:
+        pass
+
+
 def save_settings(settings):
-    """保存设置"""
+    """保存设置（先写临时文件再替换，其他工作进程不会读到写了一半的文件）"""
+    global settings_mtime
     try:
-        with open(SETTINGS_FILE, 'w', encoding='utf-8') as f:
+        tmp_file = f"{SETTINGS_FILE}.{os.getpid()}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
             json.dump(settings, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, SETTINGS_FILE)
+        settings_mtime = os.path.getmtime(SETTINGS_FILE)
+        response_cache.invalidate("settings")
         return True
     except Exception as e:
         print(f"保存设置失败: {e}")
@@ -373,33 +611,101 @@ def save_settings(settings):
 
 
 def load_payments():
-    """加载支付记录"""
-    global payments
+    """加载支付记录并重建订单索引"""
+    global payments, payments_mtime
     try:
         if os.path.exists(PAYMENTS_FILE):
+            payments_mtime = os.path.getmtime(PAYMENTS_FILE)
             with open(PAYMENTS_FILE, 'r', encoding='utf-8') as f:
                 payments = json.load(f)
     except Exception as e:
         print(f"加载支付记录失败: {e}")
         payments = {}
+    order_index.rebuild(payments)
 
 
-def save_payments():
-    """保存支付记录"""
+def refresh_payments_if_changed():
+    """payments.json 被其他工作进程修改过时重新加载"""
     try:
-        with open(PAYMENTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(payments, f, ensure_ascii=False, indent=2)
+        if os.path.getmtime(PAYMENTS_FILE) != payments_mtime:
+            load_payments()
+    except OSError:
+        pass
+
+
+def merge_payment(current, stored):
+    """
+    同一订单在内存和文件中的两个版本取其一
+
+    文件中已是终态的版本优先（先写入的终态为准，其他进程不能把它改成别的状态）；
+    否则内存中的终态优先；都未进入终态时取更新时间较晚的版本
+    """
+    if stored["status"] in TERMINAL_PAYMENT_STATUSES:
+        return stored
+    if current["status"] in TERMINAL_PAYMENT_STATUSES:
+        return current
+    current_time = current.get("updated_at", current["created_at"])
+    stored_time = stored.get("updated_at", stored["created_at"])
+    return current if current_time >= stored_time else stored
+
+
+def save_payments(changed=None):
+    """
+    保存支付记录（多进程部署时在文件锁内读取其他工作进程写入的订单，逐个订单合并后原子替换文件）
+
+    Args:
+        changed: 本次新建或状态变化的订单，同步更新订单索引
+    """
+    global payments_mtime
+    if changed is not None:
+        order_index.update(changed)
+    try:
+        with open(PAYMENTS_LOCK_FILE, 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            if os.path.exists(PAYMENTS_FILE):
+                with open(PAYMENTS_FILE, 'r', encoding='utf-8') as f:
+                    for order_id, stored in json.load(f).items():
+                        current = payments.get(order_id)
+                        merged = stored if current is None else merge_payment(current, stored)
+                        if merged is not current:
+                            payments[order_id] = merged
+                            order_index.update(merged)
+
+            tmp_file = f"{PAYMENTS_FILE}.{os.getpid()}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(payments, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_file, PAYMENTS_FILE)
+            payments_mtime = os.path.getmtime(PAYMENTS_FILE)
         return True
     except Exception as e:
         print(f"保存支付记录失败: {e}")
         return False
 
 
-# 启动时加载数据
+# 启动时加载数据（设置和支付记录很小，导入时读取；历史数据在 initialize() 中加载）
 current_settings = load_settings()
 load_payments()
-download_data_from_google_drive()  # 🔥 添加这行
-load_historical_data()  # 加载历史数据
+
+_initialized = False
+_initialize_lock = threading.Lock()
+
+
+def initialize():
+    """
+    下载并加载历史数据（幂等）
+
+    由启动事件调用；serve.py 在 fork 工作进程之前于父进程中调用，工作进程的启动事件随即跳过
+    """
+
+    global _initialized
+    with _initialize_lock:
+        if _initialized:
+            return
+        download_data_from_google_drive()  # 🔥 添加这行
+        load_historical_data()  # 加载历史数据
+        _initialized = True
 
 
 # 数据模型
@@ -407,6 +713,26 @@ class PredictionRequest(BaseModel):
     scores: List[float]
     confidences: List[float] = []
     conference: str = "ICLR"
+    include_intervals: bool = False  # 附带概率和排名的 bootstrap 置信区间
+
+
+class SimilarRequest(BaseModel):
+    scores: List[float]
+    confidences: List[float] = []
+    conference: str = "ICLR"
+    year: Optional[str] = None  # 默认与预测相同：设置年份的前一年（没有数据时使用最近一年）
+    k: int = 10
+
+
+class SimulateRequest(BaseModel):
+    scores: List[float]
+    conference: str = "ICLR"
+    year: Optional[str] = None  # 默认与预测相同：设置年份的前一年（没有数据时使用最近一年）
+    add_reviewers: int = 1  # 新增评审数
+    revise: List[int] = []  # rebuttal 后可能变化的评分下标
+    revise_direction: str = "up"  # up: 只升不降，down: 只降不升，any: 可升可降
+    samples: int = 2000
+    seed: Optional[int] = None
 
 
 class PredictionResponse(BaseModel):
@@ -419,6 +745,7 @@ class PredictionResponse(BaseModel):
     accepted_papers: int
     prediction_method: str = "rule_threshold"
     prediction_time_ms: Optional[int] = None
+    intervals: Optional[dict] = None  # 仅在 include_intervals 时返回
 
 
 class SettingsUpdate(BaseModel):
@@ -442,26 +769,88 @@ class PaymentResponse(BaseModel):
     status: str = "pending"
 
 
-@app.get("/")
-async def root():
+@app.on_event("startup")
+async def load_data_on_startup():
+    """加载历史数据（必须先于其他启动任务）"""
+    await run_in_threadpool(initialize)
+
+
+@app.on_event("startup")
+async def start_inference_service():
+    """启动ML推理服务（需要 ml_predictor.py 训练出的模型，可用 ENABLE_ML_MODELS=0 关闭）"""
+    global inference_service
+
+    if os.environ.get("ENABLE_ML_MODELS", "1") == "0":
+        print("ℹ️  已通过 ENABLE_ML_MODELS=0 关闭ML模型")
+        return
+
+    if not InferenceService.models_available(ML_MODELS_DIR):
+        print(f"ℹ️  未找到预训练模型 ({ML_MODELS_DIR}/model_info.json)，仅使用规则算法")
+        return
+
+    service = InferenceService.from_env(ML_MODELS_DIR)
+    try:
+        await service.start()
+        inference_service = service
+    except Exception as e:
+        print(f"❌ 推理服务启动失败，仅使用规则算法: {e}")
+        await service.stop()
+
+
+@app.on_event("startup")
+async def start_prediction_log():
+    """启动预测事件日志的后台写入任务"""
+    await prediction_log.start()
+
+
+@app.on_event("shutdown")
+async def stop_prediction_log():
+    """写出缓冲区中剩余的预测事件"""
+    await prediction_log.stop()
+
+
+@app.on_event("shutdown")
+async def stop_inference_service():
+    """关闭ML推理服务"""
+    global inference_service
+
+    if inference_service is not None:
+        await inference_service.stop()
+        inference_service = None
+
+
+@app.on_event("shutdown")
+async def stop_loader_pool():
+    """关闭解析进程池（启动加载完成后已关闭，这里兜底）"""
+    shutdown_pool()
+
+
+def build_root_payload():
     return {
         "message": "论文接受率预测API正在运行",
         "version": "2.0.0",
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "features": {
-            "ml_models": False,
-            "prediction_method": "rule_based",
+            "ml_models": inference_service is not None,
+            "prediction_method": "ml_ensemble" if inference_service is not None else "rule_based",
             "prediction_stats": prediction_stats,
             "historical_data_loaded": list(historical_data.keys())  # 修复：返回已加载的数据年份
         }
     }
 
 
+@app.get("/")
+async def root():
+    # 包含实时的预测统计和时间戳，不缓存
+    return FastJSONResponse(build_root_payload(), headers={"Cache-Control": "no-store"})
+
+
 @app.get("/settings")
-async def get_settings():
+async def get_settings(request: Request):
     """获取当前设置"""
-    return current_settings
+    refresh_settings_if_changed()
+    return response_cache.respond(request, "settings")
 
 
 @app.post("/settings")
@@ -469,6 +858,8 @@ async def update_settings(new_settings: SettingsUpdate):
     """更新设置"""
     global current_settings
 
+    # 在其他工作进程最近保存的设置上修改，不覆盖它们的改动
+    refresh_settings_if_changed()
     try:
         # 解析评分选项
         score_options = [float(x.strip()) for x in new_settings.score_options.split(',') if x.strip()]
@@ -499,31 +890,32 @@ async def update_settings(new_settings: SettingsUpdate):
 
 
 @app.post("/upload-qr")
-async def upload_qr_code(file: UploadFile = File(...)):
-    """上传支付二维码"""
-    try:
-        # 验证文件类型
-        if not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="请上传图片文件")
+async def upload_qr_code(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+    """上传支付二维码（请求体大小由 BodySizeLimitMiddleware 在读取时限制）"""
+    # 验证文件类型
+    if not (file.content_type or "").startswith('image/'):
+        raise HTTPException(status_code=400, detail="请上传图片文件")
 
-        # 生成唯一文件名
-        file_extension = os.path.splitext(file.filename)[1]
-        unique_filename = f"qr_{int(time.time())}{file_extension}"
-        file_path = f"uploads/qr_codes/{unique_filename}"
-
-        # 保存文件
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+    try:
+        # 在线程池中分块复制（限制大小），以内容哈希命名
+        unique_filename = await run_in_threadpool(store_upload, file.file, QR_CODES_DIR, MAX_QR_UPLOAD_BYTES)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail=f"图片不能超过 {MAX_QR_UPLOAD_BYTES // 1024 // 1024}MB")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"上传失败: {str(e)}")
 
-        # 更新设置中的二维码URL
-        qr_url = f"/uploads/qr_codes/{unique_filename}"
-        current_settings["qr_code_url"] = qr_url
-        save_settings(current_settings)
+    # 响应返回后再生成 WebP / 预压缩变体
+    background_tasks.add_task(generate_variants, os.path.join(QR_CODES_DIR, unique_filename))
 
-        return {"qr_code_url": qr_url, "message": "二维码上传成功"}
+    # 更新设置中的二维码URL
+    refresh_settings_if_changed()
+    qr_url = f"/uploads/qr_codes/{unique_filename}"
+    current_settings["qr_code_url"] = qr_url
+    save_settings(current_settings)
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"上传失败: {str(e)}")
+    return {"qr_code_url": qr_url, "message": "二维码上传成功"}
 
 
 @app.post("/create-payment", response_model=PaymentResponse)
@@ -542,7 +934,7 @@ async def create_payment_order(order: PaymentOrder):
 
         # 保存订单
         payments[order_id] = payment_data
-        save_payments()
+        save_payments(changed=payment_data)
 
         return PaymentResponse(
             orderId=order_id,
@@ -557,17 +949,21 @@ async def create_payment_order(order: PaymentOrder):
 @app.get("/check-payment/{order_id}")
 async def check_payment_status(order_id: str):
     """检查支付状态"""
+    if order_id not in payments:
+        # 订单可能由其他工作进程创建：payments.json 有变化时才重新读取
+        refresh_payments_if_changed()
     if order_id not in payments:
         raise HTTPException(status_code=404, detail="订单不存在")
 
     payment = payments[order_id]
 
-    # 检查是否过期
+    # 检查是否过期（只有待支付的订单会过期）
     expires_at = datetime.fromisoformat(payment["expires_at"])
-    if datetime.now() > expires_at:
-        payment["status"] = "expired"
+    if payment["status"] == "pending" and datetime.now() > expires_at:
+        payment = dict(payment, status="expired", updated_at=datetime.now().isoformat())
         payments[order_id] = payment
-        save_payments()
+        save_payments(changed=payment)
+        payment = payments[order_id]
 
     # 模拟支付成功概率（实际应该调用真实支付API）
     created_at = datetime.fromisoformat(payment["created_at"])
@@ -575,16 +971,19 @@ async def check_payment_status(order_id: str):
 
     if elapsed > 10 and payment["status"] == "pending":
         import random
+        # 在副本上修改：其他工作进程已写入终态时，合并后以文件中的状态为准
+        payment = dict(payment, updated_at=datetime.now().isoformat())
         if random.random() < 0.8:  # 80%概率成功
             payment["status"] = "success"
-            payment["paid_at"] = datetime.now().isoformat()
+            payment["paid_at"] = payment["updated_at"]
         else:
             payment["status"] = "failed"
 
         payments[order_id] = payment
-        save_payments()
+        save_payments(changed=payment)
+        payment = payments[order_id]
 
-    return {"status": payment["status"], "order_id": order_id}
+    return FastJSONResponse({"status": payment["status"], "order_id": order_id})
 
 
 @app.post("/predict", response_model=PredictionResponse)
@@ -595,18 +994,48 @@ async def predict(request: PredictionRequest):
     if not request.scores:
         raise HTTPException(status_code=400, detail="请提供评分")
 
+    # 未知会议直接拒绝，不用其他会议的数据代替
+    if request.conference and not is_known_venue(request.conference):
+        raise HTTPException(status_code=400, detail=f"没有 {request.conference} 会议的历史数据，"
+                                                    f"可用会议: {', '.join(dataset_registry.available()) or DEFAULT_VENUE}")
+
     try:
         start_time = time.time()
 
         # 基本统计
-        avg_score = np.mean(request.scores)
+        avg_score = sum(request.scores) / len(request.scores)
         min_score = min(request.scores)
 
         print(f"📊 基本统计 - 平均分: {avg_score:.2f}, 最低分: {min_score}")
 
-        # 使用基础规则计算排名，传递年份信息
+        # 使用基础规则计算排名，传递会议和年份信息
+        refresh_settings_if_changed()
         year = current_settings.get("year", "2025")
-        ranking_result = calculate_paper_ranking_basic(request.scores, request.confidences, year)
+        conference = request.conference or current_settings.get("conference", DEFAULT_VENUE)
+
+        # 其他会议的数据首次使用时在线程池中加载，避免阻塞事件循环
+        await run_in_threadpool(get_year_data, conference, str(int(year) - 1))
+
+        ranking_result = calculate_paper_ranking_basic(request.scores, request.confidences, year, conference)
+
+        # 有ML推理服务时，用集成模型的概率替换规则概率（排名仍基于历史数据）
+        ml_result = None
+        if inference_service is not None:
+            try:
+                ml_result = await inference_service.predict(request.scores, request.confidences)
+                ranking_result["probability"] = ml_result["ensemble_probability"]
+                ranking_result["prediction_method"] = "ml_ensemble_with_" + ranking_result["prediction_method"].split("_with_", 1)[1]
+                print(f"🤖 ML集成概率: {ml_result['ensemble_probability']:.3f} ({ml_result['confidence_level']})")
+            except Exception as e:
+                ml_result = None
+                print(f"⚠️  ML推理失败，使用规则概率: {e}")
+
+        intervals = None
+        if request.include_intervals:
+            reference_data = get_year_data(conference, str(int(year) - 1))
+            if reference_data is not None and reference_data["total_count"]:
+                intervals = reference_data["interval_estimator"].intervals(
+                    request.scores, ml_result["individual_predictions"] if ml_result else None)
 
         # 计算预测时间
         prediction_time = time.time() - start_time
@@ -616,60 +1045,184 @@ async def predict(request: PredictionRequest):
                                                           prediction_stats["total_predictions"] - 1) +
                                                           prediction_time
                                                   ) / prediction_stats["total_predictions"]
+        prediction_log.record(conference, year, request.scores, ranking_result["probability"],
+                              prediction_time * 1000, ranking_result["prediction_method"])
+
+        # 字段与 PredictionResponse 一致；直接返回响应对象，跳过 response_model 的二次校验和编码
+        response = {
+            "probability": float(ranking_result["probability"]),
+            "rank_in_all": int(ranking_result["rank_in_all"]),
+            "rank_in_accepted": int(ranking_result["rank_in_accepted"]),
+            "avg_score": float(avg_score),
+            "min_score": float(min_score),
+            "total_papers": int(ranking_result["total_papers"]),
+            "accepted_papers": int(ranking_result["accepted_papers"]),
+            "prediction_method": ranking_result["prediction_method"],
+            "prediction_time_ms": int(prediction_time * 1000)
+        }
+        if request.include_intervals:
+            response["intervals"] = intervals
 
-        response = PredictionResponse(
-            probability=ranking_result["probability"],
-            rank_in_all=ranking_result["rank_in_all"],
-            rank_in_accepted=ranking_result["rank_in_accepted"],
-            avg_score=avg_score,
-            min_score=min_score,
-            total_papers=ranking_result["total_papers"],
-            accepted_papers=ranking_result["accepted_papers"],
-            prediction_method=ranking_result["prediction_method"],
-            prediction_time_ms=int(prediction_time * 1000)
-        )
-
-        print(f"✅ 预测完成: 概率={response.probability:.3f}, 用时={response.prediction_time_ms}ms")
-        return response
+        print(f"✅ 预测完成: 概率={response['probability']:.3f}, 用时={response['prediction_time_ms']}ms")
+        return FastJSONResponse(response)
 
     except Exception as e:
         print(f"❌ 预测失败: {e}")
+        prediction_log.record(request.conference or current_settings.get("conference", DEFAULT_VENUE),
+                              current_settings.get("year", "2025"), request.scores, 0.0,
+                              (time.time() - start_time) * 1000, ERROR_METHOD)
         raise HTTPException(status_code=500, detail=f"预测失败: {str(e)}")
 
 
-@app.get("/data-status")
-async def get_data_status():
-    """获取数据加载状态"""
+@app.post("/similar")
+async def find_similar_papers(request: SimilarRequest):
+    """评分（和自信心）最接近的 k 篇历史论文及其决策和标题"""
+    from similarity_index import MAX_K
+
+    if not request.scores:
+        raise HTTPException(status_code=400, detail="请提供评分")
+    if not 1 <= request.k <= MAX_K:
+        raise HTTPException(status_code=400, detail=f"k 需在 1 - {MAX_K} 之间")
+
+    refresh_settings_if_changed()
+    conference = request.conference or current_settings.get("conference", DEFAULT_VENUE)
+    year = resolve_reference_year(conference, request.year)
+
+    year_data = await run_in_threadpool(get_year_data, conference, year)
+    if year_data is None:
+        raise HTTPException(status_code=404, detail=f"没有 {conference} {year} 年的历史数据")
+
+    start_time = time.perf_counter()
+    index = year_data["similarity_index"]
+    neighbors = index.query(request.scores, request.confidences or None, request.k)
+    query_ms = (time.perf_counter() - start_time) * 1000
+
+    papers = []
+    for row, distance in neighbors:
+        paper = index.describe(row)
+        paper["distance"] = round(distance, 4)
+        papers.append(paper)
+
+    # 标题在冷数据中，按需随机读取
+    store = await run_in_threadpool(get_paper_text_store, conference, year)
+    if store is not None:
+        titles = await run_in_threadpool(lambda: [store.get_title(paper["paper_id"]) for paper in papers])
+        for paper, title in zip(papers, titles):
+            paper["title"] = title
+
+    accepted = sum(1 for paper in papers if paper["accepted"])
+    return FastJSONResponse({
+        "conference": conference,
+        "year": year,
+        "papers": papers,
+        "accepted_count": accepted,
+        "acceptance_rate": accepted / len(papers) if papers else None,
+        "query_ms": round(query_ms, 3)
+    })
+
+
+@app.post("/simulate")
+async def simulate_reviews(request: SimulateRequest):
+    """
+    假设模拟：再来几位评审、或 rebuttal 后部分评分变化（revise_direction: up / down / any）时，接受概率和排名的分布
+
+    新增/修改的评分从参考年份的历史评分分布中抽样，所有样本一次向量化计算（见 simulation.py）
+    """
+    from simulation import MAX_ADD_REVIEWERS, MAX_SAMPLES, REVISE_DIRECTIONS, simulate
+
+    if not request.scores:
+        raise HTTPException(status_code=400, detail="请提供评分")
+    if not 0 <= request.add_reviewers <= MAX_ADD_REVIEWERS:
+        raise HTTPException(status_code=400, detail=f"add_reviewers 需在 0 - {MAX_ADD_REVIEWERS} 之间")
+    if not 1 <= request.samples <= MAX_SAMPLES:
+        raise HTTPException(status_code=400, detail=f"samples 需在 1 - {MAX_SAMPLES} 之间")
+    revise = sorted(set(request.revise))
+    if any(not 0 <= index < len(request.scores) for index in revise):
+        raise HTTPException(status_code=400, detail="revise 中的下标超出评分范围")
+    if not request.add_reviewers and not revise:
+        raise HTTPException(status_code=400, detail="请指定 add_reviewers 或 revise")
+    if request.revise_direction not in REVISE_DIRECTIONS:
+        raise HTTPException(status_code=400, detail=f"revise_direction 只能是 {' / '.join(REVISE_DIRECTIONS)}")
+
+    refresh_settings_if_changed()
+    conference = request.conference or current_settings.get("conference", DEFAULT_VENUE)
+    year = resolve_reference_year(conference, request.year)
+
+    year_data = await run_in_threadpool(get_year_data, conference, year)
+    if year_data is None or not year_data["total_count"]:
+        raise HTTPException(status_code=404, detail=f"没有 {conference} {year} 年的历史数据")
+
+    result = await run_in_threadpool(
+        simulate, year_data, request.scores,
+        add_reviewers=request.add_reviewers,
+        revise=revise,
+        samples=request.samples,
+        seed=request.seed,
+        min_support=EMPIRICAL_MIN_SUPPORT,
+        revise_direction=request.revise_direction
+    )
+    result.update({"conference": conference, "year": year})
+    return FastJSONResponse(result)
+
+
+def build_resubmission_summary():
+    """已加载数据集合并后的去重统计（同一工作多次投稿只算一次），没有链接表时返回 None"""
+    if not resubmission_links:
+        return None
+
+    from dedup import pooled_unique_stats
+    return pooled_unique_stats(
+        resubmission_links,
+        {(venue, year): data for venue, year, data in dataset_registry.loaded()}
+    )
+
+
+def build_data_status_payload():
+    """数据加载状态"""
     return {
         "historical_data_loaded": list(historical_data.keys()),
         "data_details": {
             year: {
                 "total_papers": data["total_count"],
                 "accepted_papers": data["accepted_count"],
-                "acceptance_rate": f"{data['acceptance_rate']:.2%}"
+                "acceptance_rate": f"{data['acceptance_rate']:.2%}",
+                "acceptance_index_keys": data["acceptance_index"].summary(),
+                "resubmissions": data.get("resubmissions")
             }
             for year, data in historical_data.items()
         },
+        "resubmissions": build_resubmission_summary(),
+        # 每个已加载数据集的内存占用（字节，按列拆分），用于估算容器内存
+        "dataset_memory": [
+            {"venue": venue, "year": year, **year_data_memory(data)}
+            for venue, year, data in dataset_registry.loaded()
+        ],
+        "datasets": dataset_registry.status(),
         "prediction_method": "rule_based_with_historical_ranking"
     }
 
 
+@app.get("/data-status")
+async def get_data_status(request: Request):
+    """获取数据加载状态"""
+    return response_cache.respond(request, "data-status")
+
+
 @app.get("/stats")
 async def get_stats():
     """获取系统统计信息"""
     try:
-        # 统计支付记录
-        total_orders = len(payments)
-        successful_payments = sum(1 for p in payments.values() if p["status"] == "success")
-        total_revenue = sum(p["amount"] for p in payments.values() if p["status"] == "success")
+        # 统计支付记录（由订单索引的状态合计得到，不扫描全部订单）
+        status_totals = order_index.totals()
+        total_orders = len(order_index)
+        successful_payments = status_totals.get("success", {}).get("count", 0)
+        total_revenue = status_totals.get("success", {}).get("amount", 0)
 
         # 今日统计
-        today = datetime.now().date()
-        today_orders = sum(1 for p in payments.values()
-                           if datetime.fromisoformat(p["created_at"]).date() == today)
-        today_revenue = sum(p["amount"] for p in payments.values()
-                            if p["status"] == "success" and
-                            datetime.fromisoformat(p["created_at"]).date() == today)
+        today_start = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp()
+        today_end = today_start + 86400
+        today_orders, _ = order_index.count_between(today_start, today_end)
+        _, today_revenue = order_index.count_between(today_start, today_end, status="success")
 
         return {
             "total_orders": total_orders,
@@ -679,7 +1232,12 @@ async def get_stats():
             "today_revenue": today_revenue,
             "success_rate": successful_payments / total_orders if total_orders > 0 else 0,
             "prediction_stats": prediction_stats,
-            "prediction_method": "rule_based_only",
+            "prediction_method": "ml_ensemble" if inference_service is not None else "rule_based_only",
+            "inference": inference_service.metrics() if inference_service is not None else None,
+            "admission": admission_controller.stats(),
+            "prediction_log": prediction_log.metrics(),
+            "process": process_memory(),
+            "workers": load_worker_status(),
             "historical_data": {  # 修复：添加历史数据信息
                 year: {
                     "total_papers": data["total_count"],
@@ -693,10 +1251,278 @@ async def get_stats():
         return {"error": f"获取统计失败: {str(e)}"}
 
 
-# 修复3：添加健康检查端点
-@app.get("/health")
-async def health_check():
-    """健康检查端点"""
+def verify_admin_token(token):
+    """校验管理令牌：未配置 ADMIN_TOKEN 时管理接口关闭（不会因为漏配而公开）"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="管理接口未启用（未配置 ADMIN_TOKEN）")
+    if not token or not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        raise HTTPException(status_code=403, detail="管理令牌无效")
+
+
+@app.get("/admin/orders")
+async def list_orders(
+        status: Optional[str] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        min_amount: Optional[float] = None,
+        max_amount: Optional[float] = None,
+        order_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        order: str = "desc",
+        x_admin_token: Optional[str] = Header(None)):
+    """
+    管理后台订单列表（游标分页）
+
+    - status: pending / success / failed / expired
+    - start, end: 创建时间范围，ISO 格式的日期或时间（end 只给日期时包含当天）
+    - min_amount, max_amount: 金额范围
+    - order_id: 订单号前缀
+    - cursor: 上一页返回的 next_cursor
+    - order: desc（最新的在前）或 asc
+    """
+    verify_admin_token(x_admin_token)
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order 只能是 asc 或 desc")
+
+    refresh_payments_if_changed()
+    try:
+        page = order_index.query(status=status, start=start, end=end,
+                                 min_amount=min_amount, max_amount=max_amount,
+                                 order_id_prefix=order_id, cursor=cursor,
+                                 limit=limit, descending=order == "desc")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    page["total_orders"] = len(order_index)
+    return FastJSONResponse(page)
+
+
+@app.get("/admin/orders/summary")
+async def get_orders_summary(x_admin_token: Optional[str] = Header(None)):
+    """各状态的订单数和金额合计"""
+    verify_admin_token(x_admin_token)
+    refresh_payments_if_changed()
+    return FastJSONResponse({"total_orders": len(order_index), "by_status": order_index.totals()})
+
+
+@app.get("/admin/orders/{order_id_prefix}")
+async def lookup_orders(order_id_prefix: str, x_admin_token: Optional[str] = Header(None)):
+    """按订单号（或其前缀，至少 4 个字符）查找订单"""
+    verify_admin_token(x_admin_token)
+    if len(order_id_prefix) < 4:
+        raise HTTPException(status_code=400, detail="订单号前缀至少 4 个字符")
+
+    refresh_payments_if_changed()
+    matches = order_index.find_by_prefix(order_id_prefix)
+    if not matches:
+        raise HTTPException(status_code=404, detail="订单不存在")
+    return FastJSONResponse({"orders": matches})
+
+
+@app.get("/admin/predictions")
+async def query_predictions(
+        granularity: str = "hour",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        top: int = 10,
+        x_admin_token: Optional[str] = Header(None)):
+    """
+    预测使用情况（只读取小时 / 天聚合，不扫描原始事件）
+
+    - granularity: hour 或 day
+    - start, end: 时间范围，ISO 格式的日期或时间
+    - top: 返回最常见的评分组合数
+    """
+    verify_admin_token(x_admin_token)
+    if not 1 <= top <= 100:
+        raise HTTPException(status_code=400, detail="top 需在 1 - 100 之间")
+    try:
+        result = await run_in_threadpool(prediction_log.query, granularity, start, end, top)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    result["log"] = prediction_log.metrics()
+    return FastJSONResponse(result)
+
+
+def process_memory():
+    """当前进程的内存占用"""
+    from serve import read_process_memory
+
+    return {"pid": os.getpid(), **read_process_memory(os.getpid())}
+
+
+def load_worker_status():
+    """读取 serve.py 启动器保存的各工作进程内存报告，未使用启动器时返回 None"""
+    from serve import WORKER_STATUS_FILE
+
+    try:
+        with open(WORKER_STATUS_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+@app.get("/paper-text/{conference}/{year}/{paper_id}")
+async def get_paper_text(conference: str, year: str, paper_id: str):
+    """按 paper_id 读取历史论文的标题、摘要和评审对话（冷数据）"""
+    store = await run_in_threadpool(get_paper_text_store, conference, year)
+    if store is None:
+        raise HTTPException(status_code=404, detail=f"{conference} {year} 没有论文文本数据")
+
+    paper = await run_in_threadpool(store.get, paper_id)
+    if paper is None:
+        raise HTTPException(status_code=404, detail="论文不存在")
+    return paper
+
+
+@app.get("/distribution")
+async def get_distribution(request: Request, conference: Optional[str] = None, year: Optional[str] = None):
+    """
+    历史数据的平均分分布、分桶接受率和累积百分位曲线（加载时预先计算，响应预编码并带 ETag）
+
+    默认与预测相同：设置年份的前一年（没有数据时使用最近一年）
+    """
+    refresh_settings_if_changed()
+    conference = normalize_venue(conference or current_settings.get("conference", DEFAULT_VENUE))
+    year = resolve_reference_year(conference, year)
+
+    year_data = await run_in_threadpool(get_year_data, conference, year)
+    if year_data is None:
+        raise HTTPException(status_code=404, detail=f"没有 {conference} {year} 年的历史数据")
+
+    name = f"distribution:{conference}:{year}"
+    if not response_cache.has(name):
+        response_cache.register(
+            name,
+            lambda: build_distribution_payload(conference, year),
+            cache_control="public, max-age=0, s-maxage=300, must-revalidate"
+        )
+    return response_cache.respond(request, name)
+
+
+def build_distribution_payload(conference, year):
+    year_data = get_year_data(conference, year)
+    if year_data is None:
+        return {"conference": conference, "year": year, "available": False}
+    return {"conference": conference, "year": year, "available": True, **year_data["distribution"]}
+
+
+@app.get("/calibrate")
+async def calibrate_score(
+        avg_score: float,
+        conference: Optional[str] = None,
+        from_year: Optional[str] = None,
+        to_year: Optional[str] = None):
+    """
+    把平均分在 from_year 中的百分位映射到其他年份（或多年份合并分布 pooled）中的等价平均分和排名
+
+    - from_year: 平均分所在的年份，默认与预测相同（设置年份的前一年，没有数据时使用最近一年）
+    - to_year: 目标年份或 pooled，默认所有已加载的年份和 pooled
+    """
+    from calibration import map_score
+
+    refresh_settings_if_changed()
+    conference = conference or current_settings.get("conference", DEFAULT_VENUE)
+    from_year = resolve_reference_year(conference, from_year)
+
+    source_data = await run_in_threadpool(get_year_data, conference, from_year)
+    if source_data is None:
+        raise HTTPException(status_code=404, detail=f"没有 {conference} {from_year} 年的历史数据")
+
+    source = source_data["calibration"]
+    if not source.total:
+        raise HTTPException(status_code=404, detail=f"{conference} {from_year} 年没有有效评分的论文")
+
+    year_datas = loaded_year_data(conference)
+    if to_year and to_year != "pooled":
+        target_data = await run_in_threadpool(get_year_data, conference, to_year)
+        if target_data is None or not target_data["calibration"].total:
+            raise HTTPException(status_code=404, detail=f"没有 {conference} {to_year} 年的历史数据")
+        targets = {to_year: target_data["calibration"]}
+    else:
+        # 没有论文的年份（以及全部为空时的合并分布）无法映射，跳过
+        targets = {} if to_year == "pooled" else {year: data["calibration"] for year, data in year_datas.items()}
+        targets["pooled"] = get_pooled_calibration(conference, year_datas)
+        targets = {target: table for target, table in targets.items() if table.total}
+        if not targets:
+            raise HTTPException(status_code=404, detail=f"{conference} 没有可映射的目标年份")
+
+    start_time = time.perf_counter()
+    mapped = {target: map_score(avg_score, source, table) for target, table in targets.items()}
+    return FastJSONResponse({
+        "conference": conference,
+        "avg_score": avg_score,
+        "from_year": from_year,
+        "percentile": round(source.percentile(avg_score), 4),
+        "pooled_years": list(year_datas),
+        "targets": mapped,
+        "query_ms": round((time.perf_counter() - start_time) * 1000, 3)
+    })
+
+
+@app.get("/search")
+async def search_papers(
+        q: str,
+        conference: Optional[str] = None,
+        year: Optional[str] = None,
+        decision: Optional[str] = None,
+        track: Optional[str] = None,
+        match: str = "any",
+        limit: int = 20,
+        offset: int = 0):
+    """
+    按关键词检索历史论文（标题、关键词、摘要），返回匹配论文的接受率和 BM25 排序结果
+
+    - decision: accepted / rejected / 决策标签中的子串（如 oral）
+    - track: track 名称
+    - match: any（包含任一查询词）或 all（包含全部查询词）
+    """
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="请提供查询词")
+    if match not in ("any", "all"):
+        raise HTTPException(status_code=400, detail="match 只能是 any 或 all")
+
+    from search_index import MAX_LIMIT, MAX_OFFSET
+
+    if not 1 <= limit <= MAX_LIMIT:
+        raise HTTPException(status_code=400, detail=f"limit 需在 1 - {MAX_LIMIT} 之间")
+    if not 0 <= offset <= MAX_OFFSET:
+        raise HTTPException(status_code=400, detail=f"offset 需在 0 - {MAX_OFFSET} 之间")
+
+    refresh_settings_if_changed()
+    conference = conference or current_settings.get("conference", DEFAULT_VENUE)
+    year = resolve_reference_year(conference, year)
+
+    index = await run_in_threadpool(get_search_index, conference, year)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"{conference} {year} 没有论文文本数据")
+
+    start_time = time.perf_counter()
+    result = index.search(q, decision=decision, track=track, match_all=match == "all", limit=limit, offset=offset)
+    result.update({
+        "conference": conference,
+        "year": year,
+        "query_ms": round((time.perf_counter() - start_time) * 1000, 3)
+    })
+    return FastJSONResponse(result)
+
+
+@app.get("/admission-stats")
+async def get_admission_stats():
+    """获取准入控制统计（限流和过载丢弃的请求数）"""
+    return admission_controller.stats()
+
+
+@app.get("/inference-stats")
+async def get_inference_stats():
+    """获取ML推理服务指标（队列深度、批次大小、等待时间）"""
+    if inference_service is None:
+        return {"running": False, "message": "ML推理服务未启用"}
+    return inference_service.metrics()
+
+
+def build_health_payload():
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
@@ -706,6 +1532,20 @@ async def health_check():
     }
 
 
+# 修复3：添加健康检查端点
+@app.get("/health")
+async def health_check():
+    """健康检查端点（每次返回当前状态，不缓存）"""
+    return FastJSONResponse(build_health_payload(), headers={"Cache-Control": "no-store"})
+
+
+# 只读接口的缓存策略：CDN 可短暂缓存设置和数据状态，过期后用 ETag 重新验证
+response_cache.register("settings", lambda: current_settings,
+                        cache_control="public, max-age=0, s-maxage=30, stale-while-revalidate=60")
+response_cache.register("data-status", build_data_status_payload,
+                        cache_control="public, max-age=0, s-maxage=30, stale-while-revalidate=60")
+
+
 if __name__ == "__main__":
     import os
 
@@ -724,6 +1564,9 @@ if __name__ == "__main__":
     print(f"  API文档: http://0.0.0.0:{port}/docs")
     print(f"  数据状态: http://0.0.0.0:{port}/data-status")
     print(f"  健康检查: http://0.0.0.0:{port}/health")
+    print(f"  推理指标: http://0.0.0.0:{port}/inference-stats")
     print(f"  系统统计: http://0.0.0.0:{port}/stats")
 
+    import uvicorn
+
     uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
@@ -2,22 +2,33 @@
 """
 高级机器学习预测模型
 基于真实ICLR数据训练的接受率预测模型
+
+pandas、sklearn 的训练模块和 joblib 都在用到时才导入：
+只做推理的进程不加载 pandas 和训练/评估模块，模型文件由 joblib 按需反序列化
 """
 
 import json
 import numpy as np
-import pandas as pd
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
-from sklearn.preprocessing import StandardScaler
-import joblib
 import os
+from review_decoder import extract_review_scores, load_skeleton
+from paper_store import preferred_scores_file
+from compressed_io import open_binary
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+
+def score_confidence_correlation(scores, confidences):
+    """评分与自信心的皮尔逊相关系数；评审不足两位或任一方差为 0（如未提供自信心）时定义为 0"""
+    if len(scores) < 2 or len(confidences) < 2:
+        return 0.0
+    scores = np.asarray(scores, dtype=np.float64)
+    confidences = np.asarray(confidences, dtype=np.float64)
+    if np.ptp(scores) == 0 or np.ptp(confidences) == 0:
+        return 0.0
+    return float(np.corrcoef(scores, confidences)[0, 1])
+
+
 class PaperAcceptancePredictor:
     """论文接受率预测器"""
     
@@ -25,7 +36,19 @@ class PaperAcceptancePredictor:
         self.models_dir = models_dir
         os.makedirs(models_dir, exist_ok=True)
         
-        # 初始化模型
+        # 待训练的模型和标准化器在训练时创建（见 _build_models）
+        self.models = {}
+        self.scaler = None
+        self.feature_names = []
+        self.trained_models = {}
+        self.ensemble_weights = {}
+    
+    def _build_models(self):
+        """创建待训练的模型（仅训练时导入 sklearn 的训练模块）"""
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.preprocessing import StandardScaler
+        
         self.models = {
             'random_forest': RandomForestClassifier(
                 n_estimators=100,
@@ -45,11 +68,7 @@ class PaperAcceptancePredictor:
                 max_iter=1000
             )
         }
-        
         self.scaler = StandardScaler()
-        self.feature_names = []
-        self.trained_models = {}
-        self.ensemble_weights = {}
         
     def extract_features(self, papers_data):
         """
@@ -68,29 +87,10 @@ class PaperAcceptancePredictor:
         
         for paper in papers_data:
             try:
-                # 提取评审分数
-                scores = []
-                confidences = []
-                
-                for review in paper.get('reviews', []):
-                    rating = review.get('rating', '-1')
-                    confidence = review.get('confidence', '-1')
-                    
-                    if rating != '-1':
-                        try:
-                            score = float(rating)
-                            if 1 <= score <= 10:
-                                scores.append(score)
-                        except:
-                            pass
-                    
-                    if confidence != '-1':
-                        try:
-                            conf = float(confidence)
-                            if 1 <= conf <= 5:
-                                confidences.append(conf)
-                        except:
-                            pass
+                # 提取评审分数（与服务端共用同一解码规则）
+                record = extract_review_scores(paper)
+                scores = list(record.scores)
+                confidences = list(record.confidences)
                 
                 # 如果没有有效评分，跳过
                 if not scores:
@@ -131,7 +131,7 @@ class PaperAcceptancePredictor:
                     features['std_confidence'] = 0.0
                 
                 # 高级特征
-                features['score_confidence_corr'] = np.corrcoef(scores[:len(confidences)], confidences)[0,1] if len(confidences) > 1 else 0
+                features['score_confidence_corr'] = score_confidence_correlation(scores[:len(confidences)], confidences)
                 features['weighted_score'] = sum(s * c for s, c in zip(scores[:len(confidences)], confidences)) / sum(confidences) if confidences else features['avg_score']
                 
                 # 论文质量指标
@@ -144,8 +144,7 @@ class PaperAcceptancePredictor:
                 features['no_reject_score'] = 1 if features['min_score'] >= 5 else 0
                 
                 # 提取标签
-                decision = paper.get('paper_decision', '')
-                is_accepted = 1 if 'accept' in decision.lower() else 0
+                is_accepted = 1 if 'accept' in record.decision else 0
                 
                 features_list.append(features)
                 labels_list.append(is_accepted)
@@ -158,6 +157,7 @@ class PaperAcceptancePredictor:
         if not features_list:
             raise ValueError("没有提取到有效特征")
         
+        import pandas as pd
         features_df = pd.DataFrame(features_list)
         labels_series = pd.Series(labels_list)
         
@@ -182,8 +182,14 @@ class PaperAcceptancePredictor:
             dict: 模型性能报告
         """
         
+        from sklearn.model_selection import train_test_split, cross_val_score
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+        
         print("🎯 开始训练模型...")
         
+        if not self.models:
+            self._build_models()
+        
         # 分割数据
         X_train, X_test, y_train, y_test = train_test_split(
             features_df, labels_series, 
@@ -249,21 +255,18 @@ class PaperAcceptancePredictor:
         
         return performance_report
     
-    def predict_single(self, scores, confidences=None):
+    def build_feature_row(self, scores, confidences=None):
         """
-        预测单篇论文的接受概率
+        为单篇论文构造推理特征（与训练时的特征定义一致）
         
         Args:
             scores: 评分列表
             confidences: 自信心列表（可选）
-            
+        
         Returns:
-            dict: 预测结果
+            dict: 特征名 -> 特征值
         """
         
-        if not self.trained_models:
-            raise ValueError("模型尚未训练，请先调用 train_models()")
-        
         # 构造特征
         if not confidences:
             confidences = [3.0] * len(scores)  # 默认中等自信心
@@ -300,7 +303,7 @@ class PaperAcceptancePredictor:
         features['std_confidence'] = np.std(confidences) if len(confidences) > 1 else 0
         
         # 高级特征
-        features['score_confidence_corr'] = np.corrcoef(scores, confidences)[0,1] if len(scores) > 1 else 0
+        features['score_confidence_corr'] = score_confidence_correlation(scores, confidences)
         features['weighted_score'] = sum(s * c for s, c in zip(scores, confidences)) / sum(confidences)
         features['consistency_score'] = 1.0 / (1.0 + features['std_score'])
         features['controversial_score'] = features['score_range'] / 10.0
@@ -308,36 +311,215 @@ class PaperAcceptancePredictor:
         features['above_threshold_7'] = 1 if features['avg_score'] >= 7 else 0
         features['no_reject_score'] = 1 if features['min_score'] >= 5 else 0
         
-        # 转换为DataFrame
-        feature_vector = pd.DataFrame([features])[self.feature_names]
+        return features
+    
+    def predict_single(self, scores, confidences=None):
+        """
+        预测单篇论文的接受概率
+        
+        Args:
+            scores: 评分列表
+            confidences: 自信心列表（可选）
+        
+        Returns:
+            dict: 预测结果
+        """
+        
+        result = self.predict_batch([(scores, confidences)])[0]
+        if result is None:
+            raise ValueError(f"无法为评分 {scores} 构造有效特征")
+        return result
+    
+    def predict_batch(self, profiles):
+        """
+        批量预测多篇论文的接受概率
+        
+        每个模型只调用一次 predict_proba，供推理服务的微批次使用
+        
+        Args:
+            profiles: [(scores, confidences), ...] 列表
+        
+        Returns:
+            list: 每篇论文的预测结果，格式与 predict_single 相同；特征无法计算的论文为 None，
+                  不影响同一批次中的其他论文
+        """
+        
+        if not self.trained_models:
+            raise ValueError("模型尚未训练，请先调用 train_models()")
+        
+        if not profiles:
+            return []
+        
+        # 逐行构造特征，某一行无法计算（如评分为空、自信心之和为 0）时只影响该行
+        features_rows = []
+        for scores, confidences in profiles:
+            try:
+                features_rows.append(self.build_feature_row(scores, confidences))
+            except (ValueError, TypeError, ZeroDivisionError):
+                features_rows.append(None)
+        
+        # 按训练时的特征顺序组成矩阵（不依赖 pandas），无效行填 NaN
+        feature_matrix = np.array(
+            [[row[name] for name in self.feature_names] if row is not None else [np.nan] * len(self.feature_names)
+             for row in features_rows],
+            dtype=np.float64
+        )
+        valid = np.isfinite(feature_matrix).all(axis=1)
+        valid_features = feature_matrix[valid]
         
-        # 获取各模型预测
+        # 获取各模型预测（只对有效行调用 predict_proba）
         predictions = {}
         
-        for model_name, model in self.trained_models.items():
-            if model_name == 'logistic_regression':
-                feature_scaled = self.scaler.transform(feature_vector)
-                prob = model.predict_proba(feature_scaled)[0, 1]
-            else:
-                prob = model.predict_proba(feature_vector)[0, 1]
+        if len(valid_features):
+            for model_name, model in self.trained_models.items():
+                if model_name == 'logistic_regression':
+                    feature_scaled = self.scaler.transform(valid_features)
+                    predictions[model_name] = model.predict_proba(feature_scaled)[:, 1]
+                else:
+                    predictions[model_name] = model.predict_proba(valid_features)[:, 1]
+        
+        results = []
+        valid_position = 0
+        for i, features in enumerate(features_rows):
+            if not valid[i]:
+                results.append(None)
+                continue
             
-            predictions[model_name] = prob
+            individual = {name: float(probs[valid_position]) for name, probs in predictions.items()}
+            valid_position += 1
+            
+            # 集成预测
+            ensemble_prob = sum(
+                individual[name] * weight
+                for name, weight in self.ensemble_weights.items()
+            )
+            
+            results.append({
+                'ensemble_probability': ensemble_prob,
+                'individual_predictions': individual,
+                'features_used': features,
+                'confidence_level': 'high' if features['std_score'] < 1.0 else 'medium'
+            })
+        
+        return results
+    
+    @staticmethod
+    def build_feature_matrix(score_matrix, confidence_matrix=None):
+        """
+        build_feature_row 的向量化版本：一次计算多篇论文的全部特征
         
-        # 集成预测
-        ensemble_prob = sum(
-            predictions[name] * weight 
-            for name, weight in self.ensemble_weights.items()
-        )
+        Args:
+            score_matrix: 形状 (论文数, 评审数) 的评分矩阵，评审数不足的位置填 NaN
+            confidence_matrix: 同形状的自信心矩阵（可选，整行为 NaN 时使用默认自信心 3.0）
         
-        return {
-            'ensemble_probability': ensemble_prob,
-            'individual_predictions': predictions,
-            'features_used': features,
-            'confidence_level': 'high' if features['std_score'] < 1.0 else 'medium'
-        }
+        Returns:
+            dict: 特征名 -> 长度为论文数的数组（与 build_feature_row 的取值一致）
+        """
+        
+        scores = np.array(score_matrix, dtype=np.float64)
+        score_counts = (~np.isnan(scores)).sum(axis=1)
+        
+        if confidence_matrix is None:
+            confidences = np.full_like(scores, np.nan)
+        else:
+            confidences = np.array(confidence_matrix, dtype=np.float64)
+        
+        # 两个矩阵补齐到相同的列数
+        width = max(scores.shape[1], confidences.shape[1])
+        scores = np.pad(scores, ((0, 0), (0, width - scores.shape[1])), constant_values=np.nan)
+        confidences = np.pad(confidences, ((0, 0), (0, width - confidences.shape[1])), constant_values=np.nan)
+        confidence_counts = (~np.isnan(confidences)).sum(axis=1)
+        
+        # 没有自信心的论文使用默认中等自信心
+        missing = confidence_counts == 0
+        confidences[missing] = np.where(np.isnan(scores[missing]), np.nan, 3.0)
+        confidence_counts[missing] = score_counts[missing]
+        
+        # 确保长度一致：按两者中较短的长度截断
+        lengths = np.minimum(score_counts, confidence_counts)
+        truncated = np.arange(scores.shape[1]) >= lengths[:, None]
+        scores[truncated] = np.nan
+        confidences[truncated] = np.nan
+        
+        with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+            warnings.simplefilter('ignore', RuntimeWarning)
+            
+            features = {}
+            features['avg_score'] = np.nanmean(scores, axis=1)
+            features['min_score'] = np.nanmin(scores, axis=1)
+            features['max_score'] = np.nanmax(scores, axis=1)
+            features['std_score'] = np.where(lengths > 1, np.nanstd(scores, axis=1), 0.0)
+            features['median_score'] = np.nanmedian(scores, axis=1)
+            features['score_range'] = features['max_score'] - features['min_score']
+            
+            features['num_reviews'] = lengths.astype(np.float64)
+            features['high_scores'] = (scores >= 7).sum(axis=1).astype(np.float64)
+            features['low_scores'] = (scores <= 4).sum(axis=1).astype(np.float64)
+            features['mid_scores'] = ((scores > 4) & (scores < 7)).sum(axis=1).astype(np.float64)
+            
+            features['high_score_ratio'] = features['high_scores'] / lengths
+            features['low_score_ratio'] = features['low_scores'] / lengths
+            features['mid_score_ratio'] = features['mid_scores'] / lengths
+            
+            features['avg_confidence'] = np.nanmean(confidences, axis=1)
+            features['min_confidence'] = np.nanmin(confidences, axis=1)
+            features['max_confidence'] = np.nanmax(confidences, axis=1)
+            features['std_confidence'] = np.where(lengths > 1, np.nanstd(confidences, axis=1), 0.0)
+            
+            # 皮尔逊相关系数（任一方差为 0 时定义为 0，与 score_confidence_correlation 一致）
+            score_dev = scores - features['avg_score'][:, None]
+            confidence_dev = confidences - features['avg_confidence'][:, None]
+            covariance = np.nansum(score_dev * confidence_dev, axis=1)
+            correlation = covariance / np.sqrt(np.nansum(score_dev ** 2, axis=1) * np.nansum(confidence_dev ** 2, axis=1))
+            varying = (lengths > 1) & (features['score_range'] > 0) & \
+                (features['max_confidence'] - features['min_confidence'] > 0)
+            features['score_confidence_corr'] = np.where(varying, np.clip(correlation, -1.0, 1.0), 0.0)
+            features['weighted_score'] = np.nansum(scores * confidences, axis=1) / np.nansum(confidences, axis=1)
+            features['consistency_score'] = 1.0 / (1.0 + features['std_score'])
+        
+        features['controversial_score'] = features['score_range'] / 10.0
+        features['above_threshold_6'] = (features['avg_score'] >= 6).astype(np.float64)
+        features['above_threshold_7'] = (features['avg_score'] >= 7).astype(np.float64)
+        features['no_reject_score'] = (features['min_score'] >= 5).astype(np.float64)
+        
+        return features
+    
+    def predict_matrix(self, score_matrix, confidence_matrix=None):
+        """
+        批量预测（向量化特征 + 每个模型一次 predict_proba），供离线批量打分使用
+        
+        Args:
+            score_matrix: 评分矩阵（NaN 补齐）
+            confidence_matrix: 自信心矩阵（可选）
+        
+        Returns:
+            tuple: (集成概率数组, {模型名: 概率数组})；特征无法计算的论文（如没有有效评分）概率为 NaN
+        """
+        
+        if not self.trained_models:
+            raise ValueError("模型尚未训练，请先调用 train_models()")
+        
+        features = self.build_feature_matrix(score_matrix, confidence_matrix)
+        feature_matrix = np.column_stack([features[name] for name in self.feature_names])
+        valid = np.isfinite(feature_matrix).all(axis=1)
+        valid_features = feature_matrix[valid]
+        
+        predictions = {}
+        for model_name, model in self.trained_models.items():
+            probabilities = np.full(len(feature_matrix), np.nan)
+            if len(valid_features):
+                if model_name == 'logistic_regression':
+                    probabilities[valid] = model.predict_proba(self.scaler.transform(valid_features))[:, 1]
+                else:
+                    probabilities[valid] = model.predict_proba(valid_features)[:, 1]
+            predictions[model_name] = probabilities
+        
+        ensemble = sum(predictions[name] * weight for name, weight in self.ensemble_weights.items())
+        return ensemble, predictions
     
     def save_models(self):
         """保存训练好的模型"""
+        import joblib
         
         model_info = {
             'feature_names': self.feature_names,
@@ -360,6 +542,7 @@ class PaperAcceptancePredictor:
     
     def load_models(self):
         """加载预训练模型"""
+        import joblib
         
         try:
             # 加载模型信息
@@ -401,15 +584,18 @@ def train_predictor_from_data(data_files):
     # 加载数据
     all_papers = []
     for data_file in data_files:
+        # 已拆分冷热数据时只读取评分热数据
+        data_file = preferred_scores_file(data_file)
         if not os.path.exists(data_file):
             print(f"⚠️  数据文件不存在: {data_file}")
             continue
         
         print(f"📖 加载数据文件: {data_file}")
-        with open(data_file, 'r', encoding='utf-8') as f:
+        with open_binary(data_file) as f:
             for line in f:
                 if line.strip():
-                    all_papers.append(json.loads(line.strip()))
+                    # 训练只需要评分和决策，丢弃 dialogue 以降低内存占用
+                    all_papers.append(load_skeleton(line.strip()))
     
     if not all_papers:
         raise ValueError("没有找到有效的训练数据")
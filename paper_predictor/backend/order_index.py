@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+支付订单的二级索引（管理后台订单查询）
+在 payments 字典之外维护几份有序列表，每次订单创建或状态变化时增量更新，查询不再扫描全部订单：
+  - by_created:  按 (创建时间戳, 订单号) 升序，日期范围查询用二分定位
+  - by_status:   每个状态一份同样有序的列表，状态 + 日期范围查询只看该状态的订单
+  - order_ids:   订单号升序，按前缀查找订单用二分定位
+  - 每个状态的订单数和金额合计，/stats 直接读取
+
+分页使用游标（上一页最后一条的创建时间和订单号），新订单插入不会造成翻页时重复或遗漏
+
+使用方法（在 main.py 中）：
+    order_index = OrderIndex()
+    order_index.rebuild(payments)            # 加载支付记录后
+    order_index.update(payment)              # 创建订单或状态变化后
+    page = order_index.query(status="success", start=..., end=..., limit=50)
+    page = order_index.query(cursor=page["next_cursor"], ...)
+"""
+
+import base64
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, datetime, timedelta
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def parse_timestamp(value):
+    """ISO 格式的日期或时间 -> 时间戳（本地时间，与订单 created_at 一致）"""
+    return datetime.fromisoformat(value).timestamp()
+
+
+def parse_range_end(value):
+    """范围终点：只给日期时包含当天全天"""
+    if len(value) == 10:
+        return datetime.combine(date.fromisoformat(value) + timedelta(days=1), datetime.min.time()).timestamp()
+    return parse_timestamp(value)
+
+
+def encode_cursor(key):
+    created_ts, order_id = key
+    return base64.urlsafe_b64encode(f"{created_ts!r}|{order_id}".encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor):
+    """
+    Raises:
+        ValueError: 游标格式无效
+    """
+    try:
+        created_ts, order_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|", 1)
+        return float(created_ts), order_id
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+
+
+class OrderIndex:
+    """payments 字典的有序二级索引"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        # 订单号 -> 订单字典（与 payments 中的对象相同，不复制）
+        self._orders = {}
+        # 订单号 -> (创建时间戳, 状态, 金额)，更新时据此从旧位置删除
+        self._entries = {}
+        self._by_created = []
+        self._by_status = {}
+        self._order_ids = []
+        # 状态 -> {"count", "amount"}
+        self._totals = {}
+
+    def rebuild(self, payments):
+        """由全部支付记录重建索引"""
+        with self._lock:
+            self.clear()
+            for payment in payments.values():
+                self._insert(payment)
+
+    def update(self, payment):
+        """订单创建或状态变化后调用"""
+        with self._lock:
+            order_id = payment["orderId"]
+            if order_id in self._entries:
+                self._remove(order_id)
+            self._insert(payment)
+
+    def _insert(self, payment):
+        order_id = payment["orderId"]
+        created_ts = parse_timestamp(payment["created_at"])
+        status = payment["status"]
+        amount = payment.get("amount", 0)
+        key = (created_ts, order_id)
+
+        self._orders[order_id] = payment
+        self._entries[order_id] = (created_ts, status, amount)
+        insort(self._by_created, key)
+        insort(self._by_status.setdefault(status, []), key)
+        insort(self._order_ids, order_id)
+
+        totals = self._totals.setdefault(status, {"count": 0, "amount": 0})
+        totals["count"] += 1
+        totals["amount"] += amount
+
+    def _remove(self, order_id):
+        created_ts, status, amount = self._entries.pop(order_id)
+        key = (created_ts, order_id)
+        del self._orders[order_id]
+        _remove_sorted(self._by_created, key)
+        _remove_sorted(self._by_status[status], key)
+        _remove_sorted(self._order_ids, order_id)
+
+        totals = self._totals[status]
+        totals["count"] -= 1
+        totals["amount"] -= amount
+
+    def __len__(self):
+        return len(self._entries)
+
+    def totals(self):
+        """每个状态的订单数和金额合计"""
+        with self._lock:
+            return {status: {"count": values["count"], "amount": round(values["amount"], 2)}
+                    for status, values in self._totals.items() if values["count"]}
+
+    def count_between(self, start_ts, end_ts, status=None):
+        """
+        创建时间在 [start_ts, end_ts) 内的订单数和金额合计
+
+        Returns:
+            tuple: (订单数, 金额合计)
+        """
+
+        with self._lock:
+            keys = self._by_created if status is None else self._by_status.get(status, [])
+            lo = bisect_left(keys, (start_ts,))
+            hi = bisect_left(keys, (end_ts,))
+            amount = sum(self._entries[order_id][2] for _, order_id in keys[lo:hi])
+            return hi - lo, round(amount, 2)
+
+    def find_by_prefix(self, prefix, limit=DEFAULT_PAGE_SIZE):
+        """订单号以 prefix 开头的订单（按订单号排序）"""
+        with self._lock:
+            start = bisect_left(self._order_ids, prefix)
+            matches = []
+            for order_id in self._order_ids[start:start + limit]:
+                if not order_id.startswith(prefix):
+                    break
+                matches.append(self._orders[order_id])
+            return matches
+
+    def query(self, status=None, start=None, end=None, min_amount=None, max_amount=None,
+              order_id_prefix=None, cursor=None, limit=DEFAULT_PAGE_SIZE, descending=True):
+        """
+        分页查询订单
+
+        Args:
+            status: 订单状态（pending / success / failed / expired）
+            start, end: 创建时间范围 [start, end)，ISO 格式的日期或时间（end 只给日期时包含当天）
+            min_amount, max_amount: 金额范围（闭区间）
+            order_id_prefix: 订单号前缀
+            cursor: 上一页返回的 next_cursor
+            limit: 每页条数（不超过 MAX_PAGE_SIZE）
+            descending: 是否按创建时间倒序（默认最新的在前）
+
+        Returns:
+            dict: {"orders": [...], "next_cursor": str 或 None, "scanned": 检查过的索引条目数}
+
+        Raises:
+            ValueError: 时间、游标格式或 limit 无效
+        """
+
+        limit = int(limit)
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit 需在 1 - {MAX_PAGE_SIZE} 之间")
+        start_ts = parse_timestamp(start) if start else None
+        end_ts = parse_range_end(end) if end else None
+        cursor_key = decode_cursor(cursor) if cursor else None
+
+        with self._lock:
+            keys = self._by_created if status is None else self._by_status.get(status, [])
+
+            # 日期范围和游标都转化为有序列表上的下标区间
+            lo = bisect_left(keys, (start_ts,)) if start_ts is not None else 0
+            hi = bisect_left(keys, (end_ts,)) if end_ts is not None else len(keys)
+            if cursor_key is not None:
+                if descending:
+                    hi = min(hi, bisect_left(keys, cursor_key))
+                else:
+                    lo = max(lo, bisect_right(keys, cursor_key))
+
+            positions = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+
+            # 金额和订单号前缀在区间内逐条过滤
+            orders = []
+            last_key = None
+            scanned = 0
+            for position in positions:
+                scanned += 1
+                key = keys[position]
+                order_id = key[1]
+                amount = self._entries[order_id][2]
+                if order_id_prefix and not order_id.startswith(order_id_prefix):
+                    continue
+                if min_amount is not None and amount < min_amount:
+                    continue
+                if max_amount is not None and amount > max_amount:
+                    continue
+                orders.append(dict(self._orders[order_id]))
+                last_key = key
+                if len(orders) >= limit:
+                    break
+
+            has_more = len(orders) >= limit and scanned < len(positions)
+            return {
+                "orders": orders,
+                "next_cursor": encode_cursor(last_key) if has_more else None,
+                "scanned": scanned
+            }
+
+
+def _remove_sorted(items, value):
+    position = bisect_left(items, value)
+    if position < len(items) and items[position] == value:
+        del items[position]
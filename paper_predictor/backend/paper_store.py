@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+论文数据冷热分层存储
+
+格式化数据 <VENUE>_<YEAR>_formatted.jsonl 拆分为两层：
+  - 热数据 <VENUE>_<YEAR>_scores.jsonl：每行只有 paper_id / 决策 / track / 评分和自信心，
+    load_historical_data 和模型训练只读这一层
+  - 冷数据 <VENUE>_<YEAR>_text.blob + <VENUE>_<YEAR>_text.idx：标题、摘要、关键词和评审对话，
+    blob 中每篇论文一段 JSON，idx 记录 paper_id -> [字节偏移, 长度]，按需随机读取单篇论文
+
+使用方法：
+    with TieredWriter("nips_history_data/ICLR_2024") as writer:
+        writer.write(formatted_paper)
+
+    store = PaperTextStore.open_for("nips_history_data/ICLR_2024_formatted.jsonl")
+    paper = store.get("123")
+"""
+
+import json
+import os
+from collections import OrderedDict
+from compressed_io import split_compression_suffix
+
+
+HOT_SUFFIX = "_scores.jsonl"
+COLD_BLOB_SUFFIX = "_text.blob"
+COLD_INDEX_SUFFIX = "_text.idx"
+FORMATTED_SUFFIX = "_formatted.jsonl"
+
+# 热数据保留的论文字段
+HOT_FIELDS = ("paper_id", "paper_decision", "paper_track")
+
+# 标题缓存的条目数（读取标题需要解析整篇冷数据，常被查询的论文缓存标题）
+TITLE_CACHE_SIZE = 4096
+
+
+def dataset_base(file_path):
+    """数据文件的公共前缀，如 nips_history_data/ICLR_2024_formatted.jsonl(.gz) -> nips_history_data/ICLR_2024"""
+    file_path = split_compression_suffix(file_path)[0]
+    for suffix in (FORMATTED_SUFFIX, HOT_SUFFIX, COLD_BLOB_SUFFIX, COLD_INDEX_SUFFIX):
+        if file_path.endswith(suffix):
+            return file_path[:-len(suffix)]
+    return os.path.splitext(file_path)[0]
+
+
+def hot_tier_path(file_path):
+    return dataset_base(file_path) + HOT_SUFFIX
+
+
+def cold_tier_paths(file_path):
+    base = dataset_base(file_path)
+    return base + COLD_BLOB_SUFFIX, base + COLD_INDEX_SUFFIX
+
+
+def hot_tier_is_current(file_path):
+    """热数据文件存在且不比原文件旧（原文件重新下载或重新生成后需要重新拆分）"""
+    hot_path = hot_tier_path(file_path)
+    if not os.path.exists(hot_path):
+        return False
+    return hot_path == file_path or not os.path.exists(file_path) or \
+        os.path.getmtime(hot_path) >= os.path.getmtime(file_path)
+
+
+def preferred_scores_file(file_path):
+    """热数据文件是最新的时优先读取热数据（热数据本身很小，不压缩），否则读取原文件"""
+    return hot_tier_path(file_path) if hot_tier_is_current(file_path) else file_path
+
+
+def resolve_paper_id(paper, line_num):
+    """论文ID：优先使用数据中的 paper_id / id，否则使用在文件中的行号"""
+    paper_id = paper.get('paper_id') or paper.get('id')
+    return str(paper_id) if paper_id else str(line_num)
+
+
+def split_paper(paper, paper_id):
+    """
+    把一篇格式化论文拆分为热数据和冷数据
+
+    Returns:
+        tuple: (热数据字典, 冷数据字典)
+    """
+
+    hot = {field: paper.get(field) for field in HOT_FIELDS}
+    hot["paper_id"] = paper_id
+    hot["reviews"] = [
+        {"rating": review.get("rating", "-1"), "confidence": review.get("confidence", "-1")}
+        for review in paper.get("reviews", [])
+        if isinstance(review, dict)
+    ]
+
+    cold = {key: value for key, value in paper.items() if key not in ("reviews", "paper_decision")}
+    cold["paper_id"] = paper_id
+    cold["reviews"] = [
+        {"reviewer": review.get("reviewer", ""), "dialogue": review.get("dialogue", [])}
+        for review in paper.get("reviews", [])
+        if isinstance(review, dict)
+    ]
+
+    return hot, cold
+
+
+class TieredWriter:
+    """同时写出热数据文件、冷数据 blob 和偏移索引（先写临时文件，全部成功后才替换正式文件）"""
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self.hot_path = base_path + HOT_SUFFIX
+        self.blob_path, self.index_path = base_path + COLD_BLOB_SUFFIX, base_path + COLD_INDEX_SUFFIX
+        self._hot = None
+        self._blob = None
+        self._offset = 0
+        self._index = {}
+
+    def _tmp_path(self, path):
+        return f"{path}.{os.getpid()}.tmp"
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.base_path) or ".", exist_ok=True)
+        self._hot = open(self._tmp_path(self.hot_path), 'w', encoding='utf-8')
+        self._blob = open(self._tmp_path(self.blob_path), 'wb')
+        self._offset = 0
+        self._index = {}
+        return self
+
+    def write(self, paper, paper_id=None):
+        """写入一篇格式化论文"""
+        if paper_id is None:
+            paper_id = resolve_paper_id(paper, len(self._index) + 1)
+
+        hot, cold = split_paper(paper, paper_id)
+        self._hot.write(json.dumps(hot, ensure_ascii=False) + '\n')
+
+        data = (json.dumps(cold, ensure_ascii=False) + '\n').encode('utf-8')
+        self._blob.write(data)
+        self._index[paper_id] = [self._offset, len(data)]
+        self._offset += len(data)
+
+    def __exit__(self, exc_type, exc, tb):
+        self._hot.close()
+        self._blob.close()
+        paths = (self.blob_path, self.index_path, self.hot_path)
+
+        if exc_type is None:
+            try:
+                with open(self._tmp_path(self.index_path), 'w', encoding='utf-8') as f:
+                    json.dump(self._index, f)
+                # 热数据最后替换：热数据存在即表示冷数据也已完整
+                for path in paths:
+                    os.replace(self._tmp_path(path), path)
+                return False
+            except OSError:
+                self._discard(paths)
+                raise
+
+        # 写入中途出错：丢弃临时文件，保留原有的正式文件
+        self._discard(paths)
+        return False
+
+    def _discard(self, paths):
+        for path in paths:
+            try:
+                os.remove(self._tmp_path(path))
+            except FileNotFoundError:
+                pass
+
+
+class PaperTextStore:
+    """按 paper_id 随机读取冷数据（标题、摘要、评审对话）"""
+
+    def __init__(self, blob_path, index_path):
+        self.blob_path = blob_path
+        with open(index_path, 'r', encoding='utf-8') as f:
+            self.index = json.load(f)
+        self._fd = os.open(blob_path, os.O_RDONLY)
+        self._titles = OrderedDict()
+
+    @classmethod
+    def open_for(cls, file_path):
+        """根据数据文件路径打开对应的冷数据，不存在时返回 None"""
+        blob_path, index_path = cold_tier_paths(file_path)
+        if not (os.path.exists(blob_path) and os.path.exists(index_path)):
+            return None
+        return cls(blob_path, index_path)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, paper_id):
+        return str(paper_id) in self.index
+
+    def get(self, paper_id):
+        """读取单篇论文的冷数据，不存在时返回 None"""
+        location = self.index.get(str(paper_id))
+        if location is None:
+            return None
+
+        offset, length = location
+        # os.pread 不移动文件位置，多线程并发读取安全
+        return json.loads(os.pread(self._fd, length, offset))
+
+    def get_title(self, paper_id):
+        """读取单篇论文的标题（LRU 缓存），不存在时返回 None"""
+        paper_id = str(paper_id)
+        if paper_id in self._titles:
+            self._titles.move_to_end(paper_id)
+            return self._titles[paper_id]
+
+        paper = self.get(paper_id)
+        title = paper.get("paper_title") if paper else None
+        self._titles[paper_id] = title
+        if len(self._titles) > TITLE_CACHE_SIZE:
+            self._titles.popitem(last=False)
+        return title
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+历史数据的多进程并行解析
+把未压缩的 JSONL 文件按换行对齐切分为若干字节区间，在进程池中并行解码评分和决策，
+再按区间顺序合并，结果（包括跳过的错误行及其行号）与逐行串行读取完全一致
+
+压缩文件无法按字节随机定位，小文件并行收益小于进程间传输开销，这两种情况走串行路径
+
+进程池只用于启动时的批量加载，用 forkserver（不支持时用 spawn）方式创建工作进程：
+服务运行中（已有事件循环、线程池和锁）直接 fork 可能复制处于加锁状态的锁；
+请求期间懒加载其他会议的数据时应传 parallel=False 串行解析。
+inference_service 的推理进程池用同一个 pool_context()
+
+使用方法（在 main.py 中）：
+    records, bad_lines = read_review_records("nips_history_data/ICLR_2024_formatted.jsonl")
+    ...
+    shutdown_pool()
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from compressed_io import detect_compression, open_binary
+from review_decoder import decode_review_line
+
+
+# 并行解析的工作进程数
+LOADER_WORKERS = int(os.environ.get("LOADER_WORKERS", os.cpu_count() or 1))
+
+# 小于该大小的文件直接串行解析
+PARALLEL_LOAD_MIN_BYTES = int(float(os.environ.get("PARALLEL_LOAD_MIN_MB", 16)) * 1024 * 1024)
+
+# 每个工作进程分到的区间数（区间更细，负载更均衡）
+CHUNKS_PER_WORKER = 4
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def pool_context():
+    """工作进程的启动方式：forkserver / spawn，不 fork 当前进程（推理服务的进程池同样使用）"""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _get_pool():
+    """进程池按需创建，多个年份并发加载时共用"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=LOADER_WORKERS, mp_context=pool_context())
+        return _pool
+
+
+def shutdown_pool():
+    """关闭解析进程池（批量加载完成后调用）"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+def decode_lines(lines, first_line_num=1):
+    """
+    逐行解码评分记录
+
+    Args:
+        lines: 可迭代的字节行
+        first_line_num: 第一行在文件中的行号
+
+    Returns:
+        tuple: (记录列表, [(行号, 错误信息)], 行数)
+    """
+
+    records = []
+    bad_lines = []
+    line_count = 0
+    for line_count, line in enumerate(lines, 1):
+        line = line.strip()
+        if line:
+            try:
+                records.append(decode_review_line(line))
+            except ValueError as e:
+                bad_lines.append((first_line_num + line_count - 1, str(e)))
+    return records, bad_lines, line_count
+
+
+def _decode_range(file_path, start, end):
+    """工作进程：解码 [start, end) 字节区间内的所有行，行号从区间内第 1 行开始计"""
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    lines = data.split(b'\n')
+    if data.endswith(b'\n'):
+        # 与文件逐行迭代一致：末尾换行不产生额外的空行
+        lines.pop()
+    return decode_lines(lines)
+
+
+def split_byte_ranges(file_path, num_chunks):
+    """
+    把文件切分为约 num_chunks 个按换行对齐的字节区间
+
+    Returns:
+        list: [(起始偏移, 结束偏移)]
+    """
+
+    file_size = os.path.getsize(file_path)
+    chunk_size = max(1, file_size // max(1, num_chunks))
+
+    ranges = []
+    start = 0
+    with open(file_path, 'rb') as f:
+        while start < file_size:
+            end = start + chunk_size
+            if end >= file_size:
+                end = file_size
+            else:
+                # 把区间末尾推进到下一个换行之后
+                f.seek(end)
+                f.readline()
+                end = min(f.tell(), file_size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def read_review_records(file_path, parallel=True):
+    """
+    读取历史数据文件中所有论文的评分、自信心和决策
+
+    Args:
+        file_path: 数据文件路径（压缩文件自动走串行路径）
+        parallel: 是否允许多进程并行解析
+
+    Returns:
+        tuple: (ReviewRecord 列表（文件顺序）, [(行号, 错误信息)]（按行号排序）)
+    """
+
+    use_parallel = (
+        parallel
+        and LOADER_WORKERS > 1
+        and os.path.getsize(file_path) >= PARALLEL_LOAD_MIN_BYTES
+        and detect_compression(file_path) is None
+    )
+
+    if not use_parallel:
+        with open_binary(file_path) as f:
+            records, bad_lines, _ = decode_lines(f)
+        return records, bad_lines
+
+    pool = _get_pool()
+    ranges = split_byte_ranges(file_path, LOADER_WORKERS * CHUNKS_PER_WORKER)
+    futures = [pool.submit(_decode_range, file_path, start, end) for start, end in ranges]
+
+    # 按区间顺序合并，区间内的行号加上之前所有区间的行数
+    records = []
+    bad_lines = []
+    lines_before = 0
+    for future in futures:
+        chunk_records, chunk_bad_lines, line_count = future.result()
+        records.extend(chunk_records)
+        bad_lines.extend((lines_before + line_num, error) for line_num, error in chunk_bad_lines)
+        lines_before += line_count
+
+    return records, bad_lines
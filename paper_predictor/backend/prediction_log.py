@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+"""
+预测事件日志
+每次 /predict 只向内存环形缓冲区追加一个元组（O(1)，不做 I/O）；后台任务定期把缓冲区批量写成
+列式分段文件（npz，字符串列做字典编码），再周期性地把新分段汇总进按小时和按天的聚合，
+管理接口只读取聚合结果，从不扫描原始事件
+
+目录结构（PREDICTION_LOG_DIR，默认 data/prediction_log）：
+    segments/pending/seg_<时间>_<pid>_<序号>.npz   尚未汇总的分段
+    segments/<日期>/seg_....npz                    已汇总的分段（保留 PREDICTION_LOG_RETENTION_DAYS 天）
+    rollups.json                                   小时 / 天聚合和已汇总分段的记录
+
+每个时间桶的聚合：请求数、错误数、延迟总和 / 最大值 / 直方图（估算 p50 / p95）、概率总和，
+以及会议、预测方式、评分组合的计数；多个工作进程共用同一目录，汇总时用文件锁互斥
+
+使用方法（在 main.py 中）：
+    prediction_log = PredictionLog.from_env()
+    await prediction_log.start()
+    prediction_log.record(conference, year, scores, probability, latency_ms, method)
+    prediction_log.query(granularity="hour", start="2025-01-01", end="2025-01-07")
+    await prediction_log.stop()
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:
+    # Windows 上没有 fcntl，单进程运行时不需要文件锁
+    fcntl = None
+
+
+# 延迟直方图的桶上界（毫秒），最后一个桶为 >= 5000ms
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# 每个时间桶最多保留的评分组合数（其余计入 "other"）
+MAX_PROFILES_PER_BUCKET = 200
+
+ERROR_METHOD = "error"
+
+ROLLUP_FILE = "rollups.json"
+
+
+def profile_key(scores):
+    """评分组合的规范形式：升序、逗号分隔，如 "5,6,8" """
+    return ",".join(f"{score:g}" for score in sorted(scores))
+
+
+def _empty_bucket():
+    return {
+        "count": 0,
+        "errors": 0,
+        "latency_ms_sum": 0.0,
+        "latency_ms_max": 0.0,
+        "latency_hist": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        "probability_sum": 0.0,
+        "conferences": {},
+        "methods": {},
+        "profiles": {}
+    }
+
+
+def _add_counts(target, counts):
+    for key, value in counts.items():
+        target[key] = target.get(key, 0) + value
+
+
+def _merge_bucket(target, source):
+    target["count"] += source["count"]
+    target["errors"] += source["errors"]
+    target["latency_ms_sum"] += source["latency_ms_sum"]
+    target["latency_ms_max"] = max(target["latency_ms_max"], source["latency_ms_max"])
+    target["latency_hist"] = [a + b for a, b in zip(target["latency_hist"], source["latency_hist"])]
+    target["probability_sum"] += source["probability_sum"]
+    _add_counts(target["conferences"], source["conferences"])
+    _add_counts(target["methods"], source["methods"])
+    _add_counts(target["profiles"], source["profiles"])
+    _trim_profiles(target["profiles"])
+
+
+def _trim_profiles(profiles):
+    if len(profiles) <= MAX_PROFILES_PER_BUCKET + 1:
+        return
+    other = profiles.pop("other", 0)
+    ranked = sorted(profiles.items(), key=lambda item: item[1], reverse=True)
+    profiles.clear()
+    profiles.update(ranked[:MAX_PROFILES_PER_BUCKET])
+    profiles["other"] = other + sum(count for _, count in ranked[MAX_PROFILES_PER_BUCKET:])
+
+
+def latency_percentile(hist, fraction):
+    """由直方图估算延迟分位数（返回所在桶的上界，毫秒）"""
+    total = sum(hist)
+    if total == 0:
+        return None
+    threshold = total * fraction
+    seen = 0
+    for i, count in enumerate(hist):
+        seen += count
+        if seen >= threshold:
+            break
+    # 最后一个桶没有上界，返回 5000（表示 >= 5000ms）
+    return LATENCY_BUCKETS_MS[min(i, len(LATENCY_BUCKETS_MS) - 1)]
+
+
+def write_segment(events, path):
+    """
+    把事件元组写成列式 npz 分段
+
+    Args:
+        events: [(时间戳, 会议, 年份, 评分元组, 概率, 延迟毫秒, 预测方式)]
+        path: 输出路径
+    """
+
+    import numpy as np
+
+    def encode(values):
+        labels = sorted(set(values))
+        codes = {label: code for code, label in enumerate(labels)}
+        return np.array(labels), np.fromiter((codes[v] for v in values), dtype=np.uint32, count=len(values))
+
+    timestamps, conferences, years, scores, probabilities, latencies, methods = zip(*events)
+    conference_labels, conference_codes = encode([f"{c} {y}" for c, y in zip(conferences, years)])
+    profile_labels, profile_codes = encode([profile_key(s) for s in scores])
+    method_labels, method_codes = encode(methods)
+
+    tmp_path = f"{path}.tmp.npz"
+    np.savez_compressed(
+        tmp_path,
+        timestamp=np.array(timestamps, dtype=np.float64),
+        probability=np.array(probabilities, dtype=np.float32),
+        latency_ms=np.array(latencies, dtype=np.float32),
+        conference_code=conference_codes,
+        conference_labels=conference_labels,
+        profile_code=profile_codes,
+        profile_labels=profile_labels,
+        method_code=method_codes,
+        method_labels=method_labels
+    )
+    os.replace(tmp_path, path)
+
+
+def rollup_segment(path):
+    """
+    按小时聚合一个分段
+
+    Returns:
+        dict: 小时起始时间（本地时间 ISO 字符串）-> 聚合
+    """
+
+    import numpy as np
+
+    with np.load(path) as segment:
+        columns = {name: segment[name] for name in segment.files}
+
+    timestamps = columns["timestamp"]
+    hours = (timestamps // 3600).astype(np.int64)
+    latency_bins = np.searchsorted(np.array(LATENCY_BUCKETS_MS, dtype=np.float32), columns["latency_ms"], side="right")
+    is_error = columns["method_labels"][columns["method_code"]] == ERROR_METHOD
+
+    def counts(codes, labels, mask):
+        values, value_counts = np.unique(codes[mask], return_counts=True)
+        return {str(labels[v]): int(n) for v, n in zip(values, value_counts)}
+
+    buckets = {}
+    for hour in np.unique(hours):
+        mask = hours == hour
+        ok = mask & ~is_error
+        probabilities = columns["probability"][ok]
+        latencies = columns["latency_ms"][mask]
+
+        bucket = _empty_bucket()
+        bucket["count"] = int(mask.sum())
+        bucket["errors"] = int((mask & is_error).sum())
+        bucket["latency_ms_sum"] = float(latencies.sum())
+        bucket["latency_ms_max"] = float(latencies.max())
+        bucket["latency_hist"] = np.bincount(latency_bins[mask], minlength=len(LATENCY_BUCKETS_MS) + 1).tolist()
+        bucket["probability_sum"] = float(probabilities.sum())
+        bucket["conferences"] = counts(columns["conference_code"], columns["conference_labels"], mask)
+        bucket["methods"] = counts(columns["method_code"], columns["method_labels"], mask)
+        bucket["profiles"] = counts(columns["profile_code"], columns["profile_labels"], ok)
+        _trim_profiles(bucket["profiles"])
+
+        hour_start = datetime.fromtimestamp(int(hour) * 3600).isoformat(timespec="minutes")
+        buckets[hour_start] = bucket
+    return buckets
+
+
+class PredictionLog:
+    """预测事件的环形缓冲区、分段写入和小时 / 天聚合"""
+
+    def __init__(self, log_dir="data/prediction_log", capacity=65536, flush_interval=5.0,
+                 rollup_interval=60.0, hourly_retention_days=14, retention_days=30):
+        self.log_dir = log_dir
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.rollup_interval = rollup_interval
+        self.hourly_retention_days = hourly_retention_days
+        self.retention_days = retention_days
+
+        self.pending_dir = os.path.join(log_dir, "segments", "pending")
+        self.rollup_path = os.path.join(log_dir, ROLLUP_FILE)
+
+        # deque(maxlen) 满了之后丢弃最旧的事件；append / popleft 在 CPython 中是原子操作
+        self._buffer = deque(maxlen=capacity)
+        self._task = None
+        self._sequence = 0
+        self._flush_lock = threading.Lock()
+
+        # 读取聚合文件的缓存：(修改时间, 内容)
+        self._rollup_cache = (None, None)
+
+        self._stats = {
+            "recorded": 0,
+            "dropped": 0,
+            "flushed": 0,
+            "segments": 0,
+            "rollups": 0,
+            "last_flush_ms": 0.0,
+            "last_rollup_ms": 0.0,
+            "errors": 0
+        }
+
+    @classmethod
+    def from_env(cls):
+        """根据环境变量创建事件日志"""
+        return cls(
+            log_dir=os.environ.get("PREDICTION_LOG_DIR", "data/prediction_log"),
+            capacity=int(os.environ.get("PREDICTION_LOG_CAPACITY", 65536)),
+            flush_interval=float(os.environ.get("PREDICTION_LOG_FLUSH_SECONDS", 5)),
+            rollup_interval=float(os.environ.get("PREDICTION_LOG_ROLLUP_SECONDS", 60)),
+            hourly_retention_days=int(os.environ.get("PREDICTION_LOG_HOURLY_RETENTION_DAYS", 14)),
+            retention_days=int(os.environ.get("PREDICTION_LOG_RETENTION_DAYS", 30))
+        )
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def record(self, conference, year, scores, probability, latency_ms, method):
+        """记录一次预测（请求路径上只做一次 deque.append）"""
+        if len(self._buffer) == self.capacity:
+            self._stats["dropped"] += 1
+        self._buffer.append((time.time(), conference, str(year), tuple(scores),
+                             probability, latency_ms, method))
+        self._stats["recorded"] += 1
+
+    async def start(self):
+        if self.running:
+            return
+        os.makedirs(self.pending_dir, exist_ok=True)
+        self._task = asyncio.create_task(self._run())
+        print(f"📝 预测事件日志: {self.log_dir}（每 {self.flush_interval:g}s 写入，每 {self.rollup_interval:g}s 汇总）")
+
+    async def stop(self):
+        """停止后台任务，写出缓冲区剩余事件并做最后一次汇总"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.flush)
+        await loop.run_in_executor(None, self.rollup)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_rollup = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                # 文件写入和聚合在线程池中执行，不阻塞事件循环
+                await loop.run_in_executor(None, self.flush)
+                if time.monotonic() - last_rollup >= self.rollup_interval:
+                    last_rollup = time.monotonic()
+                    await loop.run_in_executor(None, self.rollup)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"⚠️  预测事件日志写入失败: {e}")
+
+    def flush(self):
+        """
+        把缓冲区中的事件写成一个分段
+
+        Returns:
+            int: 写入的事件数
+        """
+
+        with self._flush_lock:
+            events = []
+            while self._buffer:
+                events.append(self._buffer.popleft())
+            if not events:
+                return 0
+
+            start = time.perf_counter()
+            self._sequence += 1
+            stamp = datetime.fromtimestamp(events[0][0]).strftime("%Y%m%dT%H%M%S")
+            os.makedirs(self.pending_dir, exist_ok=True)
+            path = os.path.join(self.pending_dir, f"seg_{stamp}_{os.getpid()}_{self._sequence:06d}.npz")
+            write_segment(events, path)
+
+            self._stats["flushed"] += len(events)
+            self._stats["segments"] += 1
+            self._stats["last_flush_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return len(events)
+
+    def _load_rollups(self):
+        try:
+            with open(self.rollup_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"hourly": {}, "daily": {}, "applied": [], "updated_at": None}
+
+    def rollup(self):
+        """
+        把待汇总的分段合并进小时 / 天聚合，然后归档分段（多个工作进程通过文件锁互斥）
+
+        先在同一次原子写入中记录已汇总的分段名，再移动分段文件；中途崩溃后重新执行不会重复计数
+
+        Returns:
+            int: 本次汇总的分段数
+        """
+
+        os.makedirs(self.pending_dir, exist_ok=True)
+        with open(os.path.join(self.log_dir, ".rollup.lock"), 'w') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            start = time.perf_counter()
+            state = self._load_rollups()
+            applied = set(state["applied"])
+            pending = sorted(name for name in os.listdir(self.pending_dir) if name.endswith(".npz")
+                             and not name.endswith(".tmp.npz"))
+            new_segments = [name for name in pending if name not in applied]
+
+            for name in new_segments:
+                for hour_start, bucket in rollup_segment(os.path.join(self.pending_dir, name)).items():
+                    _merge_bucket(state["hourly"].setdefault(hour_start, _empty_bucket()), bucket)
+                    _merge_bucket(state["daily"].setdefault(hour_start[:10], _empty_bucket()), bucket)
+
+            if new_segments:
+                hourly_cutoff = (datetime.now() - timedelta(days=self.hourly_retention_days)).isoformat(
+                    timespec="minutes")
+                state["hourly"] = {key: value for key, value in state["hourly"].items() if key >= hourly_cutoff}
+                state["applied"] = sorted(applied | set(new_segments))
+                state["updated_at"] = datetime.now().isoformat()
+
+                tmp_path = f"{self.rollup_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.rollup_path)
+
+            # 归档已汇总的分段（按日期分目录）
+            archived = []
+            for name in pending:
+                day = f"{name[4:8]}-{name[8:10]}-{name[10:12]}"
+                archive_dir = os.path.join(self.log_dir, "segments", day)
+                os.makedirs(archive_dir, exist_ok=True)
+                os.replace(os.path.join(self.pending_dir, name), os.path.join(archive_dir, name))
+                archived.append(name)
+
+            if archived:
+                state["applied"] = sorted(set(state["applied"]) - set(archived))
+                tmp_path = f"{self.rollup_path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.rollup_path)
+
+            self._remove_expired_segments()
+
+        if new_segments:
+            self._stats["rollups"] += 1
+            self._stats["last_rollup_ms"] = round((time.perf_counter() - start) * 1000, 2)
+        return len(new_segments)
+
+    def _remove_expired_segments(self):
+        cutoff = (date.today() - timedelta(days=self.retention_days)).isoformat()
+        segments_dir = os.path.join(self.log_dir, "segments")
+        for day in os.listdir(segments_dir):
+            if day != "pending" and day < cutoff:
+                day_dir = os.path.join(segments_dir, day)
+                for name in os.listdir(day_dir):
+                    os.remove(os.path.join(day_dir, name))
+                os.rmdir(day_dir)
+
+    def rollups(self):
+        """读取聚合文件（按修改时间缓存）"""
+        try:
+            mtime = os.path.getmtime(self.rollup_path)
+        except OSError:
+            return self._load_rollups()
+
+        cached_mtime, cached = self._rollup_cache
+        if cached_mtime != mtime:
+            cached = self._load_rollups()
+            self._rollup_cache = (mtime, cached)
+        return cached
+
+    def query(self, granularity="hour", start=None, end=None, top=10):
+        """
+        查询聚合结果
+
+        Args:
+            granularity: hour 或 day
+            start, end: 时间范围 [start, end]，ISO 格式的日期或时间
+            top: 返回最常见的评分组合数
+
+        Returns:
+            dict: 每个时间桶的请求数、错误数、平均 / p50 / p95 / 最大延迟、平均概率、预测方式和会议分布，
+                  以及整个范围内最常见的评分组合
+
+        Raises:
+            ValueError: granularity 无效
+        """
+
+        if granularity not in ("hour", "day"):
+            raise ValueError("granularity 只能是 hour 或 day")
+
+        buckets = self.rollups()["hourly" if granularity == "hour" else "daily"]
+        key_length = 16 if granularity == "hour" else 10
+
+        total = _empty_bucket()
+        rows = []
+        for key in sorted(buckets):
+            if start and key < start[:key_length]:
+                continue
+            if end and key > end[:key_length]:
+                continue
+            bucket = buckets[key]
+            _merge_bucket(total, bucket)
+            rows.append({"bucket": key, **_summarize(bucket)})
+
+        top_profiles = sorted(((profile, count) for profile, count in total["profiles"].items() if profile != "other"),
+                              key=lambda item: item[1], reverse=True)[:top]
+        return {
+            "granularity": granularity,
+            "buckets": rows,
+            "total": _summarize(total),
+            "top_profiles": [{"profile": profile, "count": count} for profile, count in top_profiles]
+        }
+
+    def metrics(self):
+        return {"running": self.running, "buffered": len(self._buffer), "capacity": self.capacity, **self._stats}
+
+
+def _summarize(bucket):
+    count = bucket["count"]
+    successes = count - bucket["errors"]
+    return {
+        "count": count,
+        "errors": bucket["errors"],
+        "avg_latency_ms": round(bucket["latency_ms_sum"] / count, 2) if count else None,
+        "p50_latency_ms": latency_percentile(bucket["latency_hist"], 0.5),
+        "p95_latency_ms": latency_percentile(bucket["latency_hist"], 0.95),
+        "max_latency_ms": round(bucket["latency_ms_max"], 2),
+        "avg_probability": round(bucket["probability_sum"] / successes, 4) if successes else None,
+        "methods": bucket["methods"],
+        "conferences": bucket["conferences"]
+    }
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+只读接口的响应缓存
+每个资源保存预先编码好的 JSON 字节和强 ETag，数据变化时调用 invalidate() 提升版本，
+下次请求时才重新生成；带 If-None-Match 的条件请求直接返回 304 Not Modified
+
+ETag 只由响应内容的摘要决定（不含进程内的版本号），多个工作进程对相同内容返回相同的 ETag，
+负载均衡到另一个进程的条件请求同样能命中 304；内容随每次请求变化的接口（如带时间戳）不应登记
+
+使用方法（在 main.py 中）：
+    response_cache.register("settings", lambda: current_settings, cache_control="public, max-age=0, s-maxage=30")
+    response_cache.invalidate("settings")        # 保存设置后
+    return response_cache.respond(request, "settings")
+"""
+
+import hashlib
+import json
+
+from fastapi import Request, Response
+
+
+DEFAULT_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+
+def encode_json(content):
+    """与 FastAPI 默认 JSONResponse 相同的编码方式"""
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":")
+    ).encode("utf-8")
+
+
+class ResponseCache:
+    """按资源名管理预编码响应和版本化 ETag"""
+
+    def __init__(self, encoder=encode_json):
+        self.encoder = encoder
+        # 资源名 -> {"builder", "cache_control"}
+        self._resources = {}
+        # 资源名 -> 版本号（每次 invalidate 加一）
+        self._versions = {}
+        # 资源名 -> (版本号, 字节, ETag)
+        self._entries = {}
+
+        self.stats = {"hits": 0, "builds": 0, "not_modified": 0}
+
+    def register(self, name, builder, cache_control=DEFAULT_CACHE_CONTROL):
+        """
+        登记一个可缓存资源
+
+        Args:
+            name: 资源名
+            builder: 无参函数，返回可 JSON 序列化的内容
+            cache_control: 响应的 Cache-Control 头
+        """
+
+        self._resources[name] = {"builder": builder, "cache_control": cache_control}
+        self._versions.setdefault(name, 0)
+
+    def invalidate(self, *names):
+        """数据变化时提升资源版本（不传参数则全部失效）"""
+        for name in names or list(self._resources.keys()):
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def invalidate_prefix(self, prefix):
+        """使名称以 prefix 开头的所有资源失效（如按数据集登记的资源）"""
+        for name in self._resources:
+            if name.startswith(prefix):
+                self._versions[name] = self._versions.get(name, 0) + 1
+
+    def has(self, name):
+        return name in self._resources
+
+    def get(self, name):
+        """返回 (字节, ETag)，版本变化后才重新生成"""
+        version = self._versions[name]
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version:
+            self.stats["hits"] += 1
+            return entry[1], entry[2]
+
+        body = self.encoder(self._resources[name]["builder"]())
+        etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+        self._entries[name] = (version, body, etag)
+        self.stats["builds"] += 1
+        return body, etag
+
+    def respond(self, request: Request, name):
+        """生成响应：ETag 匹配时返回 304，否则返回预编码的 JSON"""
+        body, etag = self.get(name)
+        headers = {
+            "ETag": etag,
+            "Cache-Control": self._resources[name]["cache_control"]
+        }
+
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            self.stats["not_modified"] += 1
+            return Response(status_code=304, headers=headers)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match, etag):
+    """判断 If-None-Match 是否命中当前 ETag（支持多个值和 *）"""
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # 弱比较：忽略 W/ 前缀
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+
+    return False
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+评审记录解码器
+所有模块共用的评分解析逻辑：只提取 rating / confidence / paper_decision，
+丢弃体积最大的 dialogue 数组，并在安装了 orjson 时使用更快的 JSON 后端（直接解析 bytes）
+
+评分规则（全部模块一致）：
+  - rating / confidence 可以是数字或 "6: marginally above" 这类带说明的字符串，取冒号前的数字
+  - 空值和 "-1" 视为缺失
+  - rating 有效范围 1-10，confidence 有效范围 1-5
+"""
+
+import json
+from array import array
+from collections import namedtuple
+
+try:
+    import orjson
+    _loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    orjson = None
+    _loads = json.loads
+    JSON_BACKEND = "json"
+
+
+# paper_id: 数据中的 paper_id / id，没有时为 None
+ReviewRecord = namedtuple("ReviewRecord", ["scores", "confidences", "decision", "paper_id"], defaults=(None,))
+
+
+def parse_rating(value, low=1, high=10):
+    """
+    解析单个评分
+
+    Args:
+        value: 原始值，如 8、"8"、"6: marginally above the acceptance threshold"
+        low: 有效下限
+        high: 有效上限
+
+    Returns:
+        float: 有效评分，缺失或无效时返回 None
+    """
+
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        score = float(value)
+    else:
+        text = str(value).split(':', 1)[0].strip()
+        if not text or text == '-1':
+            return None
+        try:
+            score = float(text)
+        except ValueError:
+            return None
+
+    if low <= score <= high:
+        return score
+    return None
+
+
+def parse_confidence(value):
+    """解析自信心（有效范围 1-5）"""
+    return parse_rating(value, low=1, high=5)
+
+
+def extract_review_scores(paper):
+    """
+    从已解析的论文字典中提取评分、自信心和决策
+
+    Args:
+        paper: 论文字典
+
+    Returns:
+        ReviewRecord: scores / confidences 为 array('d')，decision 为小写字符串，paper_id 为字符串或 None
+    """
+
+    scores = array('d')
+    confidences = array('d')
+
+    reviews = paper.get('reviews') if isinstance(paper, dict) else None
+    if isinstance(reviews, list):
+        for review in reviews:
+            if not isinstance(review, dict):
+                continue
+
+            score = parse_rating(review.get('rating'))
+            if score is not None:
+                scores.append(score)
+
+            confidence = parse_confidence(review.get('confidence'))
+            if confidence is not None:
+                confidences.append(confidence)
+
+    if not isinstance(paper, dict):
+        return ReviewRecord(scores, confidences, '')
+
+    decision = paper.get('paper_decision')
+    paper_id = paper.get('paper_id') or paper.get('id')
+    return ReviewRecord(scores, confidences, str(decision or '').lower(), str(paper_id) if paper_id else None)
+
+
+def drop_dialogue(paper):
+    """把论文字典中每条评审的 dialogue 替换为空列表，释放大段对话文本"""
+    reviews = paper.get('reviews') if isinstance(paper, dict) else None
+    if isinstance(reviews, list):
+        for review in reviews:
+            if isinstance(review, dict) and review.get('dialogue'):
+                review['dialogue'] = []
+    return paper
+
+
+def load_skeleton(line):
+    """
+    解析一行论文 JSON，并立即丢弃 dialogue 内容
+
+    orjson 直接解析 bytes，不需要先解码为 str；
+    逐字符跳过 dialogue 的纯 Python 扫描实测比 C 解析器更慢，所以由 C 后端解析后立即丢弃
+
+    Args:
+        line: JSONL 中的一行（str 或 bytes）
+
+    Returns:
+        dict: 不含 dialogue 内容的论文字典
+
+    Raises:
+        ValueError: JSON 格式错误（json.JSONDecodeError / orjson.JSONDecodeError）
+    """
+
+    if orjson is None and isinstance(line, (bytes, bytearray)):
+        line = line.decode('utf-8')
+    return drop_dialogue(_loads(line))
+
+
+def decode_review_line(line):
+    """解析一行论文 JSON，只返回评分、自信心和决策"""
+    return extract_review_scores(load_skeleton(line))
+
+
+def benchmark_file(file_path, limit=None):
+    """
+    对比逐行 json.loads 与本解码器的吞吐量
+
+    Returns:
+        dict: 两种方式的 行/秒、MB/秒，以及结果是否一致
+    """
+
+    import time
+    from compressed_io import open_binary
+
+    raw_lines = []
+    total_bytes = 0
+    with open_binary(file_path) as f:
+        for line in f:
+            if line.strip():
+                raw_lines.append(line)
+                total_bytes += len(line)
+                if limit and len(raw_lines) >= limit:
+                    break
+
+    def baseline(line):
+        # 原实现：按文本读取后 json.loads 整行
+        return extract_review_scores(json.loads(line.decode('utf-8')))
+
+    results = {}
+    outputs = {}
+    for name, decode in (("json.loads", baseline), ("review_decoder", decode_review_line)):
+        start = time.perf_counter()
+        decoded = []
+        for line in raw_lines:
+            try:
+                decoded.append(decode(line))
+            except ValueError:
+                decoded.append(None)
+        elapsed = time.perf_counter() - start
+        outputs[name] = decoded
+        results[name] = {
+            "lines_per_sec": len(raw_lines) / elapsed if elapsed else 0,
+            "mb_per_sec": total_bytes / 1024 / 1024 / elapsed if elapsed else 0
+        }
+
+    results["lines"] = len(raw_lines)
+    results["backend"] = JSON_BACKEND
+    results["identical"] = outputs["json.loads"] == outputs["review_decoder"]
+    return results
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+规则概率计算
+/predict 的规则算法：按正分（> 4）、负分（< 3）个数和平均分依次匹配规则，命中的规则在给定区间内
+随机取概率；都不命中时按平均分线性插值。同一套规则有两种实现：
+  - rule_probability: 单组评分（/predict 使用）
+  - rule_probability_batch: 多组评分的 NumPy 向量化版本（/simulate 一次评估数千个样本）
+
+使用方法：
+    probability, rule = rule_probability([5, 6, 8])
+    probabilities, rule_ids = rule_probability_batch(score_matrix, rng=np.random.default_rng())
+"""
+
+import random
+
+
+POSITIVE_THRESHOLD = 4
+NEGATIVE_THRESHOLD = 3
+
+# 按匹配顺序排列：(规则名, 概率下限, 概率上限, 日志模板)
+RULES = (
+    ("all_positive", 0.97, 0.99, "✅ 规则3命中: 全是正分, 概率: {p:.3f}"),
+    ("all_negative", 0.0, 0.01, "❌ 规则4命中: 全是负分, 概率: {p:.3f}"),
+    ("three_negative", 0.00, 0.01, "❌ 规则6命中: {neg}个负分, 概率: {p:.3f}"),
+    ("two_negative", 0.02, 0.04, "⚠️  规则8命中: 2个负分, 概率: {p:.3f}"),
+    ("more_negative", 0.02, 0.05, "❌ 规则5命中: 负分({neg}) > 正分({pos}), 概率: {p:.3f}"),
+    ("more_positive", 0.80, 0.90, "❌ 规则5命中: 正分({pos}) > 负分({neg}),概率: {p:.3f}"),
+    ("low_mean", 0.00, 0.02, "❌ 规则2命中: 均值{avg:.2f} <= 4, 概率: {p:.3f}"),
+    ("high_mean", 0.85, 0.88, "✅ 规则1命中: 均值{avg:.2f} > 6, 概率: {p:.3f}"),
+    ("only_three_four", 0.35, 0.40, "✅ 规则9命中: 全是5,6分, 概率: {p:.3f}"),
+)
+
+DEFAULT_RULE = "linear"
+RULE_NAMES = tuple(rule[0] for rule in RULES) + (DEFAULT_RULE,)
+
+
+def linear_probability(avg_score):
+    """默认情况：均值 3 -> 0.25，均值 5 -> 0.75 线性插值（低于 3 时为 0.25）"""
+    if avg_score >= 3:
+        return (avg_score - 3) / (5 - 3) * (0.75 - 0.25) + 0.25
+    return 0.25
+
+
+def match_rule(scores):
+    """
+    匹配规则
+
+    Returns:
+        int: RULES 中的下标，都不命中时为 len(RULES)
+    """
+
+    count = len(scores)
+    avg_score = sum(scores) / count
+    positive_scores = sum(1 for score in scores if score > POSITIVE_THRESHOLD)
+    negative_scores = sum(1 for score in scores if score < NEGATIVE_THRESHOLD)
+
+    conditions = (
+        positive_scores == count,
+        negative_scores == count,
+        negative_scores >= 3,
+        negative_scores == 2,
+        negative_scores > positive_scores,
+        positive_scores > negative_scores,
+        avg_score <= 3,
+        avg_score >= 3.75,
+        all(score in [3, 4] for score in scores)
+    )
+    for rule_id, matched in enumerate(conditions):
+        if matched:
+            return rule_id
+    return len(RULES)
+
+
+def rule_probability(scores, uniform=random.uniform, verbose=False):
+    """
+    单组评分的规则概率
+
+    Args:
+        scores: 评分列表（非空）
+        uniform: 区间内取随机数的函数
+        verbose: 是否打印命中的规则
+
+    Returns:
+        tuple: (概率, 规则名)
+    """
+
+    rule_id = match_rule(scores)
+    avg_score = sum(scores) / len(scores)
+
+    if rule_id == len(RULES):
+        probability = linear_probability(avg_score)
+        if verbose:
+            print(f"📐 默认线性插值: 均值{avg_score:.2f}, 概率: {probability:.3f}")
+        return probability, DEFAULT_RULE
+
+    name, low, high, message = RULES[rule_id]
+    probability = uniform(low, high)
+    if verbose:
+        print(message.format(
+            p=probability,
+            avg=avg_score,
+            pos=sum(1 for score in scores if score > POSITIVE_THRESHOLD),
+            neg=sum(1 for score in scores if score < NEGATIVE_THRESHOLD)
+        ))
+    return probability, name
+
+
+def rule_probability_batch(score_matrix, rng=None):
+    """
+    多组评分的规则概率（与 rule_probability 规则完全相同）
+
+    Args:
+        score_matrix: 形状 (样本数, 评审数) 的评分矩阵，评审数不足的位置填 NaN
+        rng: numpy.random.Generator（默认新建）
+
+    Returns:
+        tuple: (概率数组, 规则下标数组（RULE_NAMES 中的下标）)
+    """
+
+    import numpy as np
+
+    scores = np.asarray(score_matrix, dtype=np.float64)
+    if rng is None:
+        rng = np.random.default_rng()
+
+    present = ~np.isnan(scores)
+    count = present.sum(axis=1)
+    avg_score = np.nansum(scores, axis=1) / count
+    with np.errstate(invalid='ignore'):
+        positive_scores = (scores > POSITIVE_THRESHOLD).sum(axis=1)
+        negative_scores = (scores < NEGATIVE_THRESHOLD).sum(axis=1)
+        only_three_four = ((scores == 3) | (scores == 4)).sum(axis=1) == count
+
+    conditions = [
+        positive_scores == count,
+        negative_scores == count,
+        negative_scores >= 3,
+        negative_scores == 2,
+        negative_scores > positive_scores,
+        positive_scores > negative_scores,
+        avg_score <= 3,
+        avg_score >= 3.75,
+        only_three_four
+    ]
+    rule_ids = np.select(conditions, np.arange(len(RULES)), default=len(RULES))
+
+    lows = np.array([rule[1] for rule in RULES] + [0.0])[rule_ids]
+    highs = np.array([rule[2] for rule in RULES] + [0.0])[rule_ids]
+    probabilities = lows + rng.random(len(scores)) * (highs - lows)
+
+    default = rule_ids == len(RULES)
+    probabilities[default] = np.where(
+        avg_score[default] >= 3,
+        (avg_score[default] - 3) / (5 - 3) * (0.75 - 0.25) + 0.25,
+        0.25
+    )
+    return probabilities, rule_ids
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+历史数据的紧凑列式存储（struct-of-arrays）
+每个 (会议, 年份) 数据集只保存几列连续的 numpy 数组，代替每篇论文一个字典：
+  - avg_scores:     float32，平均分，升序排列
+  - score_values:   int8，所有论文的评分首尾相接（以半分为单位，即评分 x2），配合 score_offsets 切分
+  - score_offsets:  int32，第 i 篇论文的评分为 score_values[score_offsets[i]:score_offsets[i + 1]]
+  - decision_codes: uint8，决策字符串在 decision_labels 中的编号
+  - accepted_mask:  bool，是否被接受（接受论文不再单独复制一份）
+  - accepted_cumsum: int32，按平均分升序的接受论文累计数，O(log n) 计算接受论文中的排名
+  - paper_id_bytes: uint8，所有论文ID的 UTF-8 字节首尾相接（数据中没有ID时为文件中的序号），配合
+                    paper_id_offsets 切分，用于到冷数据中读取标题（不按最长ID补齐，每字符 1 字节而不是 4 字节）
+  - confidence_means: float32，平均自信心（没有自信心时为 NaN）
+
+使用方法：
+    columns = ScoreColumns.from_records(records)
+    rank_in_all, rank_in_accepted = columns.rank_of(6.33)
+"""
+
+import numpy as np
+
+
+# 评分以半分为单位存为 int8（1-10 分 -> 2-20）
+SCORE_SCALE = 2
+
+# 平均分分布的分桶：1.0 - 10.0，每 0.25 分一桶
+DISTRIBUTION_MIN = 1.0
+DISTRIBUTION_MAX = 10.0
+DISTRIBUTION_BIN_WIDTH = 0.25
+
+# 分布摘要中的分位点
+DISTRIBUTION_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+class ScoreColumns:
+    """单个数据集的列式评分数据"""
+
+    def __init__(self, avg_scores, score_values, score_offsets, decision_codes, decision_labels,
+                 paper_id_bytes=None, paper_id_offsets=None, confidence_means=None):
+        self.avg_scores = avg_scores
+        self.score_values = score_values
+        self.score_offsets = score_offsets
+        self.decision_codes = decision_codes
+        self.decision_labels = decision_labels
+        if paper_id_bytes is None:
+            paper_id_bytes = np.zeros(0, dtype=np.uint8)
+            paper_id_offsets = np.zeros(len(avg_scores) + 1, dtype=np.int32)
+        self.paper_id_bytes = paper_id_bytes
+        self.paper_id_offsets = paper_id_offsets
+        self.confidence_means = (confidence_means if confidence_means is not None
+                                 else np.full(len(avg_scores), np.nan, dtype=np.float32))
+
+        label_accepted = np.array(['accept' in label for label in decision_labels], dtype=bool)
+        self.accepted_mask = label_accepted[decision_codes] if len(decision_codes) else np.zeros(0, dtype=bool)
+
+        self.accepted_cumsum = np.zeros(len(avg_scores) + 1, dtype=np.int32)
+        np.cumsum(self.accepted_mask, out=self.accepted_cumsum[1:])
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        由解码后的评审记录构建（没有有效评分的论文跳过）
+
+        Args:
+            records: ReviewRecord 列表
+
+        Returns:
+            ScoreColumns
+        """
+
+        # 没有 paper_id 时使用在文件中的序号（与拆分冷热数据时的编号一致）
+        paper_ids = [record.paper_id or str(position)
+                     for position, record in enumerate(records, 1) if record.scores]
+        records = [record for record in records if record.scores]
+
+        counts = np.fromiter((len(record.scores) for record in records), dtype=np.int32, count=len(records))
+        offsets = np.zeros(len(records) + 1, dtype=np.int32)
+        np.cumsum(counts, out=offsets[1:])
+
+        values = np.empty(int(offsets[-1]), dtype=np.float64)
+        for i, record in enumerate(records):
+            values[offsets[i]:offsets[i + 1]] = record.scores
+
+        # 平均分用原始评分计算，再按平均分升序（稳定排序）重排所有列
+        if len(records):
+            avg_scores = (np.add.reduceat(values, offsets[:-1]) / counts).astype(np.float32)
+        else:
+            avg_scores = np.zeros(0, dtype=np.float32)
+        order = np.argsort(avg_scores, kind='stable')
+
+        decision_labels = sorted({record.decision for record in records})
+        label_codes = {label: code for code, label in enumerate(decision_labels)}
+        code_dtype = np.uint8 if len(decision_labels) <= 256 else np.uint16
+        decision_codes = np.fromiter((label_codes[record.decision] for record in records),
+                                     dtype=code_dtype, count=len(records))
+
+        confidence_means = np.fromiter(
+            (sum(record.confidences) / len(record.confidences) if record.confidences else np.nan
+             for record in records),
+            dtype=np.float32, count=len(records))
+
+        sorted_counts = counts[order]
+        sorted_offsets = np.zeros(len(records) + 1, dtype=np.int32)
+        np.cumsum(sorted_counts, out=sorted_offsets[1:])
+
+        # 评分按新顺序拼接：每个位置取原数组中对应论文的评分
+        source_index = np.repeat(offsets[:-1][order] - sorted_offsets[:-1], sorted_counts) + np.arange(
+            int(sorted_offsets[-1]), dtype=np.int64)
+        score_values = np.rint(values[source_index] * SCORE_SCALE).astype(np.int8)
+
+        # 论文ID按新顺序拼接为一个字节缓冲区
+        encoded = [paper_ids[i].encode('utf-8') for i in order]
+        id_offsets = np.zeros(len(encoded) + 1, dtype=np.int32)
+        np.cumsum(np.fromiter(map(len, encoded), dtype=np.int32, count=len(encoded)), out=id_offsets[1:])
+        id_bytes = np.frombuffer(b"".join(encoded), dtype=np.uint8).copy()
+
+        return cls(avg_scores[order], score_values, sorted_offsets, decision_codes[order], decision_labels,
+                   paper_id_bytes=id_bytes, paper_id_offsets=id_offsets,
+                   confidence_means=confidence_means[order])
+
+    def __len__(self):
+        return len(self.avg_scores)
+
+    @property
+    def accepted_count(self):
+        return int(self.accepted_cumsum[-1])
+
+    def rank_of(self, avg_score):
+        """
+        平均分在历史数据中的排名（比它高的论文数 + 1）
+
+        Returns:
+            tuple: (在所有论文中的排名, 在接受论文中的排名)
+        """
+
+        # 与存储精度一致地比较，相同评分组合的平均分视为相等
+        position = int(np.searchsorted(self.avg_scores, np.float32(avg_score), side='right'))
+        rank_in_all = len(self.avg_scores) - position + 1
+        rank_in_accepted = self.accepted_count - int(self.accepted_cumsum[position]) + 1
+        return rank_in_all, rank_in_accepted
+
+    def rank_of_many(self, avg_scores):
+        """
+        rank_of 的向量化版本
+
+        Args:
+            avg_scores: 平均分数组
+
+        Returns:
+            tuple: (在所有论文中的排名数组, 在接受论文中的排名数组)
+        """
+
+        positions = np.searchsorted(self.avg_scores, np.asarray(avg_scores, dtype=np.float32), side='right')
+        rank_in_all = len(self.avg_scores) - positions + 1
+        rank_in_accepted = self.accepted_count - self.accepted_cumsum[positions] + 1
+        return rank_in_all, rank_in_accepted
+
+    def rating_distribution(self):
+        """
+        所有单条评分的经验分布
+
+        Returns:
+            tuple: (出现过的评分值数组, 对应的概率数组)
+        """
+
+        counts = np.bincount(self.score_values.astype(np.int64), minlength=10 * SCORE_SCALE + 1)
+        present = np.nonzero(counts)[0]
+        return present / SCORE_SCALE, counts[present] / counts.sum()
+
+    def scores_of(self, index):
+        """第 index 篇论文（按平均分升序）的评分"""
+        start, end = self.score_offsets[index], self.score_offsets[index + 1]
+        return self.score_values[start:end].astype(np.float64) / SCORE_SCALE
+
+    def paper_id_of(self, index):
+        """第 index 篇论文（按平均分升序）的论文ID"""
+        start, end = self.paper_id_offsets[index], self.paper_id_offsets[index + 1]
+        return self.paper_id_bytes[start:end].tobytes().decode('utf-8')
+
+    def paper_id_list(self):
+        """所有论文ID（按平均分升序），一次解码整个缓冲区后切分"""
+        text = self.paper_id_bytes.tobytes()
+        offsets = self.paper_id_offsets.tolist()
+        return [text[start:end].decode('utf-8') for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def decision_of(self, index):
+        return self.decision_labels[self.decision_codes[index]]
+
+    def distribution(self):
+        """
+        平均分分布（供前端绘图，加载时计算一次）
+
+        Returns:
+            dict:
+              - edges: 分桶边界 1.0, 1.25, ..., 10.0（最后一桶包含 10.0）
+              - counts / accepted_counts: 每桶的论文数和接受数
+              - acceptance_rate: 每桶的接受率（空桶为 None）
+              - cdf / accepted_cdf: 平均分 <= 各边界的论文比例（全部 / 接受论文），
+                用户平均分对应的百分位由 cdf 插值得到
+              - quantiles: 平均分的分位数
+        """
+
+        num_bins = int(round((DISTRIBUTION_MAX - DISTRIBUTION_MIN) / DISTRIBUTION_BIN_WIDTH))
+        edges = DISTRIBUTION_MIN + DISTRIBUTION_BIN_WIDTH * np.arange(num_bins + 1)
+
+        counts = np.histogram(self.avg_scores, bins=edges)[0]
+        accepted_counts = np.histogram(self.avg_scores[self.accepted_mask], bins=edges)[0]
+
+        # 与 rank_of 一致地按存储精度比较
+        positions = np.searchsorted(self.avg_scores, edges.astype(np.float32), side='right')
+        total = len(self.avg_scores)
+        accepted_total = self.accepted_count
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rates = accepted_counts / counts
+
+        return {
+            "bin_width": DISTRIBUTION_BIN_WIDTH,
+            "edges": np.round(edges, 2).tolist(),
+            "counts": counts.tolist(),
+            "accepted_counts": accepted_counts.tolist(),
+            "acceptance_rate": [None if count == 0 else round(float(rate), 4) for count, rate in zip(counts, rates)],
+            "cdf": np.round(positions / total, 4).tolist() if total else [],
+            "accepted_cdf": (np.round(self.accepted_cumsum[positions] / accepted_total, 4).tolist()
+                             if accepted_total else []),
+            "total": total,
+            "accepted": accepted_total,
+            "mean": round(float(self.avg_scores.mean()), 4) if total else None,
+            "quantiles": {
+                str(q): round(float(np.quantile(self.avg_scores, q)), 4) for q in DISTRIBUTION_QUANTILES
+            } if total else {}
+        }
+
+    def memory_breakdown(self):
+        """各列占用的字节数"""
+        columns = {
+            "avg_scores": self.avg_scores.nbytes,
+            "score_values": self.score_values.nbytes,
+            "score_offsets": self.score_offsets.nbytes,
+            "decision_codes": self.decision_codes.nbytes,
+            "accepted_mask": self.accepted_mask.nbytes,
+            "accepted_cumsum": self.accepted_cumsum.nbytes,
+            "paper_id_bytes": self.paper_id_bytes.nbytes,
+            "paper_id_offsets": self.paper_id_offsets.nbytes,
+            "confidence_means": self.confidence_means.nbytes,
+            "decision_labels": sum(len(label.encode('utf-8')) for label in self.decision_labels)
+        }
+        columns["total"] = sum(columns.values())
+        return columns
+
+    @property
+    def nbytes(self):
+        return self.memory_breakdown()["total"]
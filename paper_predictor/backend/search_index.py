@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+历史论文关键词检索
+每个数据集构建一次倒排索引（标题、关键词、摘要分词后的 postings 列表），保存为
+<VENUE>_<YEAR>_search.npz 放在格式化数据旁边，之后直接加载，查询时不再读取 JSONL
+
+  - 词表升序排列，term_offsets 切分 postings：第 t 个词的文档为 postings_docs[term_offsets[t]:term_offsets[t + 1]]
+  - postings_tf 为字段加权的词频（标题 x3、关键词 x2、摘要 x1），按 BM25 打分
+  - 每篇文档保存论文ID、标题、决策、track 和加权长度，按决策 / track 过滤并统计匹配论文的接受率
+
+使用方法（在 main.py 中）：
+    index = SearchIndex.open_for("nips_history_data/ICLR_2024_formatted.jsonl")
+    result = index.search("graph neural network", decision="accepted", track="main", limit=20)
+"""
+
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from compressed_io import find_existing_variant, open_binary
+from paper_store import FORMATTED_SUFFIX, HOT_SUFFIX, cold_tier_paths, dataset_base, resolve_paper_id
+from review_decoder import load_skeleton
+
+
+SEARCH_SUFFIX = "_search.npz"
+
+# 索引格式版本（分词或打分方式变化时加一，旧索引自动重建）
+INDEX_VERSION = 1
+
+# 字段权重
+FIELD_WEIGHTS = (("paper_title", 3.0), ("paper_keywords", 2.0), ("paper_abstract", 1.0))
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MAX_LIMIT = 100
+# 分页深度上限（更深的分页没有实际用途，只会让部分排序退化为全排序）
+MAX_OFFSET = 10000
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the this to was were which with we our
+via using based towards toward into over under than can not no
+""".split())
+
+
+def tokenize(text):
+    """小写后按字母数字切分，去掉停用词和单字符"""
+    if not text:
+        return []
+    if isinstance(text, list):
+        text = " ".join(str(item) for item in text)
+    return [token for token in TOKEN_PATTERN.findall(str(text).lower())
+            if len(token) > 1 and token not in STOPWORDS]
+
+
+def search_index_path(file_path):
+    return dataset_base(file_path) + SEARCH_SUFFIX
+
+
+def iter_documents(file_path):
+    """
+    逐篇读取论文的ID、标题、关键词、摘要、决策和 track
+
+    优先读取格式化文件（丢弃评审对话）；只有冷热分层数据时由冷数据 blob 和热数据合并
+
+    Yields:
+        dict
+    """
+
+    base = dataset_base(file_path)
+    formatted = find_existing_variant(base + FORMATTED_SUFFIX)
+    if formatted:
+        with open_binary(formatted) as f:
+            for line_num, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    paper = load_skeleton(line)
+                except ValueError:
+                    continue
+                paper["paper_id"] = resolve_paper_id(paper, line_num)
+                yield paper
+        return
+
+    blob_path, _ = cold_tier_paths(file_path)
+    hot_path = base + HOT_SUFFIX
+    if not (os.path.exists(blob_path) and os.path.exists(hot_path)):
+        return
+
+    hot = {}
+    with open_binary(hot_path) as f:
+        for line in f:
+            if line.strip():
+                paper = load_skeleton(line)
+                hot[str(paper.get("paper_id"))] = paper
+
+    with open_binary(blob_path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            paper = load_skeleton(line)
+            paper.update({key: value for key, value in hot.get(str(paper.get("paper_id")), {}).items()
+                          if key in ("paper_decision", "paper_track")})
+            yield paper
+
+
+def source_path(file_path):
+    """索引的数据来源文件（判断索引是否过期）"""
+    base = dataset_base(file_path)
+    return find_existing_variant(base + FORMATTED_SUFFIX) or cold_tier_paths(file_path)[0]
+
+
+class SearchIndex:
+    """单个数据集的倒排索引"""
+
+    def __init__(self, terms, term_offsets, postings_docs, postings_tf, doc_lengths,
+                 paper_ids, titles, decision_codes, decision_labels, track_codes, track_labels):
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.postings_docs = postings_docs
+        self.postings_tf = postings_tf
+        self.doc_lengths = doc_lengths
+        self.paper_ids = paper_ids
+        self.titles = titles
+        self.decision_codes = decision_codes
+        self.decision_labels = decision_labels
+        self.track_codes = track_codes
+        self.track_labels = track_labels
+
+        self.term_ids = {str(term): i for i, term in enumerate(terms)}
+        self.avg_doc_length = float(doc_lengths.mean()) if len(doc_lengths) else 0.0
+        label_accepted = np.array(['accept' in str(label) for label in decision_labels], dtype=bool)
+        self.accepted = label_accepted[decision_codes] if len(decision_codes) else np.zeros(0, dtype=bool)
+
+    @classmethod
+    def build(cls, documents):
+        """
+        由论文迭代器构建索引
+
+        Args:
+            documents: 可迭代的论文字典（paper_id / paper_title / paper_keywords / paper_abstract /
+                       paper_decision / paper_track）
+
+        Returns:
+            SearchIndex
+        """
+
+        term_ids = {}
+        posting_terms = []
+        posting_docs = []
+        posting_tfs = []
+        doc_lengths = []
+        paper_ids = []
+        titles = []
+        decisions = []
+        tracks = []
+
+        for doc_id, paper in enumerate(documents):
+            weighted = {}
+            length = 0.0
+            for field, weight in FIELD_WEIGHTS:
+                tokens = tokenize(paper.get(field))
+                length += weight * len(tokens)
+                for token in tokens:
+                    weighted[token] = weighted.get(token, 0.0) + weight
+
+            for token, tf in weighted.items():
+                posting_terms.append(term_ids.setdefault(token, len(term_ids)))
+                posting_docs.append(doc_id)
+                posting_tfs.append(tf)
+
+            doc_lengths.append(length)
+            paper_ids.append(str(paper.get("paper_id") or doc_id + 1))
+            titles.append(str(paper.get("paper_title") or ""))
+            decisions.append(str(paper.get("paper_decision") or "").lower())
+            tracks.append(str(paper.get("paper_track") or "").lower())
+
+        # 词表升序，postings 按 (词, 文档) 排序后切分
+        terms = sorted(term_ids)
+        remap = np.empty(len(terms), dtype=np.int32)
+        for new_id, term in enumerate(terms):
+            remap[term_ids[term]] = new_id
+
+        posting_terms = remap[np.array(posting_terms, dtype=np.int32)] if posting_terms else np.zeros(0, np.int32)
+        posting_docs = np.array(posting_docs, dtype=np.int32)
+        posting_tfs = np.array(posting_tfs, dtype=np.float32)
+        order = np.lexsort((posting_docs, posting_terms))
+
+        term_offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(posting_terms, minlength=len(terms)), out=term_offsets[1:])
+
+        decision_labels, decision_codes = _encode(decisions)
+        track_labels, track_codes = _encode(tracks)
+
+        return cls(np.array(terms, dtype=str), term_offsets, posting_docs[order], posting_tfs[order],
+                   np.array(doc_lengths, dtype=np.float32), np.array(paper_ids, dtype=str),
+                   np.array(titles, dtype=str), decision_codes, decision_labels, track_codes, track_labels)
+
+    def save(self, path):
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            version=np.array(INDEX_VERSION),
+            terms=self.terms,
+            term_offsets=self.term_offsets,
+            postings_docs=self.postings_docs,
+            postings_tf=self.postings_tf,
+            doc_lengths=self.doc_lengths,
+            paper_ids=self.paper_ids,
+            titles=self.titles,
+            decision_codes=self.decision_codes,
+            decision_labels=self.decision_labels,
+            track_codes=self.track_codes,
+            track_labels=self.track_labels
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Returns:
+            SearchIndex: 格式版本不一致时返回 None
+        """
+        with np.load(path) as data:
+            if int(data["version"]) != INDEX_VERSION:
+                return None
+            return cls(*(data[name] for name in (
+                "terms", "term_offsets", "postings_docs", "postings_tf", "doc_lengths", "paper_ids",
+                "titles", "decision_codes", "decision_labels", "track_codes", "track_labels")))
+
+    @classmethod
+    def open_for(cls, file_path):
+        """
+        加载数据集的索引；索引不存在、过期或格式版本不同时重新构建并保存
+
+        Args:
+            file_path: 数据集的任一数据文件路径
+
+        Returns:
+            SearchIndex: 没有论文文本数据时返回 None
+        """
+
+        source = source_path(file_path)
+        if not os.path.exists(source):
+            return None
+
+        path = search_index_path(file_path)
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(source):
+            index = cls.load(path)
+            if index is not None:
+                return index
+
+        print(f"🔎 构建检索索引: {source}")
+        start_time = time.time()
+        index = cls.build(iter_documents(file_path))
+        if not len(index):
+            return None
+        try:
+            index.save(path)
+        except OSError as e:
+            print(f"⚠️  保存检索索引失败: {e}")
+        print(f"✅ 检索索引: {len(index)} 篇论文, {len(index.terms)} 个词, "
+              f"{index.nbytes / 1024 / 1024:.1f}MB, 用时 {time.time() - start_time:.1f}s")
+        return index
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in (
+            self.terms, self.term_offsets, self.postings_docs, self.postings_tf, self.doc_lengths,
+            self.paper_ids, self.titles, self.decision_codes, self.track_codes))
+
+    def _filter_mask(self, decision, track):
+        """decision: accepted / rejected / 决策标签中的子串；track: track 名称"""
+        mask = None
+        if decision:
+            decision = decision.lower()
+            if decision in ("accepted", "accept"):
+                mask = self.accepted
+            elif decision in ("rejected", "reject"):
+                mask = ~self.accepted
+            else:
+                matches = np.array([decision in str(label) for label in self.decision_labels], dtype=bool)
+                mask = matches[self.decision_codes]
+        if track:
+            track_mask = (self.track_labels == track.lower())[self.track_codes]
+            mask = track_mask if mask is None else mask & track_mask
+        return mask
+
+    def search(self, query, decision=None, track=None, match_all=False, limit=20, offset=0):
+        """
+        BM25 排序的关键词检索
+
+        Args:
+            query: 查询文本
+            decision: 按决策过滤（accepted / rejected / 决策标签中的子串，如 oral）
+            track: 按 track 过滤
+            match_all: 是否要求包含全部查询词（默认包含任一即可）
+            limit, offset: 分页
+
+        Returns:
+            dict: 匹配总数、匹配论文的接受数 / 接受率和决策 / track 分布，以及当前页的论文
+        """
+
+        limit = max(1, min(int(limit), MAX_LIMIT))
+        offset = max(0, min(int(offset), MAX_OFFSET))
+        query_terms = list(dict.fromkeys(tokenize(query)))
+        known_terms = [self.term_ids[term] for term in query_terms if term in self.term_ids]
+
+        if not known_terms or (match_all and len(known_terms) < len(query_terms)):
+            return _empty_result(query_terms)
+
+        # 只合并查询词的 postings，不触及其他文档
+        num_docs = len(self)
+        doc_chunks = []
+        score_chunks = []
+        for term_id in known_terms:
+            start, end = self.term_offsets[term_id], self.term_offsets[term_id + 1]
+            docs = self.postings_docs[start:end]
+            tf = self.postings_tf[start:end]
+            idf = np.log(1 + (num_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[docs] / self.avg_doc_length)
+            doc_chunks.append(docs)
+            score_chunks.append(idf * tf * (BM25_K1 + 1) / (tf + norm))
+
+        docs, inverse, term_counts = np.unique(np.concatenate(doc_chunks), return_inverse=True, return_counts=True)
+        scores = np.bincount(inverse, weights=np.concatenate(score_chunks))
+
+        keep = np.ones(len(docs), dtype=bool)
+        if match_all:
+            keep &= term_counts == len(known_terms)
+        mask = self._filter_mask(decision, track)
+        if mask is not None:
+            keep &= mask[docs]
+        docs, scores = docs[keep], scores[keep]
+
+        # 分数降序（同分按文档顺序），只排序需要的前 offset + limit 篇；
+        # 与第 offset + limit 篇同分的论文全部参与排序，翻页时同分论文的先后顺序保持一致
+        needed = min(len(docs), offset + limit)
+        if needed < len(docs):
+            boundary = scores[np.argpartition(-scores, needed - 1)[needed - 1]]
+            top = np.flatnonzero(scores >= boundary)
+        else:
+            top = np.arange(len(docs))
+        top = top[np.lexsort((docs[top], -scores[top]))][offset:offset + limit]
+
+        accepted = int(self.accepted[docs].sum())
+        return {
+            "query_terms": query_terms,
+            "total": int(len(docs)),
+            "accepted": accepted,
+            "acceptance_rate": accepted / len(docs) if len(docs) else None,
+            "decisions": _count_labels(self.decision_codes[docs], self.decision_labels),
+            "tracks": _count_labels(self.track_codes[docs], self.track_labels),
+            "papers": [
+                {
+                    "paper_id": str(self.paper_ids[doc]),
+                    "title": str(self.titles[doc]),
+                    "decision": str(self.decision_labels[self.decision_codes[doc]]),
+                    "track": str(self.track_labels[self.track_codes[doc]]),
+                    "accepted": bool(self.accepted[doc]),
+                    "score": round(float(score), 4)
+                }
+                for doc, score in zip(docs[top].tolist(), scores[top].tolist())
+            ]
+        }
+
+
+def _encode(values):
+    labels = sorted(set(values))
+    codes = {label: code for code, label in enumerate(labels)}
+    code_dtype = np.uint8 if len(labels) <= 256 else np.uint16
+    return (np.array(labels, dtype=str),
+            np.fromiter((codes[value] for value in values), dtype=code_dtype, count=len(values)))
+
+
+def _count_labels(codes, labels):
+    counts = np.bincount(codes, minlength=len(labels))
+    return {str(labels[i]): int(count) for i, count in enumerate(counts) if count}
+
+
+def _empty_result(query_terms):
+    return {"query_terms": query_terms, "total": 0, "accepted": 0, "acceptance_rate": None,
+            "decisions": {}, "tracks": {}, "papers": []}
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("📖 使用方法: python search_index.py <数据文件> [查询]")
+        sys.exit(1)
+
+    search_index = SearchIndex.open_for(sys.argv[1])
+    if search_index is None:
+        print(f"❌ {sys.argv[1]} 没有论文文本数据")
+        sys.exit(1)
+    if len(sys.argv) > 2:
+        print(json.dumps(search_index.search(" ".join(sys.argv[2:])), ensure_ascii=False, indent=2))
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+生产环境多进程启动器（pre-fork）
+父进程只加载一次设置、支付记录和历史数据索引，然后 fork 出 N 个 uvicorn 工作进程共享同一个监听端口。
+只读的历史数据在 fork 后以写时复制(copy-on-write)方式共享，父进程在 fork 前执行 gc.freeze()，
+避免垃圾回收扫描修改对象头导致共享页被复制
+
+信号：
+  - SIGHUP: 重新读取设置和支付记录，然后逐个滚动重启工作进程（新进程就绪后才停止旧进程）
+  - SIGUSR1: 立即打印各工作进程的内存占用（RSS / PSS / 共享 / 私有）
+  - SIGTERM / SIGINT: 优雅停止所有工作进程后退出
+
+使用方法：
+    SERVE_WORKERS=4 PORT=8000 python serve.py
+
+环境变量：
+    SERVE_WORKERS（默认 WEB_CONCURRENCY 或 CPU 核数）、HOST、PORT、
+    WORKER_READY_TIMEOUT（秒，默认 120）、MEMORY_REPORT_INTERVAL（秒，默认 300，0 表示不定期打印）
+
+注意：限流计数和推理服务是每个工作进程各自一份；设置保存在 settings.json 中，
+任一工作进程修改后，其他工作进程在下一次读取设置时发现文件修改时间变化并重新加载
+"""
+
+import gc
+import json
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+
+HOST = os.environ.get("HOST", "0.0.0.0")
+PORT = int(os.environ.get("PORT", 8000))
+SERVE_WORKERS = int(os.environ.get("SERVE_WORKERS", os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)))
+WORKER_READY_TIMEOUT = float(os.environ.get("WORKER_READY_TIMEOUT", 120))
+MEMORY_REPORT_INTERVAL = float(os.environ.get("MEMORY_REPORT_INTERVAL", 300))
+
+# 工作进程内存报告，/stats 读取该文件展示
+WORKER_STATUS_FILE = "data/workers.json"
+
+# /proc/<pid>/smaps_rollup 中关心的字段
+MEMORY_FIELDS = ("Rss", "Pss", "Shared_Clean", "Shared_Dirty", "Private_Clean", "Private_Dirty")
+
+
+def read_process_memory(pid):
+    """
+    读取进程内存占用（MB），仅支持 Linux
+
+    Returns:
+        dict: rss / pss / shared / private，无法读取时返回空字典
+    """
+
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", 'r') as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in MEMORY_FIELDS:
+                    values[name] = int(rest.split()[0]) / 1024
+    except (OSError, ValueError, IndexError):
+        return {}
+
+    return {
+        "rss_mb": round(values.get("Rss", 0), 1),
+        "pss_mb": round(values.get("Pss", 0), 1),
+        "shared_mb": round(values.get("Shared_Clean", 0) + values.get("Shared_Dirty", 0), 1),
+        "private_mb": round(values.get("Private_Clean", 0) + values.get("Private_Dirty", 0), 1)
+    }
+
+
+class WorkerServer(uvicorn.Server):
+    """启动完成后通过管道通知父进程的 uvicorn 服务"""
+
+    def __init__(self, config, ready_fd):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.ready_fd, b"1")
+        os.close(self.ready_fd)
+
+
+class PreforkLauncher:
+    """父进程：加载数据、fork 工作进程、监控并滚动重启"""
+
+    def __init__(self, host=HOST, port=PORT, num_workers=SERVE_WORKERS):
+        self.host = host
+        self.port = port
+        self.num_workers = max(1, num_workers)
+
+        self.app = None
+        self.sock = None
+        # pid -> 启动时间
+        self.workers = {}
+
+        self._stopping = False
+        self._reload_requested = False
+        self._report_requested = False
+
+    def load(self):
+        """在父进程中导入应用（导入时加载设置、下载并加载历史数据）"""
+        print(f"🚀 父进程 {os.getpid()} 加载应用和历史数据...")
+        start_time = time.time()
+
+        import main
+        main.initialize()
+        self.app = main.app
+
+        # 之后创建的对象才会被垃圾回收扫描，fork 后共享页不会因 GC 被复制
+        gc.collect()
+        gc.freeze()
+        print(f"✅ 加载完成，用时 {time.time() - start_time:.1f}s，父进程内存: {read_process_memory(os.getpid())}")
+
+    def bind(self):
+        sock = socket.socket(socket.AF_INET6 if ":" in self.host else socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        self.sock = sock
+        print(f"🌐 监听 http://{self.host}:{self.port}，工作进程数: {self.num_workers}")
+
+    def spawn_worker(self):
+        """
+        fork 一个工作进程并等待其就绪
+
+        Returns:
+            int: 工作进程 pid，启动失败时返回 None
+        """
+
+        ready_read, ready_write = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            # 工作进程
+            os.close(ready_read)
+            self._run_worker(ready_write)
+            os._exit(0)
+
+        os.close(ready_write)
+        try:
+            ready, _, _ = select.select([ready_read], [], [], WORKER_READY_TIMEOUT)
+            started = bool(ready) and os.read(ready_read, 1) == b"1"
+        finally:
+            os.close(ready_read)
+
+        if not started:
+            print(f"❌ 工作进程 {pid} 未能在 {WORKER_READY_TIMEOUT:.0f}s 内就绪")
+            self._terminate(pid)
+            return None
+
+        self.workers[pid] = time.time()
+        print(f"👷 工作进程 {pid} 已就绪")
+        return pid
+
+    def _run_worker(self, ready_fd):
+        for sig in (signal.SIGHUP, signal.SIGUSR1):
+            signal.signal(sig, signal.SIG_IGN)
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+
+        config = uvicorn.Config(self.app, log_level="info")
+        try:
+            WorkerServer(config, ready_fd).run(sockets=[self.sock])
+        except Exception as e:
+            print(f"❌ 工作进程 {os.getpid()} 异常退出: {e}")
+            os._exit(1)
+
+    def _terminate(self, pid, timeout=30):
+        """向工作进程发送 SIGTERM 并等待其退出，超时后强制结束"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                done_pid, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if done_pid:
+                break
+            time.sleep(0.1)
+        else:
+            print(f"⚠️  工作进程 {pid} 未在 {timeout}s 内退出，强制结束")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+        self.workers.pop(pid, None)
+
+    def rolling_restart(self):
+        """逐个替换工作进程：新进程就绪后再停止旧进程，服务不中断"""
+        print("🔄 滚动重启工作进程...")
+
+        import main
+        main.current_settings = main.load_settings()
+        main.load_payments()
+
+        for old_pid in list(self.workers):
+            if self._stopping:
+                return
+            if self.spawn_worker() is None:
+                print(f"⚠️  新工作进程启动失败，保留旧进程 {old_pid}")
+                continue
+            self._terminate(old_pid)
+
+        print("✅ 滚动重启完成")
+
+    def reap_workers(self):
+        """回收意外退出的工作进程并补充新的进程"""
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid in self.workers:
+                del self.workers[pid]
+                print(f"⚠️  工作进程 {pid} 退出（状态 {status}），重新启动")
+
+        while not self._stopping and len(self.workers) < self.num_workers:
+            if self.spawn_worker() is None:
+                time.sleep(1)
+                return
+
+    def memory_report(self):
+        """打印并保存各进程内存占用"""
+        report = {
+            "parent": {"pid": os.getpid(), **read_process_memory(os.getpid())},
+            "workers": [
+                {"pid": pid, "uptime_seconds": round(time.time() - started_at), **read_process_memory(pid)}
+                for pid, started_at in sorted(self.workers.items())
+            ],
+            "updated_at": time.time()
+        }
+        report["total_pss_mb"] = round(
+            report["parent"].get("pss_mb", 0) + sum(w.get("pss_mb", 0) for w in report["workers"]), 1)
+
+        print(f"🧠 内存占用: 父进程 {report['parent']}")
+        for worker in report["workers"]:
+            print(f"   工作进程 {worker}")
+        print(f"   PSS 合计: {report['total_pss_mb']}MB")
+
+        try:
+            os.makedirs(os.path.dirname(WORKER_STATUS_FILE), exist_ok=True)
+            with open(WORKER_STATUS_FILE, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+        except OSError as e:
+            print(f"⚠️  保存内存报告失败: {e}")
+
+    def _handle_signal(self, sig, frame):
+        if sig == signal.SIGHUP:
+            self._reload_requested = True
+        elif sig == signal.SIGUSR1:
+            self._report_requested = True
+        else:
+            self._stopping = True
+
+    def run(self):
+        self.load()
+        self.bind()
+
+        for sig in (signal.SIGHUP, signal.SIGUSR1, signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self._handle_signal)
+
+        for _ in range(self.num_workers):
+            self.spawn_worker()
+        self.memory_report()
+
+        last_report = time.time()
+        while not self._stopping:
+            time.sleep(0.5)
+
+            if self._reload_requested:
+                self._reload_requested = False
+                self.rolling_restart()
+                self._report_requested = True
+
+            self.reap_workers()
+
+            if self._report_requested or (
+                    MEMORY_REPORT_INTERVAL > 0 and time.time() - last_report >= MEMORY_REPORT_INTERVAL):
+                self._report_requested = False
+                last_report = time.time()
+                self.memory_report()
+
+        print("🛑 停止所有工作进程...")
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in list(self.workers):
+            self._terminate(pid)
+        self.sock.close()
+
+
+def main():
+    PreforkLauncher().run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
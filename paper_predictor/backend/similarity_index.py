@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+历史论文相似检索索引
+评分只有有限种组合（1-10 分、每篇几条评审），再多的论文也只对应几千种不同的评分组合，
+所以索引按排序后的评分组合分桶，每个组合只保存一个定长向量：
+  - 评分分布的累积分布（CDF）在 1.0, 1.5, ..., 10.0 处的取值，两条 CDF 的 L1 距离 x 0.5
+    就是两组评分之间的推土机距离（把一组评分"搬"成另一组所需的平均分数差）
+  - 评审数不同时加上 COUNT_WEIGHT x |评审数差|
+
+查询时对所有组合做一次向量化距离计算，再按距离从近到远展开各组合中的论文，
+提供自信心时在组合内按平均自信心的差距排序（CONFIDENCE_WEIGHT 加到距离中），直到确定前 k 篇
+
+使用方法（在 main.py 中）：
+    index = SimilarityIndex.from_columns(year_data["papers"])
+    neighbors = index.query([5, 6, 8], confidences=[3, 4, 4], k=10)
+"""
+
+import numpy as np
+
+from score_columns import SCORE_SCALE
+
+
+# CDF 的取值点：1.0 - 10.0，每半分一个（以半分为单位即 2 - 20）
+CDF_POINTS = np.arange(2, 21, dtype=np.int16)
+
+# 评审数每差一条相当于的距离
+COUNT_WEIGHT = 0.25
+
+# 平均自信心每差 1 相当于的距离
+CONFIDENCE_WEIGHT = 0.1
+
+MAX_K = 100
+
+
+def profile_vector(half_scores):
+    """排序后的评分（以半分为单位）-> CDF 向量"""
+    half_scores = np.asarray(half_scores)
+    return (np.searchsorted(np.sort(half_scores), CDF_POINTS, side='right') / len(half_scores)).astype(np.float32)
+
+
+class SimilarityIndex:
+    """按评分组合分桶的 k 近邻索引（单个数据集）"""
+
+    def __init__(self, columns, profile_keys, profile_vectors, profile_counts, profile_rows, profile_offsets):
+        self.columns = columns
+        # 第 p 个评分组合：排序后的评分（以半分为单位）、CDF 向量、评审数
+        self.profile_keys = profile_keys
+        self.profile_vectors = profile_vectors
+        self.profile_counts = profile_counts
+        # 第 p 个组合的论文（ScoreColumns 中的行号）为 profile_rows[profile_offsets[p]:profile_offsets[p + 1]]
+        self.profile_rows = profile_rows
+        self.profile_offsets = profile_offsets
+
+    @classmethod
+    def from_columns(cls, columns):
+        """
+        由 ScoreColumns 构建索引
+
+        Args:
+            columns: ScoreColumns
+
+        Returns:
+            SimilarityIndex
+        """
+
+        num_papers = len(columns)
+        profile_ids = {}
+        paper_profiles = np.empty(num_papers, dtype=np.int32)
+        for i in range(num_papers):
+            start, end = columns.score_offsets[i], columns.score_offsets[i + 1]
+            key = tuple(sorted(columns.score_values[start:end].tolist()))
+            paper_profiles[i] = profile_ids.setdefault(key, len(profile_ids))
+
+        profile_keys = list(profile_ids)
+        profile_vectors = np.array([profile_vector(key) for key in profile_keys], dtype=np.float32).reshape(
+            len(profile_keys), len(CDF_POINTS))
+        profile_counts = np.array([len(key) for key in profile_keys], dtype=np.int16)
+
+        # 按组合分组的行号（组内保持平均分升序的行号顺序）
+        profile_rows = np.argsort(paper_profiles, kind='stable').astype(np.int32)
+        profile_offsets = np.zeros(len(profile_keys) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(paper_profiles, minlength=len(profile_keys)), out=profile_offsets[1:])
+
+        return cls(columns, profile_keys, profile_vectors, profile_counts, profile_rows, profile_offsets)
+
+    def __len__(self):
+        return len(self.profile_keys)
+
+    def memory_bytes(self):
+        keys_bytes = sum(len(key) for key in self.profile_keys)
+        return (self.profile_vectors.nbytes + self.profile_counts.nbytes + self.profile_rows.nbytes
+                + self.profile_offsets.nbytes + keys_bytes)
+
+    def profile_distances(self, scores):
+        """查询评分到每个评分组合的距离"""
+        half_scores = np.rint(np.asarray(scores, dtype=np.float64) * SCORE_SCALE).astype(np.int16)
+        vector = profile_vector(half_scores)
+        distances = np.abs(self.profile_vectors - vector).sum(axis=1) * (1.0 / SCORE_SCALE)
+        distances += COUNT_WEIGHT * np.abs(self.profile_counts - len(half_scores))
+        return distances
+
+    def query(self, scores, confidences=None, k=10):
+        """
+        查找评分最接近的 k 篇历史论文
+
+        Args:
+            scores: 评分列表
+            confidences: 自信心列表（可选，提供时在距离中加入平均自信心的差距）
+            k: 返回的论文数（不超过 MAX_K）
+
+        Returns:
+            list: [(行号, 距离)]，按距离升序
+        """
+
+        k = max(1, min(int(k), MAX_K))
+        if not len(self.profile_keys) or not scores:
+            return []
+
+        distances = self.profile_distances(scores)
+        query_confidence = float(np.mean(confidences)) if confidences else None
+
+        # 距离最近的若干个组合通常就够 k 篇，不够确定前 k 篇时扩大候选范围
+        candidates = min(len(distances), 32)
+        while True:
+            if candidates < len(distances):
+                nearest = np.argpartition(distances, candidates - 1)[:candidates]
+            else:
+                nearest = np.arange(len(distances))
+            nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+
+            results, complete = self._expand(nearest, distances, query_confidence, k)
+            if complete or candidates >= len(distances):
+                return results
+            candidates = min(len(distances), candidates * 4)
+
+    def _expand(self, nearest, distances, query_confidence, k):
+        """
+        按距离从近到远展开候选组合中的论文
+
+        Returns:
+            tuple: (前 k 篇 [(行号, 距离)], 结果是否已确定（候选之外的组合不可能更近）)
+        """
+
+        results = []
+        for profile in nearest:
+            profile_distance = float(distances[profile])
+            # 后面的组合距离更大（自信心项非负），不可能再进入前 k
+            if len(results) >= k and profile_distance > results[k - 1][1]:
+                return results, True
+
+            rows = self.profile_rows[self.profile_offsets[profile]:self.profile_offsets[profile + 1]]
+            if query_confidence is not None:
+                confidence_gap = np.abs(self.columns.confidence_means[rows] - query_confidence)
+                # 没有自信心的论文按最大差距计
+                row_distances = profile_distance + CONFIDENCE_WEIGHT * np.nan_to_num(confidence_gap, nan=4.0)
+            else:
+                row_distances = np.full(len(rows), profile_distance)
+
+            best = np.argsort(row_distances, kind='stable')[:k]
+            results.extend(zip(rows[best].tolist(), row_distances[best].tolist()))
+            results.sort(key=lambda item: item[1])
+            del results[k:]
+
+        # 候选之外的组合距离不小于最后一个候选组合
+        complete = len(results) >= k and results[k - 1][1] <= float(distances[nearest[-1]])
+        return results, complete
+
+    def describe(self, row):
+        """第 row 篇论文的评分、平均分、平均自信心、决策和论文ID"""
+        columns = self.columns
+        confidence = float(columns.confidence_means[row])
+        return {
+            "paper_id": columns.paper_id_of(row),
+            "scores": columns.scores_of(row).tolist(),
+            "avg_score": round(float(columns.avg_scores[row]), 4),
+            "avg_confidence": None if np.isnan(confidence) else round(confidence, 4),
+            "decision": columns.decision_of(row),
+            "accepted": bool(columns.accepted_mask[row])
+        }
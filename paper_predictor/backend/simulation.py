@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+"下一位评审"假设模拟（/simulate）
+从历史评分分布中抽样，模拟再来几位评审、或 rebuttal 后某几条评分变化时的结果：
+  - 新增评审：从所有历史单条评分的经验分布中抽样
+  - 修改评分：按 revise_direction 从历史分布中抽样：up 只取不低于原评分的部分（默认，只升不降），
+    down 只取不高于原评分的部分，any 取整个分布（可升可降）
+
+所有样本组成一个评分矩阵（评审数不同时用 NaN 补齐），一次向量化计算：
+  - 规则概率：rule_engine.rule_probability_batch，与 /predict 规则相同
+  - 经验接受率：样本里不同的评分组合只有几十到几百种，每种组合查一次 AcceptanceIndex，
+    样本足够的组合覆盖规则概率（与 /predict 相同）
+  - 排名：ScoreColumns.rank_of_many 对所有样本的平均分一次二分查找
+
+使用方法（在 main.py 中）：
+    result = simulate(year_data, [5, 6, 8], add_reviewers=1, samples=2000)
+"""
+
+import time
+
+import numpy as np
+
+from rule_engine import RULE_NAMES, rule_probability_batch
+
+
+DEFAULT_SAMPLES = 2000
+MAX_SAMPLES = 20000
+MAX_ADD_REVIEWERS = 3
+REVISE_DIRECTIONS = ("up", "down", "any")
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+HISTOGRAM_BINS = 10
+TOP_PROFILES = 10
+
+
+def _quantiles(values, digits=4):
+    points = np.quantile(values, QUANTILES)
+    return {f"p{int(q * 100)}": round(float(v), digits) for q, v in zip(QUANTILES, points)}
+
+
+def sample_scores(papers, scores, add_reviewers=1, revise=(), samples=DEFAULT_SAMPLES, rng=None,
+                  revise_direction="up"):
+    """
+    抽样得到假设的评分矩阵
+
+    Args:
+        papers: ScoreColumns（提供历史评分分布）
+        scores: 当前评分
+        add_reviewers: 新增评审数
+        revise: 需要重新抽样的评分下标
+        samples: 样本数
+        rng: numpy.random.Generator
+        revise_direction: 修改评分的方向 up / down / any
+
+    Returns:
+        ndarray: 形状 (samples, len(scores) + add_reviewers) 的评分矩阵
+    """
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    values, pmf = papers.rating_distribution()
+    matrix = np.empty((samples, len(scores) + add_reviewers), dtype=np.float64)
+    matrix[:, :len(scores)] = scores
+
+    if add_reviewers:
+        matrix[:, len(scores):] = rng.choice(values, size=(samples, add_reviewers), p=pmf)
+
+    for index in revise:
+        # 只保留允许方向上的评分；该方向上没有历史评分时维持不变
+        if revise_direction == "up":
+            keep = values >= scores[index]
+        elif revise_direction == "down":
+            keep = values <= scores[index]
+        else:
+            keep = np.ones(len(values), dtype=bool)
+        if keep.any():
+            matrix[:, index] = rng.choice(values[keep], size=samples, p=pmf[keep] / pmf[keep].sum())
+
+    return matrix
+
+
+def evaluate(year_data, score_matrix, rng=None, min_support=30):
+    """
+    对评分矩阵的每一行计算接受概率、排名和所用方法
+
+    Args:
+        year_data: 参考年份的数据（papers / acceptance_index）
+        score_matrix: 评分矩阵（可含 NaN 补齐）
+        rng: numpy.random.Generator
+        min_support: 经验接受率的最小样本数
+
+    Returns:
+        dict: probabilities / rule_ids / empirical / avg_scores / rank_in_all / rank_in_accepted /
+              profiles（不同的排序后评分组合）/ inverse（每行对应的组合下标）
+    """
+
+    probabilities, rule_ids = rule_probability_batch(score_matrix, rng=rng)
+    avg_scores = np.nanmean(score_matrix, axis=1)
+
+    # 按排序后的评分组合去重（NaN 排在末尾，评审数不同的组合不会混在一起）
+    profiles, inverse = np.unique(np.sort(score_matrix, axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    empirical_profiles = np.full(len(profiles), np.nan)
+    acceptance_index = year_data.get("acceptance_index")
+    if acceptance_index is not None:
+        for i, profile in enumerate(profiles):
+            result = acceptance_index.lookup(profile[~np.isnan(profile)].tolist())
+            if result and result["total"] >= min_support:
+                empirical_profiles[i] = result["probability"]
+
+    empirical_rows = empirical_profiles[inverse]
+    empirical = ~np.isnan(empirical_rows)
+    probabilities[empirical] = empirical_rows[empirical]
+
+    rank_in_all, rank_in_accepted = year_data["papers"].rank_of_many(avg_scores)
+
+    return {
+        "probabilities": probabilities,
+        "rule_ids": rule_ids,
+        "empirical": empirical,
+        "avg_scores": avg_scores,
+        "rank_in_all": rank_in_all,
+        "rank_in_accepted": rank_in_accepted,
+        "profiles": profiles,
+        "inverse": inverse
+    }
+
+
+def simulate(year_data, scores, add_reviewers=1, revise=(), samples=DEFAULT_SAMPLES, seed=None, min_support=30,
+             revise_direction="up"):
+    """
+    模拟新增/修改评分后的结果分布
+
+    Args:
+        year_data: 参考年份的数据
+        scores: 当前评分
+        add_reviewers: 新增评审数（0 - MAX_ADD_REVIEWERS）
+        revise: 需要重新抽样的评分下标
+        samples: 样本数（1 - MAX_SAMPLES）
+        seed: 随机种子（可选，便于复现）
+        min_support: 经验接受率的最小样本数
+        revise_direction: 修改评分的方向 up（只升不降）/ down（只降不升）/ any
+
+    Returns:
+        dict: 当前结果（baseline）与模拟结果的分布
+    """
+
+    start_time = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    scores = [float(score) for score in scores]
+    papers = year_data["papers"]
+
+    baseline = evaluate(year_data, np.array([scores]), rng=rng, min_support=min_support)
+    baseline_probability = float(baseline["probabilities"][0])
+    baseline_rank = int(baseline["rank_in_all"][0])
+
+    matrix = sample_scores(papers, scores, add_reviewers, revise, samples, rng, revise_direction=revise_direction)
+    outcome = evaluate(year_data, matrix, rng=rng, min_support=min_support)
+
+    probabilities = outcome["probabilities"]
+    rank_in_all = outcome["rank_in_all"]
+    histogram, edges = np.histogram(probabilities, bins=HISTOGRAM_BINS, range=(0.0, 1.0))
+
+    # 出现最多的评分组合
+    profile_counts = np.bincount(outcome["inverse"], minlength=len(outcome["profiles"]))
+    profile_probability = np.bincount(outcome["inverse"], weights=probabilities,
+                                      minlength=len(outcome["profiles"])) / profile_counts
+    top_profiles = []
+    for i in np.argsort(-profile_counts, kind='stable')[:TOP_PROFILES]:
+        profile = outcome["profiles"][i]
+        profile = profile[~np.isnan(profile)]
+        rank, accepted_rank = papers.rank_of_many([profile.mean()])
+        top_profiles.append({
+            "scores": profile.tolist(),
+            "share": round(float(profile_counts[i]) / samples, 4),
+            "probability": round(float(profile_probability[i]), 4),
+            "rank_in_all": int(rank[0]),
+            "rank_in_accepted": int(accepted_rank[0])
+        })
+
+    rule_counts = np.bincount(outcome["rule_ids"][~outcome["empirical"]], minlength=len(RULE_NAMES))
+    methods = {name: int(count) for name, count in zip(RULE_NAMES, rule_counts) if count}
+    methods["empirical_index"] = int(outcome["empirical"].sum())
+
+    return {
+        "baseline": {
+            "scores": scores,
+            "avg_score": round(sum(scores) / len(scores), 4),
+            "probability": round(baseline_probability, 4),
+            "rank_in_all": baseline_rank,
+            "rank_in_accepted": int(baseline["rank_in_accepted"][0]),
+            "prediction_method": "empirical_index" if baseline["empirical"][0] else RULE_NAMES[baseline["rule_ids"][0]]
+        },
+        "samples": samples,
+        "add_reviewers": add_reviewers,
+        "revise": list(revise),
+        "revise_direction": revise_direction,
+        "probability": {
+            "mean": round(float(probabilities.mean()), 4),
+            "std": round(float(probabilities.std()), 4),
+            "quantiles": _quantiles(probabilities),
+            "histogram": {
+                "edges": [round(float(edge), 2) for edge in edges],
+                "counts": histogram.tolist()
+            },
+            "improve_rate": round(float((probabilities > baseline_probability).mean()), 4),
+            "decline_rate": round(float((probabilities < baseline_probability).mean()), 4)
+        },
+        "avg_score": {
+            "mean": round(float(outcome["avg_scores"].mean()), 4),
+            "quantiles": _quantiles(outcome["avg_scores"])
+        },
+        "rank_in_all": {
+            "mean": round(float(rank_in_all.mean()), 1),
+            "quantiles": _quantiles(rank_in_all, digits=1),
+            "improve_rate": round(float((rank_in_all < baseline_rank).mean()), 4)
+        },
+        "rank_in_accepted": {
+            "mean": round(float(outcome["rank_in_accepted"].mean()), 1),
+            "quantiles": _quantiles(outcome["rank_in_accepted"], digits=1)
+        },
+        "top_profiles": top_profiles,
+        "methods": methods,
+        "total_papers": len(papers),
+        "accepted_papers": int(papers.accepted_count),
+        "elapsed_ms": round((time.perf_counter() - start_time) * 1000, 3)
+    }
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+上传图片的存储与静态文件服务
+  - 上传：读取请求体时即按字节数限流（分块传输、没有 Content-Length 的请求同样受限，不会先缓存到临时文件），
+    分块复制并限制最大字节数，按文件头识别图片类型，以内容的 sha256 命名（相同图片只存一份）
+  - 后台任务：生成体积更小的变体（安装 Pillow 时生成缩放后的 WebP；压缩率可观时生成 .gz）
+  - 静态服务：内容寻址的文件使用一年的 immutable 缓存头；客户端支持时直接返回 WebP 变体或预压缩的 .gz
+
+使用方法（在 main.py 中）：
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/upload-qr": MAX_QR_UPLOAD_BYTES + 16 * 1024})
+    filename = store_upload(upload.file, "uploads/qr_codes", max_bytes=MAX_QR_UPLOAD_BYTES)
+    background_tasks.add_task(generate_variants, os.path.join("uploads/qr_codes", filename))
+    app.mount("/uploads", ImmutableStaticFiles(directory="uploads"), name="uploads")
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import tempfile
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+
+COPY_CHUNK_SIZE = 64 * 1024
+
+# (文件头, 扩展名)
+IMAGE_SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif")
+)
+
+# WebP 变体的最长边（二维码在手机上显示的尺寸远小于截图原图）
+VARIANT_MAX_SIDE = int(os.environ.get("QR_VARIANT_MAX_SIDE", 800))
+
+# .gz 至少节省该比例时才保留
+MIN_GZIP_SAVING = 0.1
+
+# 内容寻址的文件名：<前缀>_<sha256 前 16 位>.<扩展名>，内容不会变化，可以永久缓存
+CONTENT_ADDRESSED_NAME = re.compile(r"^[a-z]+_[0-9a-f]{16}\.[a-z]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+DEFAULT_CACHE_CONTROL = "public, max-age=300"
+
+
+class UploadTooLarge(ValueError):
+    """上传内容超过字节上限"""
+
+
+def sniff_image_extension(head):
+    """按文件头识别图片类型，返回扩展名；不是支持的图片时返回 None"""
+    for signature, extension in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return extension
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+
+def store_upload(source, dest_dir, max_bytes, prefix="qr"):
+    """
+    把上传的文件对象分块复制到 dest_dir（在线程池中调用）
+
+    Args:
+        source: 可读的二进制文件对象
+        dest_dir: 目标目录
+        max_bytes: 最大字节数
+        prefix: 文件名前缀
+
+    Returns:
+        str: 内容寻址的文件名，如 qr_3f2a9c0d1b7e4a65.png
+
+    Raises:
+        UploadTooLarge: 超过 max_bytes
+        ValueError: 不是支持的图片格式
+    """
+
+    os.makedirs(dest_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    head = b""
+    written = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix=".upload-")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if written > max_bytes:
+                    raise UploadTooLarge(f"文件超过 {max_bytes // 1024}KB 上限")
+                if len(head) < 16:
+                    head += chunk[:16 - len(head)]
+                digest.update(chunk)
+                out.write(chunk)
+
+        extension = sniff_image_extension(head)
+        if extension is None:
+            raise ValueError("不支持的图片格式（仅支持 PNG / JPEG / GIF / WebP）")
+
+        filename = f"{prefix}_{digest.hexdigest()[:16]}{extension}"
+        final_path = os.path.join(dest_dir, filename)
+        if os.path.exists(final_path):
+            # 相同内容已经存在
+            os.remove(tmp_path)
+        else:
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, final_path)
+        return filename
+
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI 中间件：限制指定路径的请求体字节数
+
+    声明的 Content-Length 超限时直接返回 413；否则在读取请求体时累计字节数，
+    超限时立即中止读取（multipart 解析不会把剩余内容缓存到临时文件）
+    """
+
+    def __init__(self, app, limits):
+        """
+        Args:
+            limits: {路径: 最大字节数}
+        """
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        max_bytes = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if max_bytes is None:
+            await self.app(scope, receive, send)
+            return
+
+        detail = f"请求体不能超过 {max_bytes // 1024}KB"
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            await _send_too_large(send, detail)
+            return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # 路由内读取请求体时抛出，由 FastAPI 的异常处理返回 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except HTTPException as e:
+            # 在路由之外读取请求体时（异常没有被应用处理）
+            if e.status_code != 413 or response_started:
+                raise
+            await _send_too_large(send, detail)
+
+
+async def _send_too_large(send, detail):
+    body = json.dumps({"detail": detail}, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()),
+                    (b"connection", b"close")]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def generate_variants(file_path):
+    """
+    生成优化变体（后台任务）：
+      - <文件>.webp: 最长边不超过 VARIANT_MAX_SIDE 的 WebP（需要 Pillow；PNG/GIF 无损，JPEG 高质量有损）
+      - <文件>.gz:   gzip 压缩后至少小 10% 时保留
+    """
+
+    try:
+        # Pillow 是可选依赖，只在生成变体时导入（不影响服务启动）
+        from PIL import Image
+    except ImportError:
+        Image = None
+
+    try:
+        original_size = os.path.getsize(file_path)
+
+        webp_path = f"{file_path}.webp"
+        if Image is not None and not file_path.endswith(".webp") and not os.path.exists(webp_path):
+            with Image.open(file_path) as image:
+                image.thumbnail((VARIANT_MAX_SIDE, VARIANT_MAX_SIDE))
+                if image.mode not in ("RGB", "RGBA", "L"):
+                    image = image.convert("RGBA")
+                # PNG/GIF 无损保存（二维码边缘保持清晰），JPEG 原本就是有损的，用高质量有损编码
+                lossless = not file_path.endswith(".jpg")
+                image.save(f"{webp_path}.tmp", format="WEBP", lossless=lossless, quality=90, method=6)
+                os.replace(f"{webp_path}.tmp", webp_path)
+                print(f"🖼️  WebP 变体: {webp_path} ({original_size} -> {os.path.getsize(webp_path)} 字节)")
+
+        with open(file_path, "rb") as f:
+            data = f.read()
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) <= len(data) * (1 - MIN_GZIP_SAVING):
+            _write_atomic(f"{file_path}.gz", compressed)
+            print(f"🗜️  预压缩: {file_path}.gz ({len(data)} -> {len(compressed)} 字节)")
+
+    except Exception as e:
+        print(f"⚠️  生成图片变体失败 {file_path}: {e}")
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    StaticFiles 的扩展：
+      - 内容寻址的文件名返回 immutable 长缓存头，其余文件短缓存
+      - Accept 含 image/webp 且存在 .webp 变体时返回 WebP
+      - Accept-Encoding 含 gzip 且存在 .gz 时返回预压缩内容
+    """
+
+    async def get_response(self, path, scope):
+        request_headers = Headers(scope=scope)
+        accept = request_headers.get("accept", "")
+        accept_encoding = request_headers.get("accept-encoding", "")
+
+        response = None
+        if "image/webp" in accept:
+            response = self._variant_response(path + ".webp", scope, media_type="image/webp")
+        if response is None and "gzip" in accept_encoding:
+            response = self._variant_response(path + ".gz", scope,
+                                              media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                                              content_encoding="gzip")
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if response.status_code in (200, 304):
+            name = os.path.basename(path)
+            response.headers["cache-control"] = (
+                IMMUTABLE_CACHE_CONTROL if CONTENT_ADDRESSED_NAME.match(name) else DEFAULT_CACHE_CONTROL
+            )
+            response.headers["vary"] = "Accept, Accept-Encoding"
+        return response
+
+    def _variant_response(self, variant_path, scope, media_type, content_encoding=None):
+        """变体文件存在时返回其响应，否则返回 None"""
+        full_path, stat_result = self.lookup_path(variant_path)
+        if stat_result is None or not os.path.isfile(full_path):
+            return None
+
+        headers = {"content-encoding": content_encoding} if content_encoding else None
+        response = FileResponse(full_path, stat_result=stat_result, media_type=media_type, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
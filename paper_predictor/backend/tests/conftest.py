@@ -0,0 +1,8 @@
+"""测试配置：后端模块是平铺的脚本模块，测试时把 backend 目录加入导入路径"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
@@ -0,0 +1,78 @@
+"""经验接受率索引的多级回退"""
+
+import numpy as np
+import pytest
+
+from acceptance_index import INDEX_LEVELS, AcceptanceIndex, index_keys
+
+
+def test_index_keys_round_and_sort():
+    keys = index_keys([8, 5.24, 6])
+    assert keys[0] == (5.0, 6.0, 8.0)
+    assert keys[1] == (3, (0, 0, 2, 1, 0))
+    assert keys == index_keys([6, 8, 5])
+    assert len(keys) == len(INDEX_LEVELS)
+
+
+def test_lookup_uses_finest_level_with_enough_support():
+    index = AcceptanceIndex(min_support=3)
+    for _ in range(3):
+        index.add([5, 6, 8], accepted=True)
+    index.add([5, 6, 8], accepted=False)
+    assert index.lookup([8, 6, 5]) == {"probability": 0.75, "accepted": 3, "total": 4, "level": "multiset"}
+
+
+def test_lookup_backs_off_to_coarser_levels():
+    index = AcceptanceIndex(min_support=3)
+    # 同一直方图段（5-6、7-8）但评分组合不同
+    index.add([5, 6, 7], accepted=True)
+    index.add([6, 6, 8], accepted=False)
+    index.add([5, 5, 8], accepted=True)
+
+    result = index.lookup([6, 5, 7])
+    assert result["level"] == "histogram"
+    assert (result["accepted"], result["total"]) == (2, 3)
+
+    # 评审数不同：只有按平均分分桶的级别能匹配
+    result = index.lookup([6, 6])
+    assert result["level"] == "mean"
+
+
+def test_lookup_returns_best_supported_match_when_all_levels_are_sparse():
+    index = AcceptanceIndex(min_support=10)
+    index.add([5, 6, 8], accepted=True)
+    index.add([5, 6, 7], accepted=False)
+    result = index.lookup([5, 6, 8])
+    # 各级样本都不足：返回样本最多的最细级别
+    assert result["total"] == 2 and result["level"] == "histogram"
+    assert index.lookup([5, 6, 8], min_support=1)["level"] == "multiset"
+
+
+def test_empty_index_and_scores():
+    index = AcceptanceIndex()
+    assert index.lookup([5, 6]) is None
+    index.add([], accepted=True)
+    assert index.total == 0
+    index.add([5, 6], accepted=True)
+    assert index.lookup([]) is None
+    assert index.lookup([1, 1]) is None
+    assert index.summary() == {level: 1 for level in INDEX_LEVELS}
+    assert index.memory_bytes() > 0
+
+
+@pytest.mark.parametrize("scores", [[5, 6, 8], [3, 3], [10]])
+def test_lookup_matches_brute_force(scores):
+    rng = np.random.default_rng(2)
+    index = AcceptanceIndex(min_support=1)
+    papers = []
+    for _ in range(500):
+        profile = rng.choice([3, 5, 6, 8, 10], size=rng.integers(1, 4)).tolist()
+        accepted = bool(rng.random() < 0.3)
+        papers.append((sorted(profile), accepted))
+        index.add(profile, accepted)
+
+    matching = [accepted for profile, accepted in papers if profile == sorted(scores)]
+    result = index.lookup(scores)
+    if matching:
+        assert result["level"] == "multiset"
+        assert (result["accepted"], result["total"]) == (sum(matching), len(matching))
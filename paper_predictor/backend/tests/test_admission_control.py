@@ -0,0 +1,50 @@
+"""令牌桶限流与客户端IP识别"""
+
+import pytest
+
+from admission_control import AdmissionController, RateLimitRule, TokenBucket
+
+
+def _controller(**kwargs):
+    return AdmissionController(rules=[
+        RateLimitRule("order", "/check-payment/", key="path", rate=1, burst=5),
+        RateLimitRule("ip", "/check-payment/", key="ip", rate=1, burst=2)
+    ], **kwargs)
+
+
+def test_token_bucket_refills_at_rate():
+    bucket = TokenBucket(burst=2, now=0.0)
+    assert bucket.try_acquire(rate=1, burst=2, now=0.0) == 0
+    assert bucket.try_acquire(rate=1, burst=2, now=0.0) == 0
+    assert bucket.try_acquire(rate=1, burst=2, now=0.0) == pytest.approx(1.0)
+    assert bucket.wait_time(rate=1, burst=2, now=0.5) == pytest.approx(0.5)
+    assert bucket.try_acquire(rate=1, burst=2, now=1.0) == 0
+
+
+def test_ip_rule_rejects_before_creating_order_buckets():
+    controller = _controller()
+    rules = controller.match("GET", "/check-payment/x")
+
+    # 同一IP用不同的订单号轮换：IP桶耗尽后不再为新订单号建桶
+    results = [controller.check_rate(rules, "1.2.3.4", f"/check-payment/order-{i}")[0] for i in range(10)]
+    assert results[:2] == [None, None]
+    assert set(results[2:]) == {"ip"}
+    assert len(controller._buckets) == 3  # 1 个IP桶 + 2 个订单号桶
+    assert controller.counters["rate_limited"] == {"order": 0, "ip": 8}
+
+
+def test_rejected_request_spends_no_tokens():
+    controller = _controller()
+    rules = controller.match("GET", "/check-payment/x")
+    for _ in range(2):
+        controller.check_rate(rules, "1.2.3.4", "/check-payment/a")
+    controller.check_rate(rules, "1.2.3.4", "/check-payment/a")
+
+    # 订单桶只被两次通过的请求扣减
+    assert controller._buckets[("order", "a")].tokens == pytest.approx(3, abs=0.01)
+
+
+def test_forwarded_header_ignored_by_default():
+    scope = {"client": ("10.0.0.1", 1234), "headers": [(b"x-forwarded-for", b"6.6.6.6, 7.7.7.7")]}
+    assert _controller().client_ip(scope) == "10.0.0.1"
+    assert _controller(trust_forwarded=True).client_ip(scope) == "7.7.7.7"
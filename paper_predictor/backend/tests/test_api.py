@@ -0,0 +1,42 @@
+"""接口参数校验（不依赖历史数据：校验在读取数据之前完成）"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("k", [0, -1, 101])
+def test_similar_rejects_out_of_range_k(client, k):
+    response = client.post("/similar", json={"scores": [5, 6, 8], "k": k})
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize("params", [{"limit": 0}, {"limit": 101}, {"offset": -1}, {"offset": 10001}])
+def test_search_rejects_out_of_range_paging(client, params):
+    assert client.get("/search", params=dict(q="graph", **params)).status_code == 400
+
+
+def test_unknown_dataset_is_not_cached(client):
+    for year in range(1900, 1910):
+        assert client.get("/search", params={"q": "graph", "conference": "NOPE", "year": str(year)}).status_code == 404
+        assert main.get_paper_text_store("NOPE", year) is None
+    assert not any(key[0] == "NOPE" for key in main.search_indexes)
+    assert not any(key[0] == "NOPE" for key in main.paper_text_stores)
+
+
+def test_admin_endpoints_closed_without_token(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "")
+    assert client.get("/admin/orders", headers={"X-Admin-Token": ""}).status_code == 403
+    assert client.get("/admin/predictions").status_code == 403
+
+
+def test_admin_rejects_wrong_token_and_bad_limit(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    assert client.get("/admin/orders", headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.get("/admin/orders", params={"limit": 0}, headers={"X-Admin-Token": "secret"}).status_code == 400
@@ -0,0 +1,87 @@
+"""离线批量打分"""
+
+import csv
+import gzip
+import json
+
+import numpy as np
+import pytest
+
+from bulk_score import bulk_score, parse_args
+from rule_engine import RULE_NAMES, rule_probability_batch
+
+
+def _profiles():
+    rng = np.random.default_rng(9)
+    return [rng.integers(1, 11, size=rng.integers(1, 5)).astype(float).tolist() for _ in range(25)]
+
+
+def _expected(chunks, seed=0):
+    """逐块用 rule_probability_batch 计算（与工作进程相同的块划分和随机种子）"""
+    probabilities, rules = [], []
+    for chunk, part in enumerate(chunks):
+        matrix = np.full((len(part), max(map(len, part))), np.nan)
+        for i, scores in enumerate(part):
+            matrix[i, :len(scores)] = scores
+        p, r = rule_probability_batch(matrix, rng=np.random.default_rng(seed + chunk))
+        probabilities.extend(p)
+        rules.extend(r)
+    return np.array(probabilities), np.array(rules)
+
+
+def test_jsonl_to_npz(tmp_path):
+    profiles = _profiles()
+    input_path = tmp_path / "papers.jsonl"
+    with open(input_path, 'w', encoding='utf-8') as f:
+        for i, scores in enumerate(profiles):
+            reviews = [{"rating": f"{int(score)}: ok", "confidence": "3: sure"} for score in scores]
+            f.write(json.dumps({"paper_id": f"p{i}", "paper_decision": "Reject", "reviews": reviews}) + "\n")
+            if i == 10:
+                # 没有评分的论文和空行被跳过
+                f.write(json.dumps({"paper_id": "empty", "paper_decision": "Reject", "reviews": []}) + "\n\n")
+
+    output_path = tmp_path / "out.npz"
+    stats = bulk_score(str(input_path), str(output_path), workers=1, models_dir=None, chunk_rows=7)
+    assert (stats["rows"], stats["skipped"], stats["chunks"]) == (25, 1, 4)
+
+    with np.load(output_path) as result:
+        assert result["paper_id"].tolist() == [f"p{i}" for i in range(25)]
+        assert result["num_reviews"].tolist() == [len(scores) for scores in profiles]
+        assert np.allclose(result["avg_score"], [np.mean(scores) for scores in profiles])
+
+        # 块按原始行数划分：第 12、13 行（空论文和空行）落在第二块
+        probabilities, rules = _expected([profiles[0:7], profiles[7:12], profiles[12:19], profiles[19:25]])
+        assert result["rule"].tolist() == rules.tolist()
+        assert np.allclose(result["rule_probability"], probabilities)
+        assert np.allclose(result["probability"], probabilities)
+
+
+def test_csv_to_gzip_csv_matches_rule_batch(tmp_path):
+    profiles = _profiles()
+    input_path = tmp_path / "profiles.csv"
+    with open(input_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["paper_id", "scores", "decision"])
+        for i, scores in enumerate(profiles):
+            writer.writerow([f"c{i}", ";".join(str(int(s)) for s in scores), "Accept"])
+
+    output_path = tmp_path / "out.csv.gz"
+    stats = bulk_score(str(input_path), str(output_path), workers=1, models_dir=None, chunk_rows=10, seed=3)
+    assert (stats["rows"], stats["skipped"]) == (25, 0)
+
+    with gzip.open(output_path, 'rt', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    probabilities, rules = _expected([profiles[0:10], profiles[10:20], profiles[20:25]], seed=3)
+    assert [row["paper_id"] for row in rows] == [f"c{i}" for i in range(25)]
+    assert [row["rule"] for row in rows] == [RULE_NAMES[r] for r in rules]
+    assert np.allclose([float(row["rule_probability"]) for row in rows], probabilities, atol=1e-4)
+    assert all(row["ml_probability"] == "" and row["decision"] == "accept" for row in rows)
+
+
+@pytest.mark.parametrize("output", ["out.npz.gz", "out.json", "out.npz.zst"])
+def test_unsupported_outputs_are_rejected(tmp_path, output):
+    with pytest.raises(ValueError):
+        parse_args(["in.jsonl", output])
+    with pytest.raises(ValueError):
+        bulk_score(str(tmp_path / "in.jsonl"), str(tmp_path / output), workers=1, models_dir=None)
+    assert parse_args(["in.jsonl", "out.csv.gz"])["output"] == "out.csv.gz"
@@ -0,0 +1,74 @@
+"""跨年份校准表"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from calibration import CalibrationTable, map_score
+from review_decoder import ReviewRecord
+from score_columns import ScoreColumns
+
+
+def _records(count=400, seed=0):
+    rng = np.random.default_rng(seed)
+    records = []
+    for i in range(count):
+        scores = rng.integers(1, 11, size=rng.integers(1, 6)).astype(float).tolist()
+        decision = "accept (poster)" if np.mean(scores) + rng.normal(0, 1) > 6 else "reject"
+        records.append(ReviewRecord(scores, [3.0] * len(scores), decision, f"p{i}"))
+    return records
+
+
+def _brute_force_rank(records, avg_score):
+    avg_scores = [np.float32(np.mean(record.scores)) for record in records]
+    accepted = ['accept' in record.decision for record in records]
+    target = np.float32(avg_score)
+    higher = [score > target for score in avg_scores]
+    return sum(higher) + 1, sum(h and a for h, a in zip(higher, accepted)) + 1
+
+
+def test_calibration_table_ranks_match_columns():
+    first, second = _records(seed=3), _records(seed=4)
+    first_papers = ScoreColumns.from_records(first)
+    table = CalibrationTable.from_columns(first_papers)
+    pooled = CalibrationTable.pooled([table, CalibrationTable.from_columns(ScoreColumns.from_records(second))])
+
+    assert pooled.total == len(first) + len(second)
+    for avg_score in [0.5, 2.0, 4.5, 17 / 3, 7.25, 10.0]:
+        assert table.rank_of(avg_score) == first_papers.rank_of(avg_score)
+        assert pooled.rank_of(avg_score) == _brute_force_rank(first + second, avg_score)
+        assert table.percentile(avg_score) == pytest.approx(
+            np.mean([np.float32(np.mean(r.scores)) <= np.float32(avg_score) for r in first]))
+
+
+def test_map_score_rejects_empty_tables():
+    full = CalibrationTable.from_columns(ScoreColumns.from_records(_records()))
+    empty = CalibrationTable.from_columns(ScoreColumns.from_records([]))
+    assert map_score(6.0, full, full)["rank_in_all"] == full.rank_of(6.0)[0]
+    with pytest.raises(ValueError):
+        map_score(6.0, full, empty)
+    with pytest.raises(ValueError):
+        map_score(6.0, empty, full)
+
+
+def _year_data(records):
+    papers = ScoreColumns.from_records(records)
+    return {"papers": papers, "calibration": CalibrationTable.from_columns(papers), "total_count": len(papers)}
+
+
+def test_calibrate_skips_empty_years(monkeypatch):
+    import main
+
+    year_datas = {"2023": _year_data([]), "2024": _year_data(_records())}
+    monkeypatch.setattr(main, "get_year_data", lambda conference, year: year_datas.get(str(year)))
+    monkeypatch.setattr(main, "loaded_year_data", lambda conference: year_datas)
+    monkeypatch.setattr(main, "calibration_pools", {})
+    client = TestClient(main.app)
+
+    response = client.get("/calibrate", params={"avg_score": 6.0, "conference": "ICLR", "from_year": "2024"})
+    assert response.status_code == 200
+    assert set(response.json()["targets"]) == {"2024", "pooled"}
+
+    params = {"avg_score": 6.0, "conference": "ICLR"}
+    assert client.get("/calibrate", params=dict(params, from_year="2023")).status_code == 404
+    assert client.get("/calibrate", params=dict(params, from_year="2024", to_year="2023")).status_code == 404
@@ -0,0 +1,51 @@
+"""压缩文件的透明读写"""
+
+import pytest
+
+import compressed_io
+from compressed_io import detect_compression, open_binary, open_output, open_text, split_compression_suffix
+
+
+LINES = [f'{{"paper_id": "p{i}", "title": "论文 {i}"}}' for i in range(2000)]
+
+
+@pytest.mark.parametrize("suffix, compression", [("", None), (".gz", "gzip"), (".xz", "xz"), (".zst", "zstd")])
+def test_round_trip(tmp_path, suffix, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    path = str(tmp_path / f"data.jsonl{suffix}")
+    with open_output(path) as f:
+        for line in LINES:
+            f.write(line + "\n")
+
+    assert detect_compression(path) == compression
+    with open_binary(path, buffer_size=4096) as f:
+        assert [line.decode("utf-8").rstrip("\n") for line in f] == LINES
+    with open_text(path) as f:
+        assert f.read().splitlines() == LINES
+
+
+@pytest.mark.parametrize("suffix", [".gz", ".xz", ".zst"])
+def test_magic_detection_without_suffix(tmp_path, suffix):
+    if suffix == ".zst":
+        pytest.importorskip("zstandard")
+    compressed = tmp_path / f"data{suffix}"
+    with open_output(str(compressed)) as f:
+        f.write("\n".join(LINES[:10]))
+
+    renamed = tmp_path / "data.jsonl"
+    compressed.rename(renamed)
+    assert detect_compression(str(renamed)) == compressed_io.COMPRESSION_SUFFIXES[suffix]
+    with open_text(str(renamed)) as f:
+        assert f.read().splitlines() == LINES[:10]
+
+
+def test_split_compression_suffix():
+    assert split_compression_suffix("a/b.jsonl.gz") == ("a/b.jsonl", ".gz")
+    assert split_compression_suffix("b.csv") == ("b.csv", "")
+
+
+def test_zstd_without_zstandard_is_an_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(compressed_io, "zstandard", None)
+    with pytest.raises(RuntimeError):
+        open_output(str(tmp_path / "data.zst"))
@@ -0,0 +1,12 @@
+"""数据验证脚本的目录模式"""
+
+from data_validator import find_data_files
+
+
+def test_find_data_files_selects_formatted_files_only(tmp_path):
+    for name in ("ICLR_2024_formatted.jsonl", "ICLR_2025_formatted.jsonl.gz", "ICLR_2024_scores.jsonl",
+                 "resubmission_links.jsonl", "notes.jsonl", "ICLR_2024_text.idx"):
+        (tmp_path / name).write_bytes(b"")
+
+    assert [path.rsplit("/", 1)[-1] for path in find_data_files(str(tmp_path))] == [
+        "ICLR_2024_formatted.jsonl", "ICLR_2025_formatted.jsonl.gz"]
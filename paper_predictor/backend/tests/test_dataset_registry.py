@@ -0,0 +1,64 @@
+"""数据集注册表的发现、懒加载与淘汰"""
+
+import os
+
+from dataset_registry import DatasetRegistry
+
+
+def _write(path, mtime):
+    path.write_text("{}\n")
+    os.utime(path, (mtime, mtime))
+
+
+def _registry(tmp_path, loads, **kwargs):
+    def loader(file_path, year):
+        loads.append(os.path.basename(file_path))
+        return {"file": file_path}
+
+    registry = DatasetRegistry(str(tmp_path), loader=loader, **kwargs)
+    registry.discover()
+    return registry
+
+
+def test_discover_prunes_removed_and_changed_datasets(tmp_path):
+    _write(tmp_path / "ICLR_2024_formatted.jsonl", 1000)
+    _write(tmp_path / "ICML_2024_formatted.jsonl", 1000)
+    loads = []
+    registry = _registry(tmp_path, loads)
+    registry.get("ICLR", "2024", pin=True)
+    registry.get("ICML", "2024")
+
+    # ICML 的文件被删除，ICLR 的文件被重新下载
+    os.remove(tmp_path / "ICML_2024_formatted.jsonl")
+    _write(tmp_path / "ICLR_2024_formatted.jsonl", 2000)
+    registry.discover()
+
+    assert registry.loaded() == []
+    assert registry.status()["loaded"] == []
+    assert registry.get("ICML", "2024") is None
+
+    registry.get("ICLR", "2024")
+    assert loads == ["ICLR_2024_formatted.jsonl", "ICML_2024_formatted.jsonl", "ICLR_2024_formatted.jsonl"]
+
+
+def test_discover_keeps_unchanged_datasets(tmp_path):
+    _write(tmp_path / "ICLR_2024_formatted.jsonl", 1000)
+    loads = []
+    registry = _registry(tmp_path, loads)
+    entry = registry.get("iclr", "2024")
+
+    registry.discover()
+    assert registry.get("ICLR", "2024") is entry
+    assert loads == ["ICLR_2024_formatted.jsonl"]
+
+
+def test_lru_eviction_keeps_pinned(tmp_path):
+    for year in ("2022", "2023", "2024"):
+        _write(tmp_path / f"ICLR_{year}_formatted.jsonl", 1000)
+    registry = _registry(tmp_path, [], sizer=lambda entry: 100, memory_budget_bytes=200)
+
+    registry.get("ICLR", "2022", pin=True)
+    registry.get("ICLR", "2023")
+    registry.get("ICLR", "2024")
+    assert [year for _, year, _ in registry.loaded()] == ["2022", "2024"]
+    assert registry.stats["evictions"] == 1
@@ -0,0 +1,80 @@
+"""MinHash / LSH 重投检测"""
+
+import json
+
+import numpy as np
+import pytest
+
+from dedup import MinHasher, candidate_pairs, find_resubmissions, pooled_unique_stats, shingle_hashes
+
+VOCABULARY = [f"word{i}" for i in range(2000)]
+
+
+def _abstract(rng, length=80):
+    return " ".join(rng.choice(VOCABULARY, size=length))
+
+
+def test_minhash_estimates_jaccard():
+    rng = np.random.default_rng(0)
+    hasher = MinHasher()
+    a = {"paper_title": "", "paper_abstract": _abstract(rng, 200)}
+    words = a["paper_abstract"].split()
+    b = {"paper_title": "", "paper_abstract": " ".join(words[:150] + _abstract(rng, 50).split())}
+
+    ha, hb = shingle_hashes(a), shingle_hashes(b)
+    jaccard = len(np.intersect1d(ha, hb)) / len(np.union1d(ha, hb))
+    estimate = np.mean(hasher.signature(ha) == hasher.signature(hb))
+    assert estimate == pytest.approx(jaccard, abs=0.12)
+
+
+def test_candidate_pairs_groups_identical_signatures():
+    hasher = MinHasher()
+    rng = np.random.default_rng(1)
+    papers = [{"paper_title": "", "paper_abstract": _abstract(rng)} for _ in range(20)]
+    papers.append(dict(papers[3]))
+    signatures = np.vstack([hasher.signature(shingle_hashes(paper)) for paper in papers])
+    assert (3, 20) in candidate_pairs(signatures)
+
+
+def _write(path, papers):
+    with open(path, "w", encoding="utf-8") as f:
+        for paper in papers:
+            f.write(json.dumps(paper) + "\n")
+
+
+def test_find_resubmissions_links_later_to_earlier(tmp_path):
+    rng = np.random.default_rng(2)
+    earlier = [{"paper_id": f"a{i}", "paper_title": f"paper {i}", "paper_abstract": _abstract(rng),
+                "paper_decision": "Reject"} for i in range(60)]
+    later = [{"paper_id": f"b{i}", "paper_title": f"paper {i}", "paper_abstract": _abstract(rng),
+              "paper_decision": "Accept"} for i in range(60)]
+    # 10 篇较早的论文换个年份重投，摘要略有修改
+    for i in range(10):
+        words = earlier[i]["paper_abstract"].split()
+        later[i]["paper_abstract"] = " ".join(words[:-5] + ["revised"] * 5)
+    _write(tmp_path / "ICLR_2023_formatted.jsonl", earlier)
+    _write(tmp_path / "ICLR_2024_formatted.jsonl", later)
+
+    links, stats = find_resubmissions(str(tmp_path))
+    assert {(link["paper_id"], link["previous_paper_id"]) for link in links} == {(f"b{i}", f"a{i}") for i in range(10)}
+    assert stats["papers"] == 120
+
+
+def _link(paper_id, previous_paper_id, previous_decision="Reject"):
+    return {"venue": "ICLR", "year": "2024", "paper_id": paper_id, "previous_venue": "ICLR",
+            "previous_year": "2023", "previous_paper_id": previous_paper_id, "previous_decision": previous_decision}
+
+
+def test_pooled_unique_stats_merges_each_earlier_paper_once():
+    year_datas = {("ICLR", "2023"): {"total_count": 100, "accepted_count": 30},
+                  ("ICLR", "2024"): {"total_count": 100, "accepted_count": 30}}
+    links = [
+        _link("b1", "a1", "Accept"), _link("b2", "a1", "Accept"),  # 同一篇较早论文被两篇论文链接
+        _link("b3", "a2"),
+        dict(_link("c1", "a3"), venue="NeurIPS")  # 较晚的一端未加载
+    ]
+
+    stats = pooled_unique_stats(links, year_datas)
+    assert stats["linked_submissions"] == 2
+    assert stats["unique_works"] == 198
+    assert stats["accepted_works"] == 59
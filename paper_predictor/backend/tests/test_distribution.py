@@ -0,0 +1,72 @@
+"""预先计算的平均分分布与 /distribution 的缓存响应"""
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from review_decoder import ReviewRecord
+from score_columns import ScoreColumns
+
+
+def _records():
+    rng = np.random.default_rng(6)
+    records = []
+    for i in range(300):
+        scores = rng.integers(1, 11, size=rng.integers(1, 5)).astype(float).tolist()
+        decision = "Accept (Oral)" if np.mean(scores) + rng.normal(0, 1) > 6 else "Reject"
+        records.append(ReviewRecord(scores, [], decision.lower(), f"p{i}"))
+    # 边界值：最后一桶包含 10.0
+    records.append(ReviewRecord([10.0, 10.0], [], "accept (poster)", "top"))
+    return records
+
+
+def test_distribution_matches_brute_force():
+    records = _records()
+    distribution = ScoreColumns.from_records(records).distribution()
+
+    avg_scores = [float(np.float32(np.mean(record.scores))) for record in records]
+    accepted = ['accept' in record.decision for record in records]
+    edges = distribution["edges"]
+
+    for i, (low, high) in enumerate(zip(edges[:-1], edges[1:])):
+        last = i == len(edges) - 2
+        in_bin = [low <= score < high or (last and score == high) for score in avg_scores]
+        assert distribution["counts"][i] == sum(in_bin)
+        assert distribution["accepted_counts"][i] == sum(b and a for b, a in zip(in_bin, accepted))
+        if sum(in_bin):
+            assert distribution["acceptance_rate"][i] == pytest.approx(
+                sum(b and a for b, a in zip(in_bin, accepted)) / sum(in_bin), abs=1e-4)
+        else:
+            assert distribution["acceptance_rate"][i] is None
+
+    for edge, cdf, accepted_cdf in zip(edges, distribution["cdf"], distribution["accepted_cdf"]):
+        at_or_below = [score <= np.float32(edge) for score in avg_scores]
+        assert cdf == pytest.approx(np.mean(at_or_below), abs=1e-4)
+        assert accepted_cdf == pytest.approx(
+            sum(b and a for b, a in zip(at_or_below, accepted)) / sum(accepted), abs=1e-4)
+
+    assert distribution["cdf"][-1] == 1.0
+    assert distribution["total"] == len(records)
+    assert distribution["accepted"] == sum(accepted)
+
+
+def test_empty_distribution():
+    distribution = ScoreColumns.from_records([]).distribution()
+    assert distribution["total"] == 0
+    assert distribution["cdf"] == [] and distribution["mean"] is None
+
+
+def test_distribution_endpoint_revalidates_with_etag(monkeypatch):
+    year_data = {"distribution": ScoreColumns.from_records(_records()).distribution()}
+    monkeypatch.setattr(main, "get_year_data", lambda conference, year: year_data if year == "2031" else None)
+    client = TestClient(main.app)
+
+    first = client.get("/distribution", params={"conference": "ICLR", "year": "2031"})
+    assert first.status_code == 200
+    assert first.json()["counts"] == year_data["distribution"]["counts"]
+
+    second = client.get("/distribution", params={"conference": "ICLR", "year": "2031"},
+                        headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 304
+    assert client.get("/distribution", params={"conference": "ICLR", "year": "2032"}).status_code == 404
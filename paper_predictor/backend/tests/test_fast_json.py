@@ -0,0 +1,64 @@
+"""JSON 响应序列化（orjson 与标准库回退）"""
+
+import json
+
+import numpy as np
+import pytest
+
+import fast_json
+from fast_json import FastJSONResponse, dumps
+
+
+PAYLOAD = {
+    "probability": np.float32(0.25),
+    "rank": np.int64(12),
+    "counts": np.arange(4, dtype=np.int32),
+    "strided": np.arange(10, dtype=np.float64)[::3],
+    "name": "接受率",
+    "nested": [{"ok": np.bool_(True)}, None]
+}
+
+EXPECTED = {
+    "probability": 0.25,
+    "rank": 12,
+    "counts": [0, 1, 2, 3],
+    "strided": [0.0, 3.0, 6.0, 9.0],
+    "name": "接受率",
+    "nested": [{"ok": True}, None]
+}
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(fast_json, "orjson", None)
+    return request.param
+
+
+def test_numpy_values_are_converted(backend):
+    body = dumps(PAYLOAD)
+    assert json.loads(body) == EXPECTED
+    assert "接受率".encode("utf-8") in body
+
+
+def test_output_matches_default_json_format(backend):
+    content = {"a": [1, 2.5, "x"], "b": {"c": None}}
+    assert dumps(content) == json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def test_response_renders_with_dumps(backend):
+    response = FastJSONResponse(PAYLOAD)
+    assert json.loads(response.body) == EXPECTED
+    assert response.headers["content-type"] == "application/json"
+
+
+def test_unsupported_values_raise(backend):
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_fallback_rejects_nan(monkeypatch):
+    # 与 FastAPI 默认的 JSONResponse 一致：标准库回退不输出非法的 NaN
+    monkeypatch.setattr(fast_json, "orjson", None)
+    with pytest.raises(ValueError):
+        dumps({"value": float("nan")})
@@ -0,0 +1,118 @@
+"""ml_predictor 推理特征与批量预测"""
+
+import numpy as np
+import pytest
+
+from ml_predictor import PaperAcceptancePredictor, score_confidence_correlation
+
+
+def _fitted_predictor():
+    """在随机评分上训练一个小型集成（只用于检查批量预测的行为）"""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    predictor = PaperAcceptancePredictor.__new__(PaperAcceptancePredictor)
+    profiles = [(rng.integers(1, 11, size=rng.integers(2, 6)).tolist(), None) for _ in range(200)]
+    rows = [predictor.build_feature_row(scores, confidences) for scores, confidences in profiles]
+    predictor.feature_names = list(rows[0])
+    matrix = np.array([[row[name] for name in predictor.feature_names] for row in rows])
+    labels = (matrix[:, predictor.feature_names.index('avg_score')] >= 6).astype(int)
+
+    predictor.scaler = StandardScaler().fit(matrix)
+    predictor.trained_models = {
+        'logistic_regression': LogisticRegression(max_iter=1000).fit(predictor.scaler.transform(matrix), labels)
+    }
+    predictor.ensemble_weights = {'logistic_regression': 1.0}
+    return predictor
+
+
+def test_correlation_is_zero_for_constant_inputs():
+    assert score_confidence_correlation([6, 6, 6], [3, 4, 5]) == 0.0
+    assert score_confidence_correlation([5, 6, 8], [3.0, 3.0, 3.0]) == 0.0
+    assert score_confidence_correlation([7], [4]) == 0.0
+    assert score_confidence_correlation([5, 6, 8], [3, 4, 5]) == pytest.approx(np.corrcoef([5, 6, 8], [3, 4, 5])[0, 1])
+
+
+def test_feature_row_is_finite_without_confidences():
+    row = PaperAcceptancePredictor.__new__(PaperAcceptancePredictor).build_feature_row([5, 6, 8])
+    assert row['score_confidence_corr'] == 0.0
+    assert all(np.isfinite(value) for value in row.values())
+
+
+def test_predict_batch_isolates_invalid_rows():
+    predictor = _fitted_predictor()
+    results = predictor.predict_batch([([6, 6, 6], None), ([], None), ([5, 6, 8], [3, 4, 5]), ([5, 6], [0, 0])])
+
+    assert results[1] is None and results[3] is None
+    assert results[0] is not None and results[2] is not None
+    # 与单独预测的结果一致
+    assert results[2]['ensemble_probability'] == pytest.approx(
+        predictor.predict_single([5, 6, 8], [3, 4, 5])['ensemble_probability'])
+    with pytest.raises(ValueError):
+        predictor.predict_single([])
+
+
+def _random_profiles(rng, count):
+    profiles = []
+    for i in range(count):
+        n = int(rng.integers(1, 7))
+        scores = rng.choice([1, 3, 5, 6, 8, 10], size=n).astype(float).tolist()
+        if i % 5 == 0:
+            scores = [scores[0]] * n  # 评分全相同
+        if i % 3 == 0:
+            confidences = None
+        else:
+            confidences = rng.integers(1, 6, size=int(rng.integers(1, n + 2))).astype(float).tolist()
+        profiles.append((scores, confidences))
+    return profiles
+
+
+def _pad(lists):
+    width = max(len(values) for values in lists)
+    return np.array([values + [np.nan] * (width - len(values)) for values in lists])
+
+
+def test_feature_matrix_matches_feature_rows():
+    rng = np.random.default_rng(1)
+    profiles = _random_profiles(rng, 300)
+    predictor = PaperAcceptancePredictor.__new__(PaperAcceptancePredictor)
+
+    matrix = PaperAcceptancePredictor.build_feature_matrix(
+        _pad([scores for scores, _ in profiles]), _pad([confidences or [] for _, confidences in profiles]))
+    for i, (scores, confidences) in enumerate(profiles):
+        row = predictor.build_feature_row(scores, confidences)
+        for name, value in row.items():
+            assert matrix[name][i] == pytest.approx(value, abs=1e-9), (name, scores, confidences)
+
+
+def test_predict_matrix_scores_only_input():
+    predictor = _fitted_predictor()
+    ensemble, _ = predictor.predict_matrix(_pad([[6, 6, 6], [5, 6, 8], [3]]))
+    assert np.isfinite(ensemble).all()
+    assert ensemble[1] == pytest.approx(predictor.predict_single([5, 6, 8])['ensemble_probability'])
+
+
+def test_inference_service_workers_are_not_forked(tmp_path):
+    import asyncio
+
+    from inference_service import InferenceService
+
+    predictor = _fitted_predictor()
+    predictor.models_dir = str(tmp_path)
+    predictor.save_models()
+
+    async def run():
+        service = InferenceService(models_dir=str(tmp_path), num_workers=1)
+        await service.start()
+        try:
+            assert service._executor._mp_context.get_start_method() in ("forkserver", "spawn")
+            results = await asyncio.gather(service.predict([5, 6, 8], None), service.predict([8, 8, 8], None))
+        finally:
+            await service.stop()
+        return results
+
+    results = asyncio.run(run())
+    expected = predictor.predict_batch([([5, 6, 8], None), ([8, 8, 8], None)])
+    for result, reference in zip(results, expected):
+        assert result['ensemble_probability'] == pytest.approx(reference['ensemble_probability'])
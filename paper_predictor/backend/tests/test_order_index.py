@@ -0,0 +1,95 @@
+"""订单二级索引：分页查询与暴力扫描一致"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from order_index import MAX_PAGE_SIZE, OrderIndex, parse_timestamp
+
+STATUSES = ["pending", "success", "failed", "expired"]
+
+
+def _payments(count=500, seed=0):
+    rng = np.random.default_rng(seed)
+    start = datetime(2025, 1, 1)
+    payments = {}
+    for i in range(count):
+        order_id = f"{rng.integers(0, 16 ** 6):06x}-{i}"
+        # 部分订单创建时间相同，检验同一时间戳的游标翻页
+        created = start + timedelta(minutes=int(rng.integers(0, 60 * 24 * 10)) // 7 * 7)
+        payments[order_id] = {
+            "orderId": order_id,
+            "amount": round(float(rng.choice([0.2, 0.5, 1.0, 9.9])), 2),
+            "status": str(rng.choice(STATUSES)),
+            "created_at": created.isoformat()
+        }
+    return payments
+
+
+def _brute_force(payments, status=None, start=None, end=None, min_amount=None, prefix=None, descending=True):
+    rows = [payment for payment in payments.values()
+            if (status is None or payment["status"] == status)
+            and (start is None or payment["created_at"] >= start)
+            and (end is None or payment["created_at"] < end)
+            and (min_amount is None or payment["amount"] >= min_amount)
+            and (prefix is None or payment["orderId"].startswith(prefix))]
+    rows.sort(key=lambda payment: (parse_timestamp(payment["created_at"]), payment["orderId"]), reverse=descending)
+    return [payment["orderId"] for payment in rows]
+
+
+def _all_pages(index, limit, **filters):
+    order_ids = []
+    cursor = None
+    while True:
+        page = index.query(cursor=cursor, limit=limit, **filters)
+        order_ids.extend(payment["orderId"] for payment in page["orders"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return order_ids
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"status": "success"},
+    {"start": "2025-01-03T00:00:00", "end": "2025-01-06T12:00:00"},
+    {"status": "failed", "min_amount": 1.0},
+    {"order_id_prefix": "a"},
+    {"descending": False, "status": "pending"}
+])
+def test_cursor_pagination_matches_brute_force(filters):
+    payments = _payments()
+    index = OrderIndex()
+    index.rebuild(payments)
+
+    expected = _brute_force(payments, status=filters.get("status"), start=filters.get("start"),
+                            end=filters.get("end"), min_amount=filters.get("min_amount"),
+                            prefix=filters.get("order_id_prefix"), descending=filters.get("descending", True))
+    assert _all_pages(index, 17, **filters) == expected
+
+
+def test_update_moves_order_between_statuses():
+    payments = _payments(50)
+    index = OrderIndex()
+    index.rebuild(payments)
+
+    payment = next(p for p in payments.values() if p["status"] == "pending")
+    index.update(dict(payment, status="success"))
+    payments[payment["orderId"]]["status"] = "success"
+
+    totals = index.totals()
+    for status in STATUSES:
+        expected = [p for p in payments.values() if p["status"] == status]
+        assert totals.get(status, {"count": 0})["count"] == len(expected)
+    assert _all_pages(index, 200, status="success") == _brute_force(payments, status="success")
+
+
+@pytest.mark.parametrize("limit", [0, -5, MAX_PAGE_SIZE + 1])
+def test_out_of_range_limit_is_rejected(limit):
+    with pytest.raises(ValueError):
+        OrderIndex().query(limit=limit)
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        OrderIndex().query(cursor="not-a-cursor")
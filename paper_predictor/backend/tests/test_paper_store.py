@@ -0,0 +1,50 @@
+"""冷热分层写入与数据集发现"""
+
+import os
+
+import pytest
+
+from dataset_registry import DatasetRegistry
+from paper_store import PaperTextStore, TieredWriter, preferred_scores_file
+
+
+def _paper(paper_id):
+    return {"paper_id": paper_id, "paper_title": f"title {paper_id}", "paper_decision": "Accept",
+            "reviews": [{"rating": "6", "confidence": "3", "reviewer": "r", "dialogue": []}]}
+
+
+def test_tiered_writer_replaces_files_only_on_success(tmp_path):
+    base = str(tmp_path / "ICLR_2024")
+    with TieredWriter(base) as writer:
+        writer.write(_paper("1"))
+
+    with pytest.raises(RuntimeError):
+        with TieredWriter(base) as writer:
+            writer.write(_paper("2"))
+            raise RuntimeError("boom")
+
+    # 失败的写入不留下临时文件，也不覆盖上一次完整的结果
+    assert sorted(os.listdir(tmp_path)) == ["ICLR_2024_scores.jsonl", "ICLR_2024_text.blob", "ICLR_2024_text.idx"]
+    store = PaperTextStore.open_for(base + "_formatted.jsonl")
+    assert store.get("1")["paper_title"] == "title 1" and "2" not in store
+    store.close()
+
+
+def test_stale_hot_tier_is_ignored(tmp_path):
+    formatted = tmp_path / "ICLR_2024_formatted.jsonl"
+    scores = tmp_path / "ICLR_2024_scores.jsonl"
+    formatted.write_text("{}\n")
+    scores.write_text("{}\n")
+
+    os.utime(formatted, (1000, 1000))
+    os.utime(scores, (2000, 2000))
+    registry = DatasetRegistry(str(tmp_path), loader=None)
+    registry.discover()
+    assert registry.path("ICLR", "2024") == str(scores)
+    assert preferred_scores_file(str(formatted)) == str(scores)
+
+    # 格式化文件重新下载后比热数据新
+    os.utime(formatted, (3000, 3000))
+    registry.discover()
+    assert registry.path("ICLR", "2024") == str(formatted)
+    assert preferred_scores_file(str(formatted)) == str(formatted)
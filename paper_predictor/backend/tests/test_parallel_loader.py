@@ -0,0 +1,37 @@
+"""并行解析与串行解析结果一致"""
+
+import json
+
+import parallel_loader
+from parallel_loader import read_review_records, shutdown_pool
+
+
+def _write_dataset(path, count=500):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            if i % 97 == 13:
+                f.write("{broken json\n")
+                continue
+            paper = {"paper_id": str(i), "paper_decision": "Accept" if i % 3 == 0 else "Reject",
+                     "reviews": [{"rating": str(i % 10 + 1), "confidence": str(i % 5 + 1)},
+                                 {"rating": str((i * 7) % 10 + 1), "confidence": "3"}]}
+            f.write(json.dumps(paper) + "\n")
+
+
+def test_parallel_matches_serial(tmp_path, monkeypatch):
+    path = str(tmp_path / "ICLR_2024_scores.jsonl")
+    _write_dataset(path)
+
+    monkeypatch.setattr(parallel_loader, "LOADER_WORKERS", 2)
+    monkeypatch.setattr(parallel_loader, "PARALLEL_LOAD_MIN_BYTES", 0)
+    try:
+        parallel = read_review_records(path)
+        assert parallel_loader._pool is not None
+        assert parallel_loader._pool._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        shutdown_pool()
+
+    serial = read_review_records(path, parallel=False)
+    assert parallel_loader._pool is None
+    assert parallel == serial
+    assert [line_num for line_num, _ in serial[1]] == [14, 111, 208, 305, 402, 499]
@@ -0,0 +1,104 @@
+"""支付记录的多进程合并"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+def _payment(order_id, status, **fields):
+    created_at = datetime.now() - timedelta(minutes=1)
+    return dict({
+        "orderId": order_id,
+        "amount": 0.2,
+        "description": "test",
+        "status": status,
+        "created_at": created_at.isoformat(),
+        "expires_at": (created_at + timedelta(minutes=30)).isoformat()
+    }, **fields)
+
+
+@pytest.fixture
+def payments_file(tmp_path, monkeypatch):
+    path = tmp_path / "payments.json"
+    monkeypatch.setattr(main, "PAYMENTS_FILE", str(path))
+    monkeypatch.setattr(main, "PAYMENTS_LOCK_FILE", str(tmp_path / ".payments.lock"))
+    monkeypatch.setattr(main, "payments", {})
+    monkeypatch.setattr(main, "payments_mtime", 0)
+    main.order_index.rebuild({})
+    yield path
+    main.order_index.rebuild({})
+
+
+def test_merge_keeps_terminal_state():
+    pending = _payment("a", "pending", updated_at="2030-01-01T00:00:00")
+    success = _payment("a", "success")
+    failed = _payment("a", "failed")
+
+    assert main.merge_payment(pending, success) is success
+    assert main.merge_payment(failed, success) is success
+    assert main.merge_payment(success, _payment("a", "pending")) is success
+
+
+def test_stale_worker_cannot_overwrite_success(payments_file):
+    # 另一个工作进程已把订单标记为成功
+    payments_file.write_text(json.dumps({"a": _payment("a", "success", paid_at="x")}))
+
+    # 本进程内存中仍是 pending，重新抽签得到 failed
+    main.payments["a"] = _payment("a", "failed", updated_at=datetime.now().isoformat())
+    assert main.save_payments(changed=main.payments["a"])
+
+    assert main.payments["a"]["status"] == "success"
+    assert json.loads(payments_file.read_text())["a"]["status"] == "success"
+    assert main.order_index.totals() == {"success": {"count": 1, "amount": 0.2}}
+
+
+def test_save_merges_orders_from_other_workers(payments_file):
+    payments_file.write_text(json.dumps({"b": _payment("b", "pending")}))
+    main.payments["a"] = _payment("a", "pending")
+    main.save_payments(changed=main.payments["a"])
+
+    assert set(json.loads(payments_file.read_text())) == {"a", "b"}
+    assert len(main.order_index) == 2
+
+
+def test_unknown_order_reloads_only_when_file_changed(payments_file, monkeypatch):
+    from fastapi.testclient import TestClient
+
+    main.save_payments()
+    calls = []
+    original = main.load_payments
+    monkeypatch.setattr(main, "load_payments", lambda: (calls.append(1), original())[1])
+
+    client = TestClient(main.app)
+    assert client.get("/check-payment/missing").status_code == 404
+    assert calls == []
+
+    payments_file.write_text(json.dumps({"c": _payment("c", "pending")}))
+    assert client.get("/check-payment/c").status_code == 200
+    assert calls == [1]
+
+
+def test_settings_saved_by_another_worker_are_served(tmp_path, monkeypatch):
+    path = tmp_path / "settings.json"
+    monkeypatch.setattr(main, "SETTINGS_FILE", str(path))
+    monkeypatch.setattr(main, "settings_mtime", 0)
+    monkeypatch.setattr(main, "current_settings", dict(main.DEFAULT_SETTINGS, price=1.0))
+    assert main.save_settings(main.current_settings)
+    client = TestClient(main.app)
+    first = client.get("/settings")
+    assert first.json()["price"] == 1.0
+
+    # 其他工作进程保存了新价格（文件修改时间变化）
+    path.write_text(json.dumps(dict(main.DEFAULT_SETTINGS, price=9.9)), encoding='utf-8')
+    mtime = main.settings_mtime + 10
+    os.utime(path, (mtime, mtime))
+
+    second = client.get("/settings", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert second.json()["price"] == 9.9
+    assert main.current_settings["price"] == 9.9
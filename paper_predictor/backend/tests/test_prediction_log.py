@@ -0,0 +1,46 @@
+"""预测事件日志的分段写入与汇总"""
+
+import os
+
+from prediction_log import PredictionLog, latency_percentile
+
+
+def test_rollup_counts_each_segment_once(tmp_path):
+    log = PredictionLog(log_dir=str(tmp_path))
+    for i in range(30):
+        log.record("ICLR", 2025, [5, 6, 8], 0.5, latency_ms=i, method="rule_threshold")
+    log.record("NeurIPS", 2025, [3, 3], 0.0, latency_ms=3000, method="error")
+    assert log.flush() == 31
+    assert log.rollup() == 1
+
+    # 再次汇总不会重复计数
+    log.record("ICLR", 2025, [5, 6, 8], 0.7, latency_ms=1, method="rule_threshold")
+    log.flush()
+    log.rollup()
+    log.rollup()
+
+    result = log.query(granularity="day")
+    assert result["total"]["count"] == 32
+    assert result["total"]["errors"] == 1
+    assert result["total"]["conferences"] == {"ICLR 2025": 31, "NeurIPS 2025": 1}
+    assert result["top_profiles"][0]["count"] == 31
+    assert os.listdir(log.pending_dir) == []
+
+
+def test_rollup_by_another_instance_is_visible(tmp_path):
+    # 任一工作进程汇总后，其他进程通过聚合文件查询到全部事件
+    writer, roller = PredictionLog(log_dir=str(tmp_path)), PredictionLog(log_dir=str(tmp_path))
+    writer.record("ICLR", 2025, [6], 0.5, 5, "rule_threshold")
+    writer.flush()
+    writer.record("ICLR", 2025, [6], 0.5, 5, "rule_threshold")
+    writer.flush()
+    assert roller.rollup() == 2
+    assert writer.query(granularity="hour")["total"]["count"] == 2
+
+
+def test_latency_percentile_reads_histogram():
+    hist = [0] * 13
+    hist[3] = 90  # 5-10ms
+    hist[8] = 10  # 200-500ms
+    assert latency_percentile(hist, 0.5) == 10
+    assert latency_percentile(hist, 0.95) == 500
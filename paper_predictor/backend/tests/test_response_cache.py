@@ -0,0 +1,69 @@
+"""响应缓存的 ETag 与 304"""
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from response_cache import ResponseCache, etag_matches
+
+
+def _app(cache, data):
+    app = FastAPI()
+    cache.register("data", lambda: dict(data))
+
+    @app.get("/data")
+    async def get_data(request: Request):
+        return cache.respond(request, "data")
+
+    return TestClient(app)
+
+
+def test_conditional_request_returns_304():
+    cache = ResponseCache()
+    client = _app(cache, {"a": 1})
+
+    first = client.get("/data")
+    assert first.status_code == 200 and first.json() == {"a": 1}
+    etag = first.headers["etag"]
+
+    second = client.get("/data", headers={"If-None-Match": etag})
+    assert second.status_code == 304 and second.headers["etag"] == etag
+    assert cache.stats == {"hits": 1, "builds": 1, "not_modified": 1}
+
+
+def test_etag_depends_on_content_only():
+    data = {"a": 1}
+    cache = ResponseCache()
+    client = _app(cache, data)
+    etag = client.get("/data").headers["etag"]
+
+    # 失效后内容不变：ETag 不变，条件请求仍然命中
+    cache.invalidate("data")
+    assert client.get("/data", headers={"If-None-Match": etag}).status_code == 304
+
+    # 另一个进程（另一个缓存实例、不同的版本号）对相同内容给出相同的 ETag
+    other = ResponseCache()
+    other.invalidate("data")
+    other.invalidate("data")
+    assert _app(other, data).get("/data").headers["etag"] == etag
+
+    data["a"] = 2
+    cache.invalidate("data")
+    assert client.get("/data", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_etag_matching():
+    assert etag_matches('"x", W/"y"', '"y"')
+    assert etag_matches("*", '"y"')
+    assert not etag_matches('"x"', '"y"')
+    assert not etag_matches(None, '"y"')
+
+
+def test_live_endpoints_are_not_cached():
+    import main
+
+    client = TestClient(main.app)
+    for path in ("/", "/health"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+        assert response.headers["cache-control"] == "no-store"
@@ -0,0 +1,68 @@
+"""共用的评审记录解码器"""
+
+import json
+
+import pytest
+
+import review_decoder
+from review_decoder import decode_review_line, load_skeleton, parse_confidence, parse_rating
+
+
+PAPER = {
+    "paper_id": "abc123",
+    "paper_title": "A Paper",
+    "paper_decision": "Accept (Poster)",
+    "reviews": [
+        {"rating": "6: marginally above the acceptance threshold", "confidence": "4: confident",
+         "dialogue": [{"text": "long discussion"}]},
+        {"rating": 8, "confidence": 3},
+        {"rating": "-1", "confidence": ""},
+        {"rating": "11", "confidence": "6"},
+        {"rating": None, "confidence": None},
+        "not a review"
+    ]
+}
+
+
+@pytest.mark.parametrize("value, expected", [
+    (8, 8.0), ("8", 8.0), ("6: marginally above", 6.0), (" 3 : reject", 3.0), (5.5, 5.5),
+    (None, None), (True, None), ("", None), ("-1", None), ("abc", None), (0, None), (11, None)
+])
+def test_parse_rating(value, expected):
+    assert parse_rating(value) == expected
+
+
+def test_parse_confidence_range():
+    assert parse_confidence("5: absolutely certain") == 5.0
+    assert parse_confidence(6) is None
+
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "json":
+        monkeypatch.setattr(review_decoder, "orjson", None)
+        monkeypatch.setattr(review_decoder, "_loads", json.loads)
+    return request.param
+
+
+@pytest.mark.parametrize("encode", [lambda paper: json.dumps(paper), lambda paper: json.dumps(paper).encode("utf-8")])
+def test_decode_review_line(backend, encode):
+    record = decode_review_line(encode(PAPER))
+    assert list(record.scores) == [6.0, 8.0]
+    assert list(record.confidences) == [4.0, 3.0]
+    assert record.decision == "accept (poster)"
+    assert record.paper_id == "abc123"
+
+
+def test_load_skeleton_drops_dialogue(backend):
+    paper = load_skeleton(json.dumps(PAPER).encode("utf-8"))
+    assert paper["reviews"][0]["dialogue"] == []
+    assert paper["paper_title"] == "A Paper"
+
+
+def test_decode_review_line_without_reviews_or_id(backend):
+    record = decode_review_line(json.dumps({"id": 7, "reviews": None}))
+    assert (len(record.scores), record.decision, record.paper_id) == (0, "", "7")
+    assert decode_review_line("[1, 2]").scores.tolist() == []
+    with pytest.raises(ValueError):
+        decode_review_line(b"{not json")
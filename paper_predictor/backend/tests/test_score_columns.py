@@ -0,0 +1,64 @@
+"""评分列存储的排名"""
+
+import numpy as np
+
+from review_decoder import ReviewRecord
+from score_columns import ScoreColumns
+
+
+def _records(count=400, seed=0):
+    rng = np.random.default_rng(seed)
+    records = []
+    for i in range(count):
+        scores = rng.integers(1, 11, size=rng.integers(1, 6)).astype(float).tolist()
+        decision = "accept (poster)" if np.mean(scores) + rng.normal(0, 1) > 6 else "reject"
+        records.append(ReviewRecord(scores, [3.0] * len(scores), decision, f"p{i}"))
+    return records
+
+
+def _brute_force_rank(records, avg_score):
+    avg_scores = [np.float32(np.mean(record.scores)) for record in records]
+    accepted = ['accept' in record.decision for record in records]
+    target = np.float32(avg_score)
+    higher = [score > target for score in avg_scores]
+    return sum(higher) + 1, sum(h and a for h, a in zip(higher, accepted)) + 1
+
+
+def test_rank_of_matches_brute_force():
+    records = _records()
+    papers = ScoreColumns.from_records(records)
+    queries = [1.0, 3.5, 5.0, 6.25, 17 / 3, 10.0, 11.0]
+    many_all, many_accepted = papers.rank_of_many(queries)
+    for avg_score, rank_all, rank_accepted in zip(queries, many_all, many_accepted):
+        expected = _brute_force_rank(records, avg_score)
+        assert papers.rank_of(avg_score) == expected
+        assert (int(rank_all), int(rank_accepted)) == expected
+
+
+def test_paper_ids_follow_sorted_order():
+    records = _records(count=50)
+    records.append(ReviewRecord([7.0], [], "reject", None))
+    records.append(ReviewRecord([], [], "reject", "no-scores"))
+    records.append(ReviewRecord([2.0], [], "reject", "论文-é"))
+    papers = ScoreColumns.from_records(records)
+
+    by_id = {record.paper_id or "51": record for record in records if record.scores}
+    paper_ids = papers.paper_id_list()
+    assert sorted(paper_ids) == sorted(by_id)
+    for row, paper_id in enumerate(paper_ids):
+        assert papers.paper_id_of(row) == paper_id
+        assert np.float32(np.mean(by_id[paper_id].scores)) == papers.avg_scores[row]
+
+
+def test_paper_ids_are_not_padded():
+    ids = [f"{'x' * 40}{i}" if i == 0 else f"id{i}" for i in range(1000)]
+    records = [ReviewRecord([5.0], [], "reject", paper_id) for paper_id in ids]
+    memory = ScoreColumns.from_records(records).memory_breakdown()
+    assert memory["paper_id_bytes"] == sum(len(paper_id) for paper_id in ids)
+    assert memory["paper_id_offsets"] == 4 * (len(ids) + 1)
+    assert memory["total"] == sum(value for key, value in memory.items() if key != "total")
+
+
+def test_empty_columns():
+    papers = ScoreColumns.from_records([])
+    assert len(papers) == 0 and papers.paper_id_list() == []
@@ -0,0 +1,44 @@
+"""关键词检索的分页与过滤"""
+
+import numpy as np
+
+from search_index import SearchIndex, tokenize
+
+WORDS = ["graph", "neural", "network", "diffusion", "model", "language", "robust", "learning", "vision", "policy"]
+
+
+def _documents(count=400, seed=0):
+    rng = np.random.default_rng(seed)
+    for i in range(count):
+        title = " ".join(rng.choice(WORDS, size=rng.integers(2, 6)))
+        abstract = " ".join(rng.choice(WORDS, size=rng.integers(5, 30)))
+        yield {"paper_id": str(i), "paper_title": title, "paper_keywords": "", "paper_abstract": abstract,
+               "paper_decision": "Accept (Poster)" if i % 3 == 0 else "Reject", "paper_track": "main"}
+
+
+def test_pagination_matches_full_ranking():
+    index = SearchIndex.build(_documents())
+    full = index.search("graph diffusion", limit=100, offset=0)
+    assert full["total"] > 100
+
+    # 逐页拼接的结果与一次取出的排序一致，且没有重复
+    paged = []
+    for offset in range(0, full["total"], 7):
+        paged.extend(index.search("graph diffusion", limit=7, offset=offset)["papers"])
+    assert [paper["paper_id"] for paper in paged[:100]] == [paper["paper_id"] for paper in full["papers"]]
+    assert len({paper["paper_id"] for paper in paged}) == full["total"]
+
+    scores = [paper["score"] for paper in paged]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_match_all_and_decision_filter_match_brute_force():
+    documents = list(_documents())
+    index = SearchIndex.build(documents)
+    result = index.search("robust policy", match_all=True, decision="accepted", limit=100)
+
+    expected = {doc["paper_id"] for doc in documents
+                if {"robust", "policy"} <= set(tokenize(doc["paper_title"] + " " + doc["paper_abstract"]))
+                and doc["paper_decision"].startswith("Accept")}
+    assert result["total"] == len(expected)
+    assert {paper["paper_id"] for paper in result["papers"]} == expected
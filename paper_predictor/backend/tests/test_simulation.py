@@ -0,0 +1,86 @@
+"""/simulate 的向量化规则与评估"""
+
+import numpy as np
+import pytest
+
+from acceptance_index import AcceptanceIndex
+from review_decoder import ReviewRecord
+from rule_engine import RULE_NAMES, match_rule, rule_probability, rule_probability_batch
+from score_columns import ScoreColumns
+from simulation import evaluate, sample_scores, simulate
+
+
+def test_rule_batch_matches_single():
+    rng = np.random.default_rng(1)
+    matrix = np.full((500, 5), np.nan)
+    for row in matrix:
+        count = rng.integers(1, 6)
+        row[:count] = rng.integers(1, 11, size=count)
+
+    probabilities, rule_ids = rule_probability_batch(matrix, rng=np.random.default_rng(2))
+    for row, probability, rule_id in zip(matrix, probabilities, rule_ids):
+        scores = row[~np.isnan(row)].tolist()
+        assert rule_id == match_rule(scores)
+        # 区间规则的概率在区间内；线性插值的概率完全相同
+        low_high = rule_probability(scores, uniform=lambda low, high: (low, high))[0]
+        if RULE_NAMES[rule_id] == "linear":
+            assert probability == pytest.approx(low_high)
+        else:
+            assert low_high[0] <= probability <= low_high[1]
+
+
+@pytest.fixture
+def year_data():
+    rng = np.random.default_rng(3)
+    records = []
+    index = AcceptanceIndex(min_support=5)
+    for i in range(400):
+        scores = rng.choice([1, 3, 5, 6, 8, 10], size=rng.integers(2, 5)).astype(float).tolist()
+        decision = "accept" if np.mean(scores) + rng.normal(0, 1) > 6 else "reject"
+        records.append(ReviewRecord(scores, [3.0] * len(scores), decision, f"p{i}"))
+        index.add(scores, decision == "accept")
+    return {"papers": ScoreColumns.from_records(records), "acceptance_index": index}
+
+
+def test_evaluate_matches_per_row_rules_and_index(year_data):
+    matrix = sample_scores(year_data["papers"], [5, 6], add_reviewers=2, samples=300,
+                           rng=np.random.default_rng(4))
+    outcome = evaluate(year_data, matrix, rng=np.random.default_rng(5), min_support=10)
+
+    for row, probability, empirical in zip(matrix, outcome["probabilities"], outcome["empirical"]):
+        scores = row.tolist()
+        lookup = year_data["acceptance_index"].lookup(scores)
+        if lookup and lookup["total"] >= 10:
+            assert empirical and probability == lookup["probability"]
+            continue
+        assert not empirical
+        bounds = rule_probability(scores, uniform=lambda low, high: (low, high))[0]
+        if isinstance(bounds, tuple):
+            assert bounds[0] <= probability <= bounds[1]
+        else:
+            assert probability == pytest.approx(bounds)
+
+    ranks = year_data["papers"].rank_of_many(outcome["avg_scores"])
+    assert np.array_equal(ranks[0], outcome["rank_in_all"])
+
+
+def test_simulate_baseline_matches_rank_of(year_data):
+    result = simulate(year_data, [5, 6, 8], add_reviewers=1, samples=500, seed=7, min_support=10)
+    baseline = result["baseline"]
+    assert (baseline["rank_in_all"], baseline["rank_in_accepted"]) == year_data["papers"].rank_of(19 / 3)
+
+    # 相同种子的结果可复现（耗时除外）
+    again = simulate(year_data, [5, 6, 8], add_reviewers=1, samples=500, seed=7, min_support=10)
+    assert dict(result, elapsed_ms=None) == dict(again, elapsed_ms=None)
+
+
+@pytest.mark.parametrize("direction, check", [
+    ("up", lambda revised: (revised >= 6).all()),
+    ("down", lambda revised: (revised <= 6).all()),
+    ("any", lambda revised: (revised < 6).any() and (revised > 6).any())
+])
+def test_revise_direction(year_data, direction, check):
+    matrix = sample_scores(year_data["papers"], [5, 6], add_reviewers=0, revise=[1], samples=500,
+                           rng=np.random.default_rng(8), revise_direction=direction)
+    assert (matrix[:, 0] == 5).all()
+    assert check(matrix[:, 1])
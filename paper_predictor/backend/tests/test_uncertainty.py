@@ -0,0 +1,63 @@
+"""bootstrap 置信区间"""
+
+import numpy as np
+import pytest
+
+import uncertainty
+from review_decoder import ReviewRecord
+from score_columns import ScoreColumns
+from similarity_index import SimilarityIndex
+from uncertainty import IntervalEstimator, ensemble_interval
+
+
+@pytest.fixture
+def estimator():
+    rng = np.random.default_rng(0)
+    records = []
+    for i in range(300):
+        scores = rng.integers(1, 11, size=rng.integers(2, 5)).astype(float).tolist()
+        decision = "accept" if np.mean(scores) + rng.normal(0, 1) > 6 else "reject"
+        records.append(ReviewRecord(scores, [3.0] * len(scores), decision, f"p{i}"))
+    papers = ScoreColumns.from_records(records)
+    return IntervalEstimator(papers, SimilarityIndex.from_columns(papers))
+
+
+def test_intervals_are_deterministic_and_contain_point(estimator):
+    first = estimator.intervals([5, 6, 8])
+    estimator._cache.clear()
+    second = estimator.intervals([8, 6, 5])
+    assert first == second
+
+    neighbours = first["neighbours"]
+    assert neighbours["low"] <= neighbours["rate"] <= neighbours["high"]
+    rank_in_all, rank_in_accepted = estimator.papers.rank_of(19 / 3)
+    assert first["rank_in_all"]["low"] <= rank_in_all <= first["rank_in_all"]["high"]
+    assert first["rank_in_accepted"]["low"] <= rank_in_accepted <= first["rank_in_accepted"]["high"]
+
+
+def test_ensemble_interval_contains_mean():
+    members = {"a": 0.2, "b": 0.5, "c": 0.6}
+    interval = ensemble_interval(members)
+    assert interval == ensemble_interval(dict(members))
+    assert interval["low"] <= np.mean(list(members.values())) <= interval["high"]
+    assert ensemble_interval({}) is None
+
+
+@pytest.mark.parametrize("scores", [[-1, 5, 6], [0], [10, 10, 10, 10], [5.5, 2.25]])
+def test_edge_case_profiles(estimator, scores):
+    result = estimator.intervals(scores, individual_predictions={"a": 0.1, "b": 0.9})
+    assert result["probability"]["source"] == "ml_ensemble"
+    assert 1 <= result["rank_in_all"]["low"] <= result["rank_in_all"]["high"] <= len(estimator.papers) + 1
+
+
+def test_cache_evicts_least_recently_used(estimator, monkeypatch):
+    monkeypatch.setattr(uncertainty, "CACHE_SIZE", 2)
+    estimator.intervals([5, 5])
+    estimator.intervals([6, 6])
+    estimator.intervals([5, 5])
+    estimator.intervals([7, 7])
+    assert estimator.cache_info() == {"size": 2, "hits": 1, "misses": 3}
+    estimator.intervals([5, 5])
+    assert estimator.cache_info()["hits"] == 2
+    estimator.intervals([6, 6])
+    assert estimator.cache_info()["misses"] == 4
@@ -0,0 +1,63 @@
+"""上传请求体的大小限制"""
+
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+
+from static_assets import BodySizeLimitMiddleware
+
+
+def _client(limit):
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, limits={"/upload": limit})
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    @app.post("/other")
+    async def other(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return TestClient(app)
+
+
+def _multipart(payload, boundary="b0undary"):
+    return (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n"
+            f"Content-Type: image/png\r\n\r\n").encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+
+
+def _chunked(data, chunk_size=1024):
+    for i in range(0, len(data), chunk_size):
+        yield data[i:i + chunk_size]
+
+
+HEADERS = {"content-type": "multipart/form-data; boundary=b0undary"}
+
+
+def test_declared_length_over_limit_is_rejected():
+    client = _client(4096)
+    response = client.post("/upload", files={"file": ("a.png", b"x" * 10000, "image/png")})
+    assert response.status_code == 413
+
+
+def test_chunked_body_over_limit_is_rejected():
+    client = _client(4096)
+    response = client.post("/upload", content=_chunked(_multipart(b"x" * 10000)), headers=HEADERS)
+    assert response.status_code == 413
+
+    # 未配置限制的路径不受影响
+    assert client.post("/other", content=_chunked(_multipart(b"x" * 10000)), headers=HEADERS).json() == {"size": 10000}
+
+
+def test_chunked_body_within_limit_is_accepted():
+    client = _client(4096)
+    response = client.post("/upload", content=_chunked(_multipart(b"x" * 1000)), headers=HEADERS)
+    assert response.json() == {"size": 1000}
+
+
+def test_main_upload_enforces_limit_without_content_length():
+    import main
+
+    client = TestClient(main.app)
+    body = _multipart(b"x" * (main.MAX_QR_UPLOAD_BYTES + main.MULTIPART_OVERHEAD_BYTES))
+    assert client.post("/upload-qr", content=_chunked(body, 64 * 1024), headers=HEADERS).status_code == 413
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+预测结果的 bootstrap 置信区间
+/predict 请求 include_intervals 时附带概率和排名的不确定性：
+  - 历史近邻：评分最接近的 NEIGHBOUR_K 篇历史论文（SimilarityIndex）的接受率。
+    对 n 篇论文有放回重抽样后的接受数服从 Binomial(n, 接受率)，一次 rng.binomial 即得到所有重抽样结果
+  - 排名：对整个参考年份有放回重抽样，平均分高于用户的论文数同样服从二项分布
+  - 集成模型：对各成员模型的概率做有放回重抽样（矩阵一次计算）
+
+历史部分只取决于排序后的评分组合，按组合缓存（LRU），随机种子由组合决定，
+命中与否结果都相同；集成模型部分每次请求只有几个成员，直接计算
+
+使用方法（在 main.py 中）：
+    estimator = IntervalEstimator(year_data["papers"], year_data["similarity_index"])
+    intervals = estimator.intervals([5, 6, 8], individual_predictions=ml_result["individual_predictions"])
+"""
+
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from acceptance_index import index_keys
+from score_columns import SCORE_SCALE
+from similarity_index import MAX_K
+
+
+NEIGHBOUR_K = MAX_K
+RESAMPLES = 2000
+CONFIDENCE = 0.9
+CACHE_SIZE = 4096
+
+
+def _bounds(samples, digits=4):
+    """重抽样结果的等尾区间"""
+    tail = (1 - CONFIDENCE) / 2
+    low, high = np.quantile(samples, (tail, 1 - tail))
+    return round(float(low), digits), round(float(high), digits)
+
+
+def _seeded_rng(values, scale=SCORE_SCALE):
+    """
+    由输入决定的随机数生成器（同一评分组合/同一组成员概率的区间每次都相同）
+
+    种子取定点化后字节的 CRC32（非负），评分为负数或超出常见范围时同样可用
+    """
+    fixed = np.rint(np.asarray(values, dtype=np.float64) * scale).astype(np.int64)
+    return np.random.default_rng(zlib.crc32(fixed.tobytes()))
+
+
+def ensemble_interval(individual_predictions):
+    """
+    集成模型成员概率的 bootstrap 区间（成员等权重抽样）
+
+    Args:
+        individual_predictions: {模型名: 概率}
+
+    Returns:
+        dict: members / std / low / high，没有成员时返回 None
+    """
+
+    if not individual_predictions:
+        return None
+
+    names = sorted(individual_predictions)
+    members = np.array([individual_predictions[name] for name in names], dtype=np.float64)
+    rng = _seeded_rng(members, scale=1_000_000)
+    resampled = members[rng.integers(0, len(members), size=(RESAMPLES, len(members)))].mean(axis=1)
+    low, high = _bounds(resampled)
+    return {
+        "members": {name: round(float(p), 4) for name, p in zip(names, members)},
+        "std": round(float(members.std()), 4),
+        "low": low,
+        "high": high
+    }
+
+
+class IntervalEstimator:
+    """单个参考年份的区间估计（按评分组合缓存）"""
+
+    def __init__(self, papers, similarity_index):
+        self.papers = papers
+        self.similarity_index = similarity_index
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def historical_intervals(self, scores):
+        """
+        历史近邻接受率和排名的区间（按排序后的评分组合缓存）
+
+        Returns:
+            dict: neighbours / rank_in_all / rank_in_accepted
+        """
+
+        profile = index_keys(scores)[0]
+        cached = self._cache.get(profile)
+        if cached is not None:
+            self._cache.move_to_end(profile)
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        result = self._compute(profile)
+        self._cache[profile] = result
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return result
+
+    def _compute(self, profile):
+        papers = self.papers
+        rng = _seeded_rng(profile)
+        total = len(papers)
+
+        neighbours = self.similarity_index.query(list(profile), k=NEIGHBOUR_K)
+        rows = np.fromiter((row for row, _ in neighbours), dtype=np.int64, count=len(neighbours))
+        accepted = int(papers.accepted_mask[rows].sum())
+        rate = accepted / len(rows)
+        neighbour_low, neighbour_high = _bounds(rng.binomial(len(rows), rate, size=RESAMPLES) / len(rows))
+
+        # 排名 = 平均分更高的论文数 + 1；重抽样后更高的论文数 ~ Binomial(总数, 原比例)
+        rank_in_all, rank_in_accepted = papers.rank_of(sum(profile) / len(profile))
+        all_low, all_high = _bounds(rng.binomial(total, (rank_in_all - 1) / total, size=RESAMPLES) + 1, digits=1)
+        accepted_low, accepted_high = _bounds(
+            rng.binomial(total, (rank_in_accepted - 1) / total, size=RESAMPLES) + 1, digits=1)
+
+        return {
+            "neighbours": {
+                "count": len(rows),
+                "accepted": accepted,
+                "rate": round(rate, 4),
+                "max_distance": round(float(neighbours[-1][1]), 4),
+                "low": neighbour_low,
+                "high": neighbour_high
+            },
+            "rank_in_all": {"low": int(all_low), "high": int(all_high)},
+            "rank_in_accepted": {"low": int(accepted_low), "high": int(accepted_high)}
+        }
+
+    def intervals(self, scores, individual_predictions=None):
+        """
+        /predict 的区间输出
+
+        概率区间：有集成模型结果时用成员重抽样区间，否则用历史近邻接受率区间
+
+        Args:
+            scores: 评分列表
+            individual_predictions: 集成模型各成员的概率（可选）
+
+        Returns:
+            dict: confidence / resamples / probability / rank_in_all / rank_in_accepted / neighbours / ensemble
+        """
+
+        historical = self.historical_intervals(scores)
+        ensemble = ensemble_interval(individual_predictions)
+        if ensemble is not None:
+            probability = {"low": ensemble["low"], "high": ensemble["high"], "source": "ml_ensemble"}
+        else:
+            neighbours = historical["neighbours"]
+            probability = {"low": neighbours["low"], "high": neighbours["high"], "source": "historical_neighbours"}
+
+        return {
+            "confidence": CONFIDENCE,
+            "resamples": RESAMPLES,
+            "probability": probability,
+            "rank_in_all": historical["rank_in_all"],
+            "rank_in_accepted": historical["rank_in_accepted"],
+            "neighbours": historical["neighbours"],
+            "ensemble": ensemble
+        }
+
+    def cache_info(self):
+        return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}